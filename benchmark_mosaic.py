@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from src.config.logging import setup_logging
+from src.config.settings import settings
+from src.schemas import Candidate
+from src.vision.analyzer import _dedupe
+from src.vision.analyzer import _encode_windowed_pass
+from src.vision.analyzer import _extract_frames
+from src.vision.analyzer import _frame_interval
+from src.vision.analyzer import _load_vision_prompts
+from src.vision.analyzer import _send_windowed_pass
+from src.vision.analyzer import _VisionAnalysisResponse
+from src.vision.analyzer import _VisionSession
+from src.vision.extraction import get_extraction_service
+from src.vision.sampling import SampledFrame
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+MODES = {"per-frame": False, "mosaic": True}
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command-line arguments for the benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compares mosaic mode with one image per frame on the same "
+        "local clips, in latency and tokens.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "videos",
+        type=Path,
+        nargs="+",
+        help="Local video files to analyze.",
+    )
+    parser.add_argument(
+        "--description",
+        type=str,
+        required=True,
+        help="Description of the video content to search for.",
+    )
+    parser.add_argument(
+        "--duration",
+        type=int,
+        required=True,
+        help="Target duration of the video clip in seconds.",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=3,
+        help="Gemini calls per clip and mode, whose median latency is reported.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only encode the frames, reporting the estimated image tokens "
+        "without calling Gemini.",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        default=Path("benchmark_mosaic.json"),
+        help="Path to the output JSON file.",
+    )
+    return parser.parse_args()
+
+
+async def run_mode(
+    candidate: Candidate,
+    frames: list[SampledFrame],
+    prompt_template: str,
+    args: argparse.Namespace,
+) -> dict:
+    """
+    Encodes the frames of a clip and sends them to Gemini once per run, with
+    the mosaic setting already applied.
+    """
+    structured_llm = None
+    if not args.dry_run:
+        structured_llm = ChatGoogleGenerativeAI(
+            model=settings.gemini_model,
+            api_key=settings.gemini_api_key.get_secret_value(),
+            temperature=0.1,
+        ).with_structured_output(_VisionAnalysisResponse, include_raw=True)
+    prompt_text = prompt_template.format(
+        description=args.description,
+        duration_seconds=args.duration,
+    )
+
+    encode_seconds, call_seconds, tokens, findings = [], [], [], []
+    for _ in range(1 if args.dry_run else args.runs):
+        session = _VisionSession(structured_llm, candidate)
+        started = time.perf_counter()
+        encoded = await _encode_windowed_pass(
+            session,
+            frames,
+            "single",
+            _frame_interval(),
+        )
+        encode_seconds.append(time.perf_counter() - started)
+        if args.dry_run:
+            continue
+
+        started = time.perf_counter()
+        result = await _send_windowed_pass(session, prompt_text, encoded)
+        call_seconds.append(time.perf_counter() - started)
+        tokens.append(sum(session.token_usage.values()))
+        findings.append(len(result or []))
+
+    encodings = session.frame_encodings
+    return {
+        "frames": len(frames),
+        "images": sum(e.image_count for e in encodings),
+        "payload_bytes": sum(e.payload_bytes for e in encodings),
+        "estimated_image_tokens": sum(e.estimated_tokens for e in encodings),
+        "encode_seconds": statistics.median(encode_seconds),
+        "call_seconds": statistics.median(call_seconds) if call_seconds else None,
+        "total_tokens": statistics.median(tokens) if tokens else None,
+        "findings": findings,
+    }
+
+
+def summarize(rows: list[dict]) -> dict:
+    """
+    Totals every measure over the clips for each mode, with the savings of
+    mosaic mode relative to per-frame mode.
+    """
+    keys = (
+        "images",
+        "payload_bytes",
+        "estimated_image_tokens",
+        "total_tokens",
+        "encode_seconds",
+        "call_seconds",
+    )
+    totals = {
+        mode: {
+            key: sum(row[mode][key] for row in rows)
+            if all(row[mode][key] is not None for row in rows)
+            else None
+            for key in keys
+        }
+        for mode in MODES
+    }
+    savings = {
+        key: round(1 - totals["mosaic"][key] / totals["per-frame"][key], 3)
+        for key in keys
+        if totals["per-frame"][key] and totals["mosaic"][key] is not None
+    }
+    return {"totals": totals, "savings": savings}
+
+
+async def main() -> None:
+    """
+    Analyzes every clip in both modes with the same frames and prompt, so
+    only the packing of the images differs.
+    """
+    args = parse_args()
+    # A single pass, so every call carries every frame of the clip.
+    settings.vision_two_pass = False
+
+    rows = []
+    try:
+        for index, video_path in enumerate(args.videos):
+            frames = await _dedupe(
+                await _extract_frames(video_path, interval_seconds=_frame_interval()),
+            )
+            candidate = Candidate(
+                tweet_url=f"https://x.com/benchmark/status/{index}",
+                text=video_path.name,
+                author="benchmark",
+                created_at="Sun Oct 05 12:00:00 +0000 2025",
+            )
+            row = {"video": str(video_path)}
+            for mode, mosaic in MODES.items():
+                settings.vision_mosaic = mosaic
+                prompts = _load_vision_prompts()
+                if prompts is None:
+                    return
+                row[mode] = await run_mode(candidate, frames, prompts["fine"], args)
+                logger.info("%s (%s): %s", video_path.name, mode, row[mode])
+            rows.append(row)
+    finally:
+        get_extraction_service().shutdown()
+
+    report = {
+        "settings": settings.model_dump(
+            mode="json",
+            include={
+                "gemini_model",
+                "vision_frame_dedup",
+                "vision_max_edge",
+                "vision_jpeg_quality",
+                "vision_window_seconds",
+                "vision_mosaic_columns",
+                "vision_mosaic_rows",
+                "vision_mosaic_tile_edge",
+            },
+        ),
+        "dry_run": args.dry_run,
+        "runs": args.runs,
+        "clips": rows,
+        **summarize(rows),
+    }
+    args.out.write_text(json.dumps(report, indent=2))
+    logger.info("Savings of mosaic mode: %s", report["savings"])
+    logger.info("Report written to %s", args.out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,11 @@
 import json
+import sys
 from pathlib import Path
 
-IN = Path("cookies_raw.json")
-OUT = Path("cookies.json")
+# The input and output files can be passed as arguments, so the export of
+# each account can be converted into its own cookie file.
+IN = Path(sys.argv[1] if len(sys.argv) > 1 else "cookies_raw.json")
+OUT = Path(sys.argv[2] if len(sys.argv) > 2 else "cookies.json")  # noqa: PLR2004
 
 raw = json.loads(IN.read_text(encoding="utf-8"))
 
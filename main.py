@@ -6,6 +6,9 @@ from pathlib import Path
 from src.config.logging import setup_logging
 from src.graph import GraphState
 from src.graph import app
+from src.scraper.scraper import wait_for_refreshes
+from src.vision.download import get_http_client
+from src.vision.extraction import get_extraction_service
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -61,6 +64,7 @@ async def main() -> None:
         candidates=[],
         filtered_candidates=[],
         vision_results=[],
+        prefetcher=None,
         final_result=None,
     )
 
@@ -77,6 +81,10 @@ async def main() -> None:
             logger.warning("Pipeline finished but no suitable video clip was found.")
     except Exception:
         logger.exception("An error occurred in the graph pipeline")
+    finally:
+        await wait_for_refreshes()
+        get_extraction_service().shutdown()
+        get_http_client().close()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import EmailStr
 from pydantic import Field
@@ -19,10 +20,125 @@ class AppSettings(BaseSettings):
     twitter_username: str = Field(...)
     twitter_email: EmailStr = Field(...)
     twitter_password: SecretStr = Field(...)
+    # Cookie files, as written by convert_cookies.py, of the accounts that
+    # searches are spread across. The first one belongs to the account above
+    # and is refreshed with its credentials when it expires.
+    twitter_cookie_files: list[Path] = Field(
+        default_factory=lambda: [BASE_DIR / "cookies.json"],
+        min_length=1,
+    )
+    # Searches each account may send per rate-limit window, paced evenly
+    # after an initial burst, and the longest a search waits for an account
+    # to leave its rate limit before giving up.
+    twitter_search_requests_per_window: int = Field(50, ge=1)
+    twitter_rate_limit_window_seconds: float = Field(900, gt=0)
+    twitter_search_burst: int = Field(5, ge=1)
+    twitter_max_rate_limit_wait_seconds: float = Field(300, ge=0)
+    # Search tab read by the scraper, tweets requested per page and the most
+    # pages followed before giving up on finding enough candidates.
+    twitter_search_product: Literal["Top", "Latest", "Media"] = Field("Top")
+    twitter_search_page_size: int = Field(20, ge=1)
+    twitter_search_max_pages: int = Field(5, ge=1)
+    # Search several queries derived from the description at once, e.g. with
+    # names quoted and video filters, sharing a budget of search requests.
+    twitter_query_expansion: bool = Field(default=False)
+    twitter_query_variants: int = Field(4, ge=1)
+    twitter_search_request_budget: int = Field(8, ge=1)
 
     gemini_api_key: SecretStr = Field(...)
     gemini_model: str = Field("gemini-2.5-flash")
 
+    # The text filter scores candidates in concurrent batches of at most
+    # this many estimated prompt tokens and candidates, retrying each failed
+    # batch on its own.
+    text_filter_batch_tokens: int = Field(4000, ge=100)
+    text_filter_max_batch_size: int = Field(25, ge=1)
+    text_filter_concurrency: int = Field(4, ge=1)
+    text_filter_retries: int = Field(2, ge=0)
+    # Local keyword and name matching ahead of the LLM text filter: candidates
+    # scoring below the first bound are dropped, those scoring at least the
+    # second are kept, and only the ones in between are sent to the LLM.
+    text_prefilter: bool = True
+    text_prefilter_reject_below: float = Field(0.05, ge=0, le=1)
+    text_prefilter_accept_above: float = Field(0.9, ge=0, le=1)
+
+    # Worker processes for frame extraction, defaults to the available cores.
+    vision_extraction_workers: int | None = Field(None, ge=1)
+    # Concurrency of each vision pipeline stage and the size of the bounded
+    # queues between them. Extraction defaults to the extraction workers.
+    vision_download_concurrency: int = Field(4, ge=1)
+    vision_extract_concurrency: int | None = Field(None, ge=1)
+    vision_encode_concurrency: int = Field(2, ge=1)
+    vision_llm_concurrency: int = Field(4, ge=1)
+    vision_queue_size: int = Field(2, ge=1)
+    # Download this many top scraped candidates while the text filter runs.
+    vision_prefetch_count: int = Field(0, ge=0)
+    # Stop analyzing further videos once a finding reaches this confidence.
+    vision_good_enough_confidence: float | None = Field(None, ge=0, le=1)
+    # Smallest short edge (e.g. 360 for 360p) of the video variant downloaded
+    # for analysis. Unset always downloads the best-quality stream.
+    vision_analysis_resolution: int | None = Field(360, ge=1)
+    # Direct MP4 downloads: keep-alive pool size, per-request timeout and
+    # how many times an interrupted transfer is resumed.
+    video_download_pool_size: int = Field(8, ge=1)
+    video_download_timeout_seconds: float = Field(30, gt=0)
+    video_download_retries: int = Field(3, ge=0)
+    # Decode frames straight from the MP4 URL instead of downloading first.
+    vision_streaming: bool = Field(default=False)
+    # Per-call budget frames are scaled and encoded to fit.
+    vision_max_edge: int = Field(768, ge=256)
+    vision_jpeg_quality: int = Field(80, ge=40, le=100)
+    vision_max_payload_bytes: int | None = Field(15_000_000, gt=0)
+    vision_max_image_tokens: int | None = Field(None, gt=0)
+    # Pack consecutive frames into timestamped grid images.
+    vision_mosaic: bool = Field(default=False)
+    vision_mosaic_columns: int = Field(3, ge=1)
+    vision_mosaic_rows: int = Field(3, ge=1)
+    vision_mosaic_tile_edge: int = Field(256, ge=64)
+    # Leading frames fingerprinted to spot the same video posted by several
+    # tweets, so it is analyzed once. Unset disables the check.
+    vision_media_fingerprint_frames: int | None = Field(5, ge=2)
+    # Drop near-duplicate frames before they are sent to Gemini.
+    vision_frame_dedup: bool = Field(default=True)
+    vision_dedup_hash_distance: int = Field(6, ge=0, le=64)
+    vision_dedup_max_gap_seconds: float = Field(10, gt=0)
+    # Coarse-to-fine analysis: a sparse, downscaled pass picks the windows
+    # that a dense, full-resolution pass then refines.
+    vision_two_pass: bool = Field(default=False)
+    vision_coarse_interval_seconds: float = Field(6, gt=0)
+    vision_coarse_max_edge: int = Field(384, ge=64)
+    vision_fine_interval_seconds: float = Field(0.5, gt=0)
+    vision_window_padding_seconds: float = Field(4, ge=0)
+    # Split longer videos into overlapping windows analyzed concurrently.
+    vision_window_seconds: float | None = Field(None, gt=0)
+    vision_window_overlap_seconds: float = Field(20, ge=0)
+
+    # Persistent cache of search results, a TTL of 0 disables it. Expired
+    # searches are still served for the stale window while they refresh in
+    # the background, and the tweets they found are kept for longer.
+    search_cache_path: Path = Field(BASE_DIR / ".cache" / "searches.sqlite3")
+    search_cache_ttl_seconds: int = Field(15 * 60, ge=0)
+    search_cache_stale_seconds: int = Field(60 * 60, ge=0)
+    tweet_cache_ttl_seconds: int = Field(7 * 24 * 3600, ge=0)
+
+    # Persistent full-text index of every scraped video tweet, searched
+    # before Twitter. Only tweets younger than the maximum age are served,
+    # and a maximum age of 0 disables the index.
+    tweet_index_path: Path = Field(BASE_DIR / ".cache" / "tweets.sqlite3")
+    tweet_index_max_age_seconds: int = Field(3 * 24 * 3600, ge=0)
+
+    # Persistent cache of downloaded videos, a budget of 0 disables it.
+    video_cache_dir: Path = Field(BASE_DIR / ".cache" / "videos")
+    video_cache_max_bytes: int = Field(2 * 1024**3, ge=0)
+
+    # Persistent cache of vision findings, a TTL of 0 disables it. Analyses
+    # that found nothing expire sooner, and are not cached with a TTL of 0.
+    vision_cache_path: Path = Field(BASE_DIR / ".cache" / "vision_results.sqlite3")
+    vision_cache_ttl_seconds: int = Field(7 * 24 * 3600, ge=0)
+    vision_cache_empty_ttl_seconds: int = Field(3600, ge=0)
+    # Minimum similarity for reusing findings of a near-identical description.
+    vision_cache_near_match_threshold: float | None = Field(None, gt=0, le=1)
+
     model_config = SettingsConfigDict(
         env_file=BASE_DIR / ".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,157 @@
+import logging
+from collections import Counter
+
+import numpy as np
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.schemas import Candidate
+from src.scraper.queries import extract_entities
+from src.scraper.queries import extract_keywords
+
+logger = logging.getLogger(__name__)
+
+# Standard BM25 parameters: term frequency saturation and length normalization.
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+# Weights of keyword coverage, name coverage and BM25 in the local score.
+_COVERAGE_WEIGHT = 0.4
+_ENTITY_WEIGHT = 0.4
+_BM25_WEIGHT = 0.2
+_SUFFIXES = ("ing", "ed", "es", "s")
+_MIN_STEM_LENGTH = 3
+
+
+class PrefilterResult(BaseModel):
+    """
+    The candidates split by the local prefilter into the ones it decided on
+    and the ones left to the LLM, each in its original order.
+    """
+
+    accepted: list[Candidate] = Field(default_factory=list)
+    ambiguous: list[Candidate] = Field(default_factory=list)
+    rejected: list[Candidate] = Field(default_factory=list)
+
+
+def _stem(word: str) -> str:
+    """
+    Strips a common English suffix, so "talking" and "talks" both match
+    "talk".
+    """
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM_LENGTH:
+            return word[: -len(suffix)]
+    return word
+
+
+def _tokenize(text: str) -> list[str]:
+    """
+    Lowercases and stems the keywords of a text, dropping stopwords and
+    the leading @ or # of mentions and hashtags.
+    """
+    return [_stem(w.lower().lstrip("@#")) for w in extract_keywords(text)]
+
+
+def score_texts(texts: list[str], description: str) -> np.ndarray:
+    """
+    Scores how well each text matches a description, from 0 to 1.
+
+    The score combines the share of the description's keywords a text
+    contains, the share of its names (runs of capitalized words) that appear
+    as phrases, and a BM25 score normalized by that of a text of average
+    length containing every keyword once, computed for the whole batch at
+    once.
+
+    Args:
+        texts: The tweet texts.
+        description: The search description.
+
+    Returns:
+        One score per text.
+    """
+    terms = list(dict.fromkeys(_tokenize(description)))
+    if not texts or not terms:
+        return np.zeros(len(texts))
+
+    documents = [_tokenize(text) for text in texts]
+    counts = [Counter(document) for document in documents]
+    tf = np.array([[c[t] for t in terms] for c in counts], dtype=float)
+    lengths = np.array([max(len(d), 1) for d in documents], dtype=float)
+
+    present = tf > 0
+    df = present.sum(axis=0)
+    idf = np.log1p((len(texts) - df + 0.5) / (df + 0.5))
+    norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths / lengths.mean())
+    bm25 = (idf * tf * (_BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+    # Relative to a text of average length containing every term once.
+    bm25_normalized = np.minimum(bm25 / idf.sum(), 1)
+
+    coverage = present.mean(axis=1)
+    entities = [" ".join(_tokenize(e)) for e in extract_entities(description)]
+    entities = [e for e in entities if e]
+    if entities:
+        padded = [f" {' '.join(d)} " for d in documents]
+        entity_coverage = np.array(
+            [[f" {e} " in doc for e in entities] for doc in padded],
+        ).mean(axis=1)
+    else:
+        entity_coverage = coverage
+
+    return (
+        _COVERAGE_WEIGHT * coverage
+        + _ENTITY_WEIGHT * entity_coverage
+        + _BM25_WEIGHT * bm25_normalized
+    )
+
+
+def prefilter_candidates(
+    candidates: list[Candidate],
+    description: str,
+    reject_below: float,
+    accept_above: float,
+) -> PrefilterResult:
+    """
+    Decides on the clear cases of the text filter locally, so that only the
+    ambiguous candidates are sent to the LLM.
+
+    Args:
+        candidates: The candidates to score.
+        description: The user's original search description.
+        reject_below: Candidates scoring below this are dropped. Candidates
+            sharing no keyword with the description always score 0.
+        accept_above: Candidates scoring at least this are kept, with the
+            local score as their `lexical_score`. Their `text_score` is left
+            unset, as the local score is not on the LLM's scale.
+
+    Returns:
+        The accepted, ambiguous and rejected candidates.
+    """
+    scores = score_texts([c.text for c in candidates], description)
+    result = PrefilterResult()
+    for candidate, score in zip(candidates, scores.tolist(), strict=True):
+        if score < reject_below:
+            logger.info(
+                "REJECTING candidate %s locally (score=%.2f)",
+                candidate.tweet_url,
+                score,
+            )
+            result.rejected.append(candidate)
+        elif score >= accept_above:
+            logger.info(
+                "ACCEPTING candidate %s locally (score=%.2f)",
+                candidate.tweet_url,
+                score,
+            )
+            result.accepted.append(
+                candidate.model_copy(update={"lexical_score": round(score, 4)}),
+            )
+        else:
+            result.ambiguous.append(candidate)
+
+    logger.info(
+        "Local prefilter accepted %d, rejected %d and left %d candidates to the LLM.",
+        len(result.accepted),
+        len(result.rejected),
+        len(result.ambiguous),
+    )
+    return result
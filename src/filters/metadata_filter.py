@@ -0,0 +1,55 @@
+import logging
+
+from src.schemas import Candidate
+
+logger = logging.getLogger(__name__)
+
+
+def _usefulness(candidate: Candidate) -> tuple[int, int]:
+    """
+    Ranks a candidate by the reach of its tweet, then by the resolution of
+    its video. Unknown values rank last.
+    """
+    short_edge = min(candidate.width or 0, candidate.height or 0)
+    return candidate.view_count or 0, short_edge
+
+
+def prune_candidates(
+    candidates: list[Candidate],
+    duration_seconds: float,
+) -> list[Candidate]:
+    """
+    Drops candidates whose video is too short to contain the requested clip
+    and ranks the rest by usefulness.
+
+    This runs on scraped metadata only, before the text filter and before
+    any download. Candidates of unknown duration are kept.
+
+    Args:
+        candidates: The list of raw Candidate objects from the scraper.
+        duration_seconds: The target duration for the video clip.
+
+    Returns:
+        The remaining candidates, most viewed first.
+    """
+    kept: list[Candidate] = []
+    for candidate in candidates:
+        if (
+            candidate.duration_seconds is not None
+            and candidate.duration_seconds < duration_seconds
+        ):
+            logger.info(
+                "PRUNING candidate %s (video is %.1fs)",
+                candidate.tweet_url,
+                candidate.duration_seconds,
+            )
+            continue
+        kept.append(candidate)
+
+    kept.sort(key=_usefulness, reverse=True)
+    logger.info(
+        "Metadata pruning reduced candidates from %d to %d",
+        len(candidates),
+        len(kept),
+    )
+    return kept
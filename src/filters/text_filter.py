@@ -1,6 +1,8 @@
+import asyncio
 import json
 import logging
 
+from langchain_core.runnables import Runnable
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 from pydantic import Field
@@ -12,6 +14,9 @@ from src.schemas import Candidate
 
 logger = logging.getLogger(__name__)
 
+# A rough average for English text, used to size the batches.
+_CHARS_PER_TOKEN = 4
+
 
 class _ScoredCandidateResult(BaseModel):
     """
@@ -31,6 +36,87 @@ class _TextFilterResults(BaseModel):
     results: list[_ScoredCandidateResult]
 
 
+def _format_candidate(candidate: Candidate) -> str:
+    """
+    Renders a candidate as one compact line of JSON for the prompt.
+    """
+    return json.dumps({"url": str(candidate.tweet_url), "text": candidate.text})
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the number of Gemini tokens of a text, at about four
+    characters per token.
+    """
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _split_batches(candidates: list[Candidate]) -> list[list[Candidate]]:
+    """
+    Splits candidates into consecutive batches whose estimated prompt
+    tokens fit `settings.text_filter_batch_tokens` and whose size stays
+    within `settings.text_filter_max_batch_size`, so every response fits the
+    output limit. A candidate longer than the budget gets a batch of its own.
+    """
+    batches: list[list[Candidate]] = []
+    batch: list[Candidate] = []
+    batch_tokens = 0
+    for candidate in candidates:
+        tokens = _estimate_tokens(_format_candidate(candidate))
+        if batch and (
+            batch_tokens + tokens > settings.text_filter_batch_tokens
+            or len(batch) >= settings.text_filter_max_batch_size
+        ):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(candidate)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _score_batch(
+    structured_llm: Runnable,
+    prompt_template: str,
+    description: str,
+    batch: list[Candidate],
+) -> dict[str, float]:
+    """
+    Scores one batch of candidates, retrying the call up to
+    `settings.text_filter_retries` times.
+
+    Returns:
+        The score of every tweet URL the model rated.
+
+    Raises:
+        Exception: The error of the last attempt, if every attempt failed or
+            returned a malformed response.
+    """
+    prompt = prompt_template.format(
+        description=description,
+        candidate_texts="[\n" + ",\n".join(map(_format_candidate, batch)) + "\n]",
+    )
+    error: Exception | None = None
+    for attempt in range(settings.text_filter_retries + 1):
+        if attempt:
+            logger.warning(
+                "Retrying a text filter batch of %d candidates after: %s",
+                len(batch),
+                error,
+            )
+        try:
+            response = await structured_llm.ainvoke(prompt)
+        except Exception as exc:  # noqa: BLE001
+            error = exc
+            continue
+        if isinstance(response, _TextFilterResults):
+            return {str(r.tweet_url): r.score for r in response.results}
+        msg = "The model returned a malformed response."
+        error = ValueError(msg)
+    raise error
+
+
 async def filter_candidates_by_text(
     candidates: list[Candidate],
     description: str,
@@ -42,13 +128,19 @@ async def filter_candidates_by_text(
     This function uses an LLM to score each candidate's tweet text against the
     user's description, keeping only those that meet a minimum score threshold.
 
+    Candidates are scored in batches that fit a token budget, sent
+    concurrently. A batch that fails is retried on its own, and if it keeps
+    failing its candidates pass unfiltered, while the other batches are still
+    filtered.
+
     Args:
         candidates: The list of raw Candidate objects from the scraper.
         description: The user's original search description.
         score_threshold: The minimum score (0.0 to 1.0) to keep a candidate.
 
     Returns:
-        A filtered list of candidates that are deemed textually relevant.
+        A filtered list of candidates that are deemed textually relevant, each
+        carrying its score in `text_score`.
     """
     if not candidates:
         return []
@@ -65,44 +157,63 @@ async def filter_candidates_by_text(
         logger.error("Could not load text filter prompt template.")
         return candidates
 
-    candidate_texts_for_prompt = [
-        {"url": str(c.tweet_url), "text": c.text} for c in candidates
-    ]
-    candidate_texts_json = json.dumps(candidate_texts_for_prompt, indent=2)
-
-    prompt = prompt_template.format(
-        description=description,
-        candidate_texts=candidate_texts_json,
+    batches = _split_batches(candidates)
+    semaphore = asyncio.Semaphore(settings.text_filter_concurrency)
+
+    async def score(batch: list[Candidate]) -> dict[str, float]:
+        async with semaphore:
+            return await _score_batch(
+                structured_llm,
+                prompt_template,
+                description,
+                batch,
+            )
+
+    logger.info(
+        "Sending %d candidates to LLM for text analysis in %d batches...",
+        len(candidates),
+        len(batches),
     )
-
-    logger.info("Sending %d candidates to LLM for text analysis...", len(candidates))
-    try:
-        response = await structured_llm.ainvoke(prompt)
-        score_map = {str(r.tweet_url): r.score for r in response.results}
-
-        filtered_candidates = []
-        for candidate in candidates:
-            score = score_map.get(str(candidate.tweet_url), 0.0)
-            if score >= score_threshold:
-                filtered_candidates.append(candidate)
-                logger.info(
-                    "KEEPING candidate %s (score=%.2f)",
-                    candidate.tweet_url,
-                    score,
-                )
-            else:
-                logger.info(
-                    "DROPPING candidate %s (score=%.2f)",
-                    candidate.tweet_url,
-                    score,
-                )
-        logger.info(
-            "Text filtering reduced candidates from %d to %d",
-            len(candidates),
-            len(filtered_candidates),
-        )
-    except Exception:
-        logger.exception("An error occurred during LLM text filtering.")
-        return candidates
-    else:
-        return filtered_candidates
+    results = await asyncio.gather(*map(score, batches), return_exceptions=True)
+
+    score_map: dict[str, float] = {}
+    unscored: set[str] = set()
+    for batch, result in zip(batches, results, strict=True):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Text filtering failed for a batch of %d candidates, keeping"
+                " them unfiltered: %s",
+                len(batch),
+                result,
+            )
+            unscored.update(str(c.tweet_url) for c in batch)
+        else:
+            score_map.update(result)
+
+    filtered_candidates = []
+    for candidate in candidates:
+        if str(candidate.tweet_url) in unscored:
+            filtered_candidates.append(candidate)
+            continue
+        score = score_map.get(str(candidate.tweet_url), 0.0)
+        if score >= score_threshold:
+            filtered_candidates.append(
+                candidate.model_copy(update={"text_score": score}),
+            )
+            logger.info(
+                "KEEPING candidate %s (score=%.2f)",
+                candidate.tweet_url,
+                score,
+            )
+        else:
+            logger.info(
+                "DROPPING candidate %s (score=%.2f)",
+                candidate.tweet_url,
+                score,
+            )
+    logger.info(
+        "Text filtering reduced candidates from %d to %d",
+        len(candidates),
+        len(filtered_candidates),
+    )
+    return filtered_candidates
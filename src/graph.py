@@ -1,17 +1,25 @@
-import asyncio
 import logging
 from typing import TypedDict
 
 from langgraph.graph import END
 from langgraph.graph import StateGraph
 
+from src.config.settings import settings
+from src.filters.lexical_filter import prefilter_candidates
+from src.filters.metadata_filter import prune_candidates
 from src.filters.text_filter import filter_candidates_by_text
 from src.schemas import Candidate
 from src.schemas import FinalResult
 from src.schemas import VisionResult
 from src.scraper.scraper import scrape_candidates
+from src.scraper.search_cache import get_search_cache
+from src.scraper.sessions import get_session_pool
+from src.scraper.tweet_index import get_tweet_index
 from src.selector.selector import select_best_clip
-from src.vision.analyzer import analyze_video_for_clip
+from src.vision.analyzer import analyze_videos
+from src.vision.prefetch import VideoPrefetcher
+from src.vision.result_cache import get_vision_result_cache
+from src.vision.video_cache import get_video_cache
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,7 @@ class GraphState(TypedDict):
     candidates: list[Candidate]
     filtered_candidates: list[Candidate]
     vision_results: list[VisionResult]
+    prefetcher: VideoPrefetcher | None
     final_result: FinalResult | None
     trace_info: dict
 
@@ -36,26 +45,93 @@ async def scrape_node(state: GraphState) -> dict:
     Node that scrapes Twitter for initial candidates videos.
     """
     logger.info("--- SCRAPE NODE ---")
+    pool = get_session_pool()
+    search_cache = get_search_cache()
+    wait_seconds, failovers = pool.wait_seconds, pool.failovers
+    cache_hits = search_cache.hits + search_cache.stale_hits
+    index_hits = get_tweet_index().hits
     candidates = await scrape_candidates(
         query=state["description"],
         max_candidates=state["max_candidates"],
     )
     state["trace_info"]["scraped_count"] = len(candidates)
+    state["trace_info"]["rate_limit_wait_seconds"] = pool.wait_seconds - wait_seconds
+    state["trace_info"]["rate_limit_failovers"] = pool.failovers - failovers
+    state["trace_info"]["search_cache_hits"] = (
+        search_cache.hits + search_cache.stale_hits - cache_hits
+    )
+    state["trace_info"]["tweet_index_hits"] = get_tweet_index().hits - index_hits
+    state["trace_info"]["scrape_duplicate_media"] = sum(
+        len(c.shared_tweet_urls) for c in candidates
+    )
     return {"candidates": candidates}
 
 
+async def prune_node(state: GraphState) -> dict:
+    """
+    Node that drops candidates whose video metadata rules them out.
+    """
+    logger.info("--- PRUNE NODE ---")
+    pruned = prune_candidates(
+        candidates=state["candidates"],
+        duration_seconds=state["duration_seconds"],
+    )
+    state["trace_info"]["pruned_count"] = len(state["candidates"]) - len(pruned)
+    return {"candidates": pruned}
+
+
 async def filter_node(state: GraphState) -> dict:
     """
     Node that filters candidates based on tweet text relevance.
     """
     logger.info("--- FILTER NODE ---")
+    candidates = state["candidates"]
+    kept = candidates
+    accepted: list[Candidate] = []
+    if settings.text_prefilter:
+        split = prefilter_candidates(
+            candidates,
+            state["description"],
+            reject_below=settings.text_prefilter_reject_below,
+            accept_above=settings.text_prefilter_accept_above,
+        )
+        accepted, candidates = split.accepted, split.ambiguous
+        rejected = {c.tweet_url for c in split.rejected}
+        kept = [c for c in state["candidates"] if c.tweet_url not in rejected]
+        state["trace_info"]["prefilter_accepted"] = len(split.accepted)
+        state["trace_info"]["prefilter_rejected"] = len(split.rejected)
+
+    # Started after the prefilter, so rejected videos take no prefetch slot
+    # while the LLM filter runs.
+    prefetcher = None
+    if settings.vision_prefetch_count:
+        prefetcher = VideoPrefetcher()
+        prefetcher.start(kept[: settings.vision_prefetch_count])
+
     filtered = await filter_candidates_by_text(
-        candidates=state["candidates"],
+        candidates=candidates,
         description=state["description"],
         score_threshold=0.5,
     )
+    if accepted:
+        order = {c.tweet_url: i for i, c in enumerate(state["candidates"])}
+        filtered = sorted([*accepted, *filtered], key=lambda c: order[c.tweet_url])
     state["trace_info"]["text_filtered_count"] = len(filtered)
-    return {"filtered_candidates": filtered}
+    if prefetcher:
+        prefetcher.retain(filtered)
+        if not filtered:
+            await _close_prefetcher(prefetcher, state["trace_info"])
+            prefetcher = None
+    return {"filtered_candidates": filtered, "prefetcher": prefetcher}
+
+
+async def _close_prefetcher(prefetcher: VideoPrefetcher, trace_info: dict) -> None:
+    """
+    Cancels the prefetches that were not adopted and records their outcome.
+    """
+    await prefetcher.close()
+    trace_info["prefetch_hits"] = prefetcher.hits
+    trace_info["prefetch_wasted_bytes"] = prefetcher.wasted_bytes
 
 
 async def vision_node(state: GraphState) -> dict:
@@ -63,17 +139,32 @@ async def vision_node(state: GraphState) -> dict:
     Node that performs vision analysis on filtered candidates.
     """
     logger.info("--- VISION NODE ---")
-    tasks = [
-        analyze_video_for_clip(
-            candidate=candidate,
+    video_cache = get_video_cache()
+    result_cache = get_vision_result_cache()
+    cache_hits, cache_misses = video_cache.hits, video_cache.misses
+    result_cache_hits = result_cache.hits
+    prefetcher = state.get("prefetcher")
+    try:
+        batch = await analyze_videos(
+            candidates=state["filtered_candidates"],
             description=state["description"],
             duration_seconds=state["duration_seconds"],
+            prefetcher=prefetcher,
         )
-        for candidate in state["filtered_candidates"]
-    ]
-    results = await asyncio.gather(*tasks)
-    successful_results = [r for r in results if r and r.findings]
+    finally:
+        if prefetcher:
+            await _close_prefetcher(prefetcher, state["trace_info"])
+    successful_results = [r for r in batch.results if r and r.findings]
+    state["trace_info"]["vision_pipeline"] = batch.stage_metrics
+    state["trace_info"]["vision_cancelled"] = batch.cancelled
+    state["trace_info"]["vision_duplicate_media"] = batch.duplicate_count
     state["trace_info"]["vision_analysis_count"] = len(successful_results)
+    state["trace_info"]["video_cache_hits"] = video_cache.hits - cache_hits
+    state["trace_info"]["video_cache_misses"] = video_cache.misses - cache_misses
+    state["trace_info"]["vision_cache_hits"] = result_cache.hits - result_cache_hits
+
+    state["trace_info"]["vision_token_usage"] = batch.token_usage
+    state["trace_info"]["vision_frame_encodings"] = batch.frame_encodings
     return {"vision_results": successful_results}
 
 
@@ -115,13 +206,15 @@ def build_graph():
     workflow = StateGraph(GraphState)
 
     workflow.add_node("scrape", scrape_node)
+    workflow.add_node("prune", prune_node)
     workflow.add_node("filter", filter_node)
     workflow.add_node("vision", vision_node)
     workflow.add_node("select", select_node)
 
     workflow.set_entry_point("scrape")
 
-    workflow.add_edge("scrape", "filter")
+    workflow.add_edge("scrape", "prune")
+    workflow.add_edge("prune", "filter")
 
     workflow.add_conditional_edges(
         "filter",
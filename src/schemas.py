@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel
 from pydantic import Field
@@ -6,6 +7,17 @@ from pydantic import HttpUrl
 from pydantic import field_validator
 
 
+class VideoVariant(BaseModel):
+    """
+    One encoding of a tweet's video, as offered by Twitter.
+    """
+
+    url: HttpUrl
+    bitrate: int | None = Field(default=None, description="The bitrate in bits/s.")
+    width: int | None = None
+    height: int | None = None
+
+
 class Candidate(BaseModel):
     """
     Represents a single tweet that has been identified by the scraper as a
@@ -25,6 +37,32 @@ class Candidate(BaseModel):
         default=None,
         description="The URL of the highest quality video stream, if available.",
     )
+    video_variants: list[VideoVariant] = Field(
+        default_factory=list,
+        description="Every MP4 variant of the video, with its bitrate and size.",
+    )
+    media_id: str | None = Field(
+        default=None,
+        description="The Twitter id of the video, shared by its reposts.",
+    )
+    shared_tweet_urls: list[HttpUrl] = Field(
+        default_factory=list,
+        description="Other tweets posting the same video.",
+    )
+    duration_seconds: float | None = Field(
+        default=None,
+        ge=0,
+        description="The length of the video in seconds, if known.",
+    )
+    width: int | None = Field(default=None, description="The video width in pixels.")
+    height: int | None = Field(
+        default=None,
+        description="The video height in pixels.",
+    )
+    view_count: int | None = Field(
+        default=None,
+        description="The number of times the tweet was viewed, if known.",
+    )
     text: str = Field(
         ...,
         description="The full text content of the tweet.",
@@ -37,16 +75,33 @@ class Candidate(BaseModel):
         ...,
         description="The date and time when the tweet was created.",
     )
+    text_score: float | None = Field(
+        default=None,
+        ge=0,
+        le=1,
+        description="The relevance score given to the tweet text by the text filter.",
+    )
+    lexical_score: float | None = Field(
+        default=None,
+        ge=0,
+        le=1,
+        description="The keyword score given to the tweet text by the local "
+        "prefilter, which is not on the scale of `text_score`.",
+    )
 
     @field_validator("created_at", mode="before")
     @classmethod
     def parse_created_at(cls, value: str) -> datetime:
         """
         Parses the created_at string from Twitter into a datetime object.
+        ISO 8601 strings, as written by `model_dump_json`, are accepted too.
         """
         if isinstance(value, datetime):
             return value
-        return datetime.strptime(value, "%a %b %d %H:%M:%S %z %Y")
+        try:
+            return datetime.strptime(value, "%a %b %d %H:%M:%S %z %Y")
+        except ValueError:
+            return datetime.fromisoformat(value)
 
 
 class ClipFindings(BaseModel):
@@ -79,6 +134,73 @@ class ClipFindings(BaseModel):
     )
 
 
+class FrameEncoding(BaseModel):
+    """
+    Records how the frames of a single vision call were scaled and encoded
+    to fit the per-call budget.
+    """
+
+    stage: str
+    frame_count: int = 0
+    image_count: int = Field(
+        0,
+        description="The number of images sent, lower than the frame count "
+        "when frames are packed into mosaics.",
+    )
+    max_edge: int = 0
+    jpeg_quality: int = 0
+    payload_bytes: int = 0
+    estimated_tokens: int = 0
+    estimated_tokens_unpacked: int | None = Field(
+        None,
+        description="The estimated image tokens had the frames been sent one "
+        "image per frame, recorded when mosaics are used.",
+    )
+
+
+class PipelineStageMetrics(BaseModel):
+    """
+    Throughput and backpressure figures of one stage of the vision pipeline.
+    """
+
+    stage: str
+    concurrency: int = 0
+    processed: int = 0
+    dropped: int = Field(
+        0,
+        description="The number of items the stage failed or filtered out.",
+    )
+    cancelled: int = Field(
+        0,
+        description="The number of items abandoned in or before the stage when "
+        "the pipeline stopped early.",
+    )
+    max_queue_depth: int = 0
+    mean_queue_depth: float = Field(
+        0,
+        description="The average depth of the input queue, sampled on every put.",
+    )
+    blocked_seconds: float = Field(
+        0,
+        description="The total time producers waited for room in the input queue.",
+    )
+
+
+class CancelledAnalysis(BaseModel):
+    """
+    A vision analysis abandoned once another video yielded a confident match.
+    """
+
+    tweet_url: HttpUrl
+    text_score: float | None = None
+    stage: str = Field(..., description="The stage the analysis was in.")
+    status: Literal["cancelled", "skipped"] = Field(
+        ...,
+        description="Whether the analysis was cancelled in flight or skipped "
+        "before it started.",
+    )
+
+
 class VisionResult(BaseModel):
     """
     Contains all the findings (clips) from a single video analysis. This is the
@@ -87,10 +209,23 @@ class VisionResult(BaseModel):
 
     tweet_url: HttpUrl
     best_video_url: HttpUrl
+    shared_tweet_urls: list[HttpUrl] = Field(
+        default_factory=list,
+        description="Other tweets posting the same video, which the findings "
+        "apply to as well.",
+    )
     findings: list[ClipFindings] = Field(
         default_factory=list,
         description="A list of all relevant clips found within the video.",
     )
+    token_usage: dict[str, int] = Field(
+        default_factory=dict,
+        description="The number of tokens used by each vision pass.",
+    )
+    frame_encodings: list[FrameEncoding] = Field(
+        default_factory=list,
+        description="The frame encoding applied to each vision call.",
+    )
 
 
 class FinalAlternate(BaseModel):
@@ -110,9 +245,41 @@ class FinalTrace(BaseModel):
     """
 
     candidates_considered: int = 0
+    rate_limit_wait_seconds: float = Field(
+        0,
+        description="The time searches waited for a Twitter account to leave "
+        "its rate limit.",
+    )
+    rate_limit_failovers: int = Field(
+        0,
+        description="The number of searches moved to another account after "
+        "hitting a rate limit.",
+    )
+    pruned_by_metadata: int = 0
+    duplicate_media: int = Field(
+        0,
+        description="The number of tweets folded into another tweet posting "
+        "the same video.",
+    )
+    prefilter_rejected: int = Field(
+        0,
+        description="The number of candidates the local text prefilter dropped "
+        "without an LLM call.",
+    )
+    prefilter_accepted: int = Field(
+        0,
+        description="The number of candidates the local text prefilter kept "
+        "without an LLM call.",
+    )
     filtered_by_text: int = 0
     vision_calls: int = 0
     final_choice_rank: int = 0
+    vision_token_usage: dict[str, int] = Field(default_factory=dict)
+    frame_encodings: list[FrameEncoding] = Field(default_factory=list)
+    vision_pipeline: list[PipelineStageMetrics] = Field(default_factory=list)
+    cancelled_analyses: list[CancelledAnalysis] = Field(default_factory=list)
+    prefetch_hits: int = 0
+    prefetch_wasted_bytes: int = 0
 
 
 class FinalResult(BaseModel):
@@ -123,6 +290,7 @@ class FinalResult(BaseModel):
 
     tweet_url: HttpUrl
     video_url: HttpUrl
+    shared_tweet_urls: list[HttpUrl] = Field(default_factory=list)
     start_time_s: float
     end_time_s: float
     confidence: float
@@ -132,10 +300,14 @@ class FinalResult(BaseModel):
 
 
 __all__ = [
+    "CancelledAnalysis",
     "Candidate",
     "ClipFindings",
     "FinalAlternate",
     "FinalResult",
     "FinalTrace",
+    "FrameEncoding",
+    "PipelineStageMetrics",
+    "VideoVariant",
     "VisionResult",
 ]
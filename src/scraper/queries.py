@@ -0,0 +1,81 @@
+import re
+
+# Words that only narrow a literal search without adding meaning.
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "about",
+        "an",
+        "and",
+        "at",
+        "by",
+        "for",
+        "from",
+        "in",
+        "is",
+        "of",
+        "on",
+        "or",
+        "the",
+        "to",
+        "with",
+    },
+)
+_WORD = re.compile(r"[\w@#'-]+")
+# Runs of capitalized words, e.g. "Charlie Kirk" or "White House".
+_ENTITY = re.compile(r"\b[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*")
+
+
+def extract_entities(description: str) -> list[str]:
+    """
+    Finds the names in a description as runs of capitalized words, leaving
+    out capitalized stopwords such as a sentence-initial "The".
+    """
+    entities: list[str] = []
+    for match in _ENTITY.finditer(description):
+        words = [w for w in match.group().split() if w.lower() not in _STOPWORDS]
+        entity = " ".join(words)
+        if entity and entity not in entities:
+            entities.append(entity)
+    return entities
+
+
+def extract_keywords(description: str) -> list[str]:
+    """
+    Splits a description into its words, leaving out stopwords.
+    """
+    return [w for w in _WORD.findall(description) if w.lower() not in _STOPWORDS]
+
+
+def expand_query(description: str, limit: int = 4) -> list[str]:
+    """
+    Derives Twitter search queries from a natural-language description.
+
+    The variants combine the description, its keywords without stopwords
+    and its names quoted as exact phrases with the `filter:videos` and
+    `filter:native_video` operators, so each one recalls a different slice
+    of the video tweets about the subject.
+
+    Args:
+        description: The description of the clip.
+        limit: The maximum number of queries to return.
+
+    Returns:
+        Distinct queries, most literal first.
+    """
+    keywords = " ".join(extract_keywords(description))
+    entities = extract_entities(description)
+    quoted = " ".join(f'"{e}"' if " " in e else e for e in entities)
+
+    variants = [
+        f"{description} filter:videos",
+        f"{quoted} filter:native_video" if quoted else "",
+        f"{keywords} filter:videos" if keywords else "",
+        *(f'"{e}" filter:videos' for e in entities if " " in e),
+        f"{keywords} filter:native_video" if keywords else "",
+    ]
+    queries: list[str] = []
+    for query in variants:
+        if query and query not in queries:
+            queries.append(query)
+    return queries[:limit]
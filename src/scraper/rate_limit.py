@@ -0,0 +1,205 @@
+import logging
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from pydantic import BaseModel
+from pydantic import Field
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(BaseModel):
+    """
+    How fast each account may search, and how long a search may wait for an
+    account to become available.
+    """
+
+    requests_per_window: int = Field(50, ge=1)
+    window_seconds: float = Field(900, gt=0)
+    burst: int = Field(
+        5,
+        ge=1,
+        description="The number of searches an idle account may send at once.",
+    )
+    max_wait_seconds: float = Field(
+        300,
+        ge=0,
+        description="The longest a search waits for an account before giving up.",
+    )
+
+
+class TokenBucket:
+    """
+    Paces requests to a steady rate while allowing short bursts.
+
+    The bucket holds up to `capacity` tokens and refills at `rate` tokens per
+    second. Every request takes one token.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock or time.monotonic
+        self._tokens = float(capacity)
+        self._updated = self._clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated) * self._rate,
+        )
+        self._updated = now
+
+    def delay(self) -> float:
+        """
+        Returns the seconds until a token is available.
+        """
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self._rate)
+
+    def take(self) -> None:
+        """
+        Takes a token, going into debt if none is available so that later
+        requests wait longer.
+        """
+        self._refill()
+        self._tokens -= 1
+
+    def drain(self) -> None:
+        """
+        Empties the bucket, e.g. after the server reported the limit reached.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+    def state(self) -> tuple[float, float]:
+        """
+        Returns the tokens held and the clock time they were counted at.
+        """
+        return self._tokens, self._updated
+
+    def restore(self, tokens: float, updated: float) -> None:
+        """
+        Resumes from a state returned by `state`, refilling the bucket for the
+        time since it was counted.
+        """
+        self._tokens = min(float(self._capacity), tokens)
+        self._updated = min(updated, self._clock())
+
+
+class RateLimitState(BaseModel):
+    """
+    The rate limit state of one account, as kept between processes.
+    """
+
+    tokens: float
+    updated: float = Field(..., description="The Unix time the tokens were counted.")
+    reset_at: float = 0.0
+
+
+class AccountRateLimit:
+    """
+    The rate limit state of one account: the pacing bucket and the end of
+    the window the server reported as exhausted.
+
+    With a `state_file`, the state is loaded on creation and saved on every
+    change, so the next process resumes the pacing and keeps away from a
+    window the server reported as exhausted. Processes running at the same
+    time still pace the account independently, the last one to save wins.
+    """
+
+    def __init__(
+        self,
+        policy: RateLimitPolicy,
+        clock: Callable[[], float] | None = None,
+        state_file: Path | None = None,
+    ) -> None:
+        self._policy = policy
+        # Wall-clock time, since the server reports resets as Unix times.
+        self._clock = clock or time.time
+        self.bucket = TokenBucket(
+            rate=policy.requests_per_window / policy.window_seconds,
+            capacity=policy.burst,
+            clock=self._clock,
+        )
+        self.reset_at = 0.0
+        self._state_file = state_file
+        self._load()
+
+    def _load(self) -> None:
+        if self._state_file is None:
+            return
+        try:
+            state = RateLimitState.model_validate_json(
+                self._state_file.read_text(encoding="utf-8"),
+            )
+        except FileNotFoundError:
+            return
+        except (OSError, ValidationError):
+            logger.warning("Ignoring unreadable rate limit state %s", self._state_file)
+            return
+        self.bucket.restore(state.tokens, state.updated)
+        self.reset_at = state.reset_at
+
+    def _save(self) -> None:
+        if self._state_file is None:
+            return
+        tokens, updated = self.bucket.state()
+        state = RateLimitState(tokens=tokens, updated=updated, reset_at=self.reset_at)
+        tmp_path = self._state_file.with_name(f"{self._state_file.name}.tmp")
+        try:
+            tmp_path.write_text(state.model_dump_json(), encoding="utf-8")
+            tmp_path.replace(self._state_file)
+        except OSError:
+            logger.warning("Could not save rate limit state %s", self._state_file)
+
+    def ready_in(self) -> float:
+        """
+        Returns the seconds until the account may send its next request.
+        """
+        return max(self.reset_at - self._clock(), self.bucket.delay())
+
+    def take(self) -> None:
+        """
+        Spends a token of the account for a request.
+        """
+        self.bucket.take()
+        self._save()
+
+    def exhaust(self, reset_at: float | None) -> None:
+        """
+        Blocks the account until its window resets.
+
+        Args:
+            reset_at: The Unix time the window resets, as reported by the
+                `x-rate-limit-reset` header, or None to wait a full window.
+        """
+        self.reset_at = reset_at or self._clock() + self._policy.window_seconds
+        self.bucket.drain()
+        self._save()
+
+
+class SearchBudget:
+    """
+    A cap on the number of search requests shared by concurrent searches.
+    """
+
+    def __init__(self, requests: int) -> None:
+        self.remaining = requests
+
+    def take(self) -> bool:
+        """
+        Spends one request, returning False once the budget is exhausted.
+        """
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
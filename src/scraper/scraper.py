@@ -1,72 +1,23 @@
+import asyncio
 import logging
-from pathlib import Path
+import re
+from collections.abc import AsyncIterator
 from typing import Literal
 
-from twikit import Client
-from twikit import TooManyRequests
 from twikit import Tweet
 
-from src.config.settings import BASE_DIR
 from src.config.settings import settings
 from src.schemas import Candidate
+from src.schemas import VideoVariant
+from src.scraper.queries import expand_query
+from src.scraper.rate_limit import SearchBudget
+from src.scraper.search_cache import get_search_cache
+from src.scraper.sessions import get_session_pool
+from src.scraper.tweet_index import get_tweet_index
 
 logger = logging.getLogger(__name__)
 
-
-class TwikitClient:
-    """
-    Wrapper around the twikit.Client for handling authentication and
-    low-level API operations.
-    """
-
-    def __init__(
-        self,
-        language: str = "en-US",
-        cookies_file: Path | None = BASE_DIR / "cookies.json",
-    ) -> None:
-        self._client = Client(language=language)
-        self._cookies_file = cookies_file
-
-    async def login(self) -> None:
-        """
-        Performs session login using cached cookies or credentials.
-        """
-        try:
-            await self._client.login(
-                auth_info_1=settings.twitter_username,
-                auth_info_2=settings.twitter_email,
-                password=settings.twitter_password.get_secret_value(),
-                cookies_file=self._cookies_file,
-            )
-            logger.debug("Twikit login successful.")
-        except Exception:
-            logger.exception("Twikit login failed.")
-            raise
-
-    async def search_tweets(
-        self,
-        query: str,
-        product: Literal["Top", "Latest", "Media"] = "Top",
-        count: int = 20,
-    ) -> list[Tweet]:
-        """
-        Searches for tweets and handles rate limiting.
-        """
-        try:
-            tweets: list[Tweet] = await self._client.search_tweet(
-                query=query,
-                product=product,
-                count=count,
-            )
-        except TooManyRequests:
-            logger.warning("Rate limit exceeded while searching tweets.")
-            return []
-        except Exception:
-            logger.exception("Error occurred while searching tweets.")
-            return []
-        else:
-            logger.debug("Fetched %d raw tweets for query: %s", len(tweets), query)
-            return tweets or []
+_VARIANT_SIZE = re.compile(r"/(\d+)x(\d+)/")
 
 
 def _get_best_video_url(tweet: Tweet) -> str | None:
@@ -90,55 +41,435 @@ def _get_best_video_url(tweet: Tweet) -> str | None:
     return best_stream.url
 
 
-async def scrape_candidates(
+def _get_video_variants(tweet: Tweet) -> list[VideoVariant]:
+    """
+    Lists the MP4 variants of a tweet's video with their bitrate and size.
+
+    Twitter encodes the size of each variant in its URL path, e.g.
+    `.../vid/avc1/1280x720/clip.mp4`, so it is parsed from there.
+    """
+    variants: list[VideoVariant] = []
+    for media in getattr(tweet, "media", None) or []:
+        if media.type != "video":
+            continue
+        for stream in getattr(media, "streams", None) or []:
+            is_mp4 = "mp4" in (stream.content_type or "") or (
+                stream.url and stream.url.split("?", 1)[0].endswith(".mp4")
+            )
+            if not is_mp4:
+                continue
+            size = _VARIANT_SIZE.search(stream.url)
+            variants.append(
+                VideoVariant(
+                    url=stream.url,
+                    bitrate=stream.bitrate,
+                    width=int(size.group(1)) if size else None,
+                    height=int(size.group(2)) if size else None,
+                ),
+            )
+    return variants
+
+
+def _get_video_metadata(tweet: Tweet) -> dict:
+    """
+    Reads the media id, duration and size of a tweet's video and the tweet's
+    view count, leaving out whatever twikit does not provide.
+    """
+    video_media = next(
+        (m for m in getattr(tweet, "media", None) or [] if m.type == "video"),
+        None,
+    )
+    metadata: dict = {"view_count": getattr(tweet, "view_count", None)}
+    if video_media is None:
+        return metadata
+
+    metadata["media_id"] = getattr(video_media, "id", None)
+    video_info = getattr(video_media, "video_info", None) or {}
+    duration_millis = video_info.get("duration_millis")
+    if duration_millis is not None:
+        metadata["duration_seconds"] = duration_millis / 1000
+    original_info = getattr(video_media, "original_info", None) or {}
+    metadata["width"] = original_info.get("width")
+    metadata["height"] = original_info.get("height")
+    return metadata
+
+
+def _media_key(candidate: Candidate) -> str:
+    """
+    Identifies the video of a candidate, so reposts of the same media can be
+    recognized. Falls back to the video URL without its query string.
+    """
+    return candidate.media_id or str(candidate.best_video_url).split("?", 1)[0]
+
+
+def _to_candidate(tweet: Tweet) -> Candidate | None:
+    """
+    Builds a candidate from a tweet, or returns None if it has no video.
+    """
+    best_video_url = _get_best_video_url(tweet)
+    if not best_video_url:
+        return None
+
+    return Candidate(
+        tweet_url=f"https://x.com/{tweet.user.screen_name}/status/{tweet.id}",
+        video_urls=[
+            s.url
+            for m in (tweet.media or [])
+            if m.type == "video"
+            for s in (m.streams or [])
+            if s.url
+        ],
+        best_video_url=best_video_url,
+        video_variants=_get_video_variants(tweet),
+        text=tweet.text,
+        author=tweet.user.screen_name,
+        created_at=tweet.created_at,
+        **_get_video_metadata(tweet),
+    )
+
+
+def _admit(candidate: Candidate, seen_media: dict[str, Candidate]) -> bool:
+    """
+    Records a candidate's video, returning False if another candidate already
+    posted it. A tweet posting the video of an earlier candidate is then
+    listed in that candidate's `shared_tweet_urls`, unless already known.
+    """
+    original = seen_media.setdefault(_media_key(candidate), candidate)
+    if original is candidate:
+        return True
+    if candidate.tweet_url != original.tweet_url and (
+        candidate.tweet_url not in original.shared_tweet_urls
+    ):
+        logger.debug(
+            "Tweet %s reposts the video of %s.",
+            candidate.tweet_url,
+            original.tweet_url,
+        )
+        original.shared_tweet_urls.append(candidate.tweet_url)
+    return False
+
+
+class _LiveSearch:
+    """
+    A search sent to Twitter and what it read: the candidate of every video
+    on its pages, including the ones another search found first, and
+    whether it ran out of results.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        max_candidates: int,
+        product: Literal["Top", "Latest", "Media"],
+    ) -> None:
+        self.query = query
+        self.max_candidates = max_candidates
+        self.product = product
+        self.candidates: list[Candidate] = []
+        self.exhausted = False
+        self._media: dict[str, Candidate] = {}
+
+    def record(self, candidate: Candidate) -> None:
+        """
+        Records a candidate read from a page, once per video.
+        """
+        if _admit(candidate, self._media):
+            self.candidates.append(candidate)
+
+
+async def _search_live(
+    live: _LiveSearch,
+    budget: SearchBudget | None,
+    seen_media: dict[str, Candidate],
+) -> AsyncIterator[Candidate]:
+    """
+    Searches Twitter page by page, following twikit's result cursors, and
+    yields every new video candidate as soon as its page arrives. The pages
+    read are recorded in `live`, whatever other searches already found.
+    """
+    query, max_candidates = live.query, live.max_candidates
+    pool = get_session_pool()
+    cursor = None
+    found = scanned = 0
+    for page_number in range(1, settings.twitter_search_max_pages + 1):
+        if budget and not budget.take():
+            logger.info("Search request budget spent, stopping: %s", query)
+            return
+        page = await pool.search_tweets(
+            query=query,
+            product=live.product,
+            count=settings.twitter_search_page_size,
+            cursor=cursor,
+        )
+        if page is None:
+            # A failed or rate-limited search is not the end of the results,
+            # so the search is neither marked exhausted nor cached.
+            logger.warning("Search failed on page %d: %s", page_number, query)
+            return
+        scanned += len(page)
+        for tweet in page:
+            candidate = _to_candidate(tweet)
+            if candidate is None:
+                continue
+            live.record(candidate)
+            if not _admit(candidate, seen_media):
+                continue
+            found += 1
+            yield candidate
+            if found >= max_candidates:
+                logger.info(
+                    "Found %d candidates in %d tweets over %d pages.",
+                    found,
+                    scanned,
+                    page_number,
+                )
+                return
+        cursor = page.next_cursor
+        if not page or not cursor:
+            break
+
+    live.exhausted = True
+    logger.info("Search ran out of results after %d tweets.", scanned)
+
+
+def _cache_search(live: _LiveSearch) -> bool:
+    """
+    Stores what a live search read, unless it stopped short of both enough
+    candidates and the end of its results, e.g. once the budget was spent.
+
+    Returns:
+        Whether the search was cached.
+    """
+    cache = get_search_cache()
+    if not cache.enabled or (
+        not live.exhausted and len(live.candidates) < live.max_candidates
+    ):
+        return False
+    cache.put(live.query, live.product, live.candidates, exhausted=live.exhausted)
+    return True
+
+
+# Background refreshes of stale cached searches, referenced until they end.
+_refreshes: set[asyncio.Task] = set()
+
+
+async def _refresh_search(
+    query: str,
+    max_candidates: int,
+    product: Literal["Top", "Latest", "Media"],
+    budget: SearchBudget | None,
+) -> None:
+    """
+    Runs a search again, within the shared request budget, and stores its
+    candidates in the search cache.
+    """
+    live = _LiveSearch(query, max_candidates, product)
+    async for _ in _search_live(live, budget, {}):
+        pass
+    if _cache_search(live):
+        logger.info("Refreshed the cached search: %s", query)
+
+
+async def wait_for_refreshes() -> None:
+    """
+    Waits for the background refreshes of stale searches to finish, so their
+    results are cached for the next run, and logs the ones that failed.
+    """
+    results = await asyncio.gather(*_refreshes, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Refreshing a cached search failed: %s", result)
+
+
+async def iter_candidates(
     query: str,
     max_candidates: int = 10,
-) -> list[Candidate]:
+    product: Literal["Top", "Latest", "Media"] | None = None,
+    budget: SearchBudget | None = None,
+    seen_media: dict[str, Candidate] | None = None,
+) -> AsyncIterator[Candidate]:
     """
-    Scrapes Twitter for tweets with videos that match a search query.
+    Searches Twitter page by page for tweets with videos that match a query,
+    yielding each candidate as soon as its page arrives.
+
+    The search cache is consulted first. A fresh entry answers without any
+    network search, and a stale one answers at once while the search is
+    refreshed in the background within the same budget. Otherwise the
+    search follows twikit's result cursors and stops paging as soon as
+    `max_candidates` candidates were found, when a page comes back empty,
+    after `settings.twitter_search_max_pages` pages or once `budget` is
+    spent. The cache stores every video the pages held, so an entry stays
+    complete when other searches claimed some of them first.
 
     Args:
         query: The search term for finding relevant tweets.
-        max_candidates: The maximum number of valid candidate to return.
+        max_candidates: The number of candidates to find.
+        product: The search tab to read, defaults to
+            `settings.twitter_search_product`. `Media` only returns tweets
+            with media, so fewer tweets are discarded.
+        budget: The search requests left, shared with other searches.
+        seen_media: The candidates already found by other searches, by
+            video, so their videos are folded instead of yielded again.
 
-    Returns:
-        A list of Candidate objects for the next pipeline stage.
+    Yields:
+        Candidates in search order. Tweets that repost a video already found
+        are folded into the earlier candidate's `shared_tweet_urls`, which
+        may therefore grow after the candidate was yielded.
     """
-    client = TwikitClient()
-    await client.login()
+    product = product or settings.twitter_search_product
+    seen_media = {} if seen_media is None else seen_media
+    cache = get_search_cache()
+    cached = cache.get(query, product, max_candidates) if cache.enabled else None
+    if cached is not None:
+        logger.info(
+            "Serving %s cached search: %s",
+            "stale" if cached.stale else "fresh",
+            query,
+        )
+        if cached.stale:
+            task = asyncio.create_task(
+                _refresh_search(query, max_candidates, product, budget),
+            )
+            _refreshes.add(task)
+            task.add_done_callback(_refreshes.discard)
+        for candidate in cached.candidates:
+            if _admit(candidate, seen_media):
+                yield candidate
+        return
 
-    search_limit = max_candidates * 5
-    logger.info("Searching for up to %d tweets with query: %s", search_limit, query)
-    raw_tweets = await client.search_tweets(query=query, count=search_limit)
+    live = _LiveSearch(query, max_candidates, product)
+    async for candidate in _search_live(live, budget, seen_media):
+        yield candidate
+    _cache_search(live)
 
-    if not raw_tweets:
-        logger.warning("Initial Twitter search returned no results.")
-        return []
 
+async def _scrape_expanded(
+    queries: list[str],
+    max_candidates: int,
+    seen_media: dict[str, Candidate],
+) -> list[Candidate]:
+    """
+    Runs several searches concurrently and merges their candidates, until
+    `max_candidates` distinct videos were found or every search ended. A
+    tweet found by several searches is kept once, and tweets posting the
+    same video are folded into one candidate whichever search found them.
+
+    The searches share `settings.twitter_search_request_budget` requests,
+    and the ones still running are cancelled once enough were found.
+    """
+    budget = SearchBudget(settings.twitter_search_request_budget)
     results: list[Candidate] = []
-    for tweet in raw_tweets:
-        if len(results) >= max_candidates:
-            break
 
-        best_video_url = _get_best_video_url(tweet)
-        if not best_video_url:
-            continue
+    async def consume(query: str) -> None:
+        async for candidate in iter_candidates(
+            query,
+            max_candidates,
+            budget=budget,
+            seen_media=seen_media,
+        ):
+            results.append(candidate)
+            if len(results) >= max_candidates:
+                return
+
+    pending = {asyncio.create_task(consume(query)) for query in queries}
+    try:
+        while pending and len(results) < max_candidates:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception():
+                    logger.error("Expanded search failed: %s", task.exception())
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    logger.info(
+        "%d queries found %d candidates using %d search requests.",
+        len(queries),
+        len(results),
+        settings.twitter_search_request_budget - budget.remaining,
+    )
+    return results[:max_candidates]
+
+
+async def _search_twitter(
+    query: str,
+    max_candidates: int,
+    seen_media: dict[str, Candidate],
+) -> list[Candidate]:
+    """
+    Searches Twitter for new candidates, with the expanded queries when
+    `settings.twitter_query_expansion` is enabled.
+    """
+    if settings.twitter_query_expansion:
+        queries = expand_query(query, settings.twitter_query_variants)
+        logger.info(
+            "Searching for %d candidates with queries: %s",
+            max_candidates,
+            queries,
+        )
+        return await _scrape_expanded(queries, max_candidates, seen_media)
+
+    logger.info("Searching for %d candidates with query: %s", max_candidates, query)
+    return [
+        candidate
+        async for candidate in iter_candidates(
+            query,
+            max_candidates,
+            seen_media=seen_media,
+        )
+    ]
+
 
-        candidate = Candidate(
-            tweet_url=f"https://x.com/{tweet.user.screen_name}/status/{tweet.id}",
-            video_urls=[
-                s.url
-                for m in (tweet.media or [])
-                if m.type == "video"
-                for s in (m.streams or [])
-                if s.url
-            ],
-            best_video_url=best_video_url,
-            text=tweet.text,
-            author=tweet.user.screen_name,
-            created_at=tweet.created_at,
+async def scrape_candidates(
+    query: str,
+    max_candidates: int = 10,
+) -> list[Candidate]:
+    """
+    Finds tweets with videos that match a search query.
+
+    The local index of every tweet scraped before is searched first, and
+    Twitter is only searched when it holds fewer than `max_candidates`
+    recent matches, for the missing ones. Every candidate found on Twitter
+    is added to the index.
+
+    Args:
+        query: The search term for finding relevant tweets. With
+            `settings.twitter_query_expansion`, several queries derived from
+            it are searched concurrently instead.
+        max_candidates: The maximum number of valid candidate to return.
+
+    Returns:
+        A list of Candidate objects for the next pipeline stage. Tweets that
+        repost a video already found are folded into the first candidate's
+        `shared_tweet_urls` instead of becoming candidates of their own.
+    """
+    index = get_tweet_index()
+    seen_media: dict[str, Candidate] = {}
+    results: list[Candidate] = []
+    if index.enabled:
+        results = [
+            candidate
+            for candidate in index.search(query, max_candidates)
+            if _admit(candidate, seen_media)
+        ]
+        logger.info("The tweet index holds %d matching candidates.", len(results))
+
+    if len(results) < max_candidates:
+        found = await _search_twitter(
+            query,
+            max_candidates - len(results),
+            seen_media,
         )
-        results.append(candidate)
+        if index.enabled:
+            index.add(found)
+        results.extend(found)
+
+    if not results:
+        logger.warning("Twitter search returned no candidates.")
 
     logger.info("Found %d candidate tweets with processable videos.", len(results))
     return results
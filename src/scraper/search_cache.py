@@ -0,0 +1,233 @@
+import json
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.config.settings import settings
+from src.schemas import Candidate
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    key TEXT PRIMARY KEY,
+    tweet_ids TEXT NOT NULL,
+    exhausted INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    candidate TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercases a search query and collapses its whitespace. Punctuation is
+    kept, since quotes and operators change what Twitter returns.
+    """
+    return " ".join(query.lower().split())
+
+
+def tweet_id(candidate: Candidate) -> str:
+    """
+    Returns the id of a candidate's tweet, the last segment of its URL.
+    """
+    return str(candidate.tweet_url).rstrip("/").rsplit("/", 1)[-1]
+
+
+class CachedSearch(BaseModel):
+    """
+    The candidates a previous search found.
+    """
+
+    candidates: list[Candidate]
+    exhausted: bool = Field(
+        ...,
+        description="Whether the search ran out of results before finding "
+        "as many candidates as it looked for.",
+    )
+    stale: bool = Field(
+        ...,
+        description="Whether the entry outlived its time-to-live and should "
+        "be refreshed in the background.",
+    )
+
+
+class SearchCache:
+    """
+    A persistent SQLite cache of search results.
+
+    Searches map a normalized query to the ids of the candidate tweets they
+    found and expire quickly, since new tweets keep arriving. The candidates
+    themselves are stored by tweet id and live much longer, so overlapping
+    searches share them. An expired search is still served for
+    `stale_seconds`, flagged as stale, so callers can answer at once and
+    refresh it in the background.
+
+    Each operation opens its own connection, so the cache can be shared by
+    concurrent coroutines.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        search_ttl_seconds: int,
+        stale_seconds: int,
+        tweet_ttl_seconds: int,
+    ) -> None:
+        self._path = path
+        self._search_ttl_seconds = search_ttl_seconds
+        self._stale_seconds = stale_seconds
+        self._tweet_ttl_seconds = tweet_ttl_seconds
+        self._initialized = False
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether searches have a non-zero time-to-live.
+        """
+        return self._search_ttl_seconds > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._initialized = True
+        return connection
+
+    def _load_candidates(
+        self,
+        connection: sqlite3.Connection,
+        tweet_ids: list[str],
+    ) -> list[Candidate] | None:
+        """
+        Loads the candidates of a search in order, or returns None if any of
+        them has expired.
+        """
+        if not tweet_ids:
+            return []
+        rows = dict(
+            connection.execute(
+                "SELECT tweet_id, candidate FROM tweets"
+                " WHERE tweet_id IN (SELECT value FROM json_each(?))"
+                " AND created_at >= ?",
+                (json.dumps(tweet_ids), time.time() - self._tweet_ttl_seconds),
+            ).fetchall(),
+        )
+        if len(rows) < len(tweet_ids):
+            return None
+        return [Candidate.model_validate_json(rows[i]) for i in tweet_ids]
+
+    def get(
+        self,
+        query: str,
+        product: str,
+        max_candidates: int,
+    ) -> CachedSearch | None:
+        """
+        Looks up the candidates of a previous search.
+
+        Args:
+            query: The search query.
+            product: The search tab, e.g. `Top`.
+            max_candidates: The number of candidates wanted. An entry with
+                fewer is only used if its search ran out of results.
+
+        Returns:
+            The cached search, or None on a miss.
+        """
+        key = f"{product}:{normalize_query(query)}"
+        age_limit = self._search_ttl_seconds + self._stale_seconds
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT tweet_ids, exhausted, created_at FROM searches"
+                " WHERE key = ? AND created_at >= ?",
+                (key, time.time() - age_limit),
+            ).fetchone()
+            candidates = None
+            if row and (row[1] or len(json.loads(row[0])) >= max_candidates):
+                candidates = self._load_candidates(connection, json.loads(row[0]))
+
+        if candidates is None:
+            self.misses += 1
+            return None
+        stale = row[2] < time.time() - self._search_ttl_seconds
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return CachedSearch(
+            candidates=candidates[:max_candidates],
+            exhausted=bool(row[1]),
+            stale=stale,
+        )
+
+    def put(
+        self,
+        query: str,
+        product: str,
+        candidates: list[Candidate],
+        *,
+        exhausted: bool,
+    ) -> None:
+        """
+        Stores the candidates a search found, replacing any previous entry
+        of the search and of each tweet.
+
+        Args:
+            query: The search query.
+            product: The search tab, e.g. `Top`.
+            candidates: The candidates found, in search order.
+            exhausted: Whether the search ran out of results.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO tweets VALUES (?, ?, ?)",
+                [(tweet_id(c), c.model_dump_json(), now) for c in candidates],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (
+                    f"{product}:{normalize_query(query)}",
+                    json.dumps([tweet_id(c) for c in candidates]),
+                    int(exhausted),
+                    now,
+                ),
+            )
+            connection.execute(
+                "DELETE FROM searches WHERE created_at < ?",
+                (now - self._search_ttl_seconds - self._stale_seconds,),
+            )
+            connection.execute(
+                "DELETE FROM tweets WHERE created_at < ?",
+                (now - self._tweet_ttl_seconds,),
+            )
+
+
+@lru_cache
+def get_search_cache() -> SearchCache:
+    """
+    Returns the process-wide search cache.
+    """
+    return SearchCache(
+        path=settings.search_cache_path,
+        search_ttl_seconds=settings.search_cache_ttl_seconds,
+        stale_seconds=settings.search_cache_stale_seconds,
+        tweet_ttl_seconds=settings.tweet_cache_ttl_seconds,
+    )
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+
+from twikit import Client
+from twikit import TooManyRequests
+from twikit import Tweet
+from twikit import Unauthorized
+from twikit.utils import Result
+
+from src.config.settings import BASE_DIR
+from src.config.settings import settings
+from src.scraper.rate_limit import AccountRateLimit
+from src.scraper.rate_limit import RateLimitPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class TwikitClient:
+    """
+    Wrapper around the twikit.Client for handling authentication and
+    low-level API operations.
+
+    A client logs in once and stays authenticated until its cookies expire,
+    at which point it logs in again and saves the new cookies. Clients
+    without credentials rely on their cookie file alone, which is reloaded
+    on expiry in case it was exported again.
+    """
+
+    def __init__(
+        self,
+        language: str = "en-US",
+        cookies_file: Path | None = BASE_DIR / "cookies.json",
+        *,
+        use_credentials: bool = True,
+    ) -> None:
+        self._client = Client(language=language)
+        self._cookies_file = cookies_file
+        self._use_credentials = use_credentials
+        self._login_lock = asyncio.Lock()
+        self.logged_in = False
+
+    @property
+    def name(self) -> str:
+        """
+        Identifies the account in logs, by the name of its cookie file.
+        """
+        return self._cookies_file.name if self._cookies_file else "credentials"
+
+    @property
+    def rate_limit_file(self) -> Path | None:
+        """
+        Where the rate limit state of the account is kept, next to its cookie
+        file.
+        """
+        if self._cookies_file is None:
+            return None
+        return self._cookies_file.with_name(
+            f"{self._cookies_file.stem}.rate_limit.json",
+        )
+
+    async def login(self) -> None:
+        """
+        Performs session login using cached cookies or credentials. Does
+        nothing if the client is already logged in.
+        """
+        async with self._login_lock:
+            if self.logged_in:
+                return
+            await self._authenticate(use_cookies=True)
+
+    async def refresh_login(self) -> None:
+        """
+        Logs in again after the session cookies expired.
+        """
+        async with self._login_lock:
+            self.logged_in = False
+            await self._authenticate(use_cookies=False)
+
+    async def _authenticate(self, *, use_cookies: bool) -> None:
+        """
+        Logs in with the cookie file, or with the credentials when the
+        cookies are not to be trusted, saving the cookies of the new session.
+        """
+        try:
+            if not self._use_credentials:
+                self._client.load_cookies(self._cookies_file)
+            else:
+                await self._client.login(
+                    auth_info_1=settings.twitter_username,
+                    auth_info_2=settings.twitter_email,
+                    password=settings.twitter_password.get_secret_value(),
+                    cookies_file=self._cookies_file if use_cookies else None,
+                )
+                if not use_cookies and self._cookies_file:
+                    self._client.save_cookies(self._cookies_file)
+            logger.debug("Twikit login successful for %s.", self.name)
+        except Exception:
+            logger.exception("Twikit login failed for %s.", self.name)
+            raise
+        self.logged_in = True
+
+    async def search_tweets(
+        self,
+        query: str,
+        product: Literal["Top", "Latest", "Media"] = "Top",
+        count: int = 20,
+        cursor: str | None = None,
+    ) -> Result[Tweet] | None:
+        """
+        Searches for one page of tweets, starting at `cursor` when given. An
+        expired session is refreshed and the search retried once.
+
+        Returns:
+            The page of tweets, whose `next_cursor` continues the search, or
+            None if the search failed, so it is not mistaken for the end of
+            the results.
+
+        Raises:
+            TooManyRequests: If the account reached its rate limit, so the
+                caller can wait or move to another account.
+        """
+        try:
+            try:
+                tweets: Result[Tweet] = await self._client.search_tweet(
+                    query=query,
+                    product=product,
+                    count=count,
+                    cursor=cursor,
+                )
+            except Unauthorized:
+                logger.warning("Session %s expired, logging in again.", self.name)
+                await self.refresh_login()
+                tweets = await self._client.search_tweet(
+                    query=query,
+                    product=product,
+                    count=count,
+                    cursor=cursor,
+                )
+        except TooManyRequests:
+            logger.warning("Rate limit exceeded for session %s.", self.name)
+            raise
+        except Exception:
+            logger.exception("Error occurred while searching tweets.")
+            return None
+        else:
+            logger.debug("Fetched %d raw tweets for query: %s", len(tweets), query)
+            return tweets
+
+
+class TwikitSessionPool:
+    """
+    Long-lived twikit sessions, one per account, shared by every scrape of
+    the process.
+
+    Every account logs in once, on first use, and its client is kept warm
+    afterwards. Each session is leased to one scrape at a time, so
+    concurrent scrapes are spread across the accounts and wait for a free
+    one when there are more scrapes than accounts.
+
+    Searches are paced per account with a token bucket. An account that hits
+    its rate limit is set aside until the window reported by the server
+    resets, and the search moves to the account available soonest. The time
+    searches spent waiting is added up in `wait_seconds`. With
+    `persist_limits`, the rate limit state of each account is kept next to its
+    cookie file, so consecutive runs share the pacing and the reset times.
+    """
+
+    def __init__(
+        self,
+        clients: list[TwikitClient],
+        policy: RateLimitPolicy | None = None,
+        *,
+        persist_limits: bool = False,
+    ) -> None:
+        self._clients = clients
+        self._policy = policy or RateLimitPolicy()
+        self._limits = {
+            client: AccountRateLimit(
+                self._policy,
+                state_file=client.rate_limit_file if persist_limits else None,
+            )
+            for client in clients
+        }
+        self._sessions: list[TwikitClient] = []
+        self._idle: list[TwikitClient] = []
+        self._released = asyncio.Condition()
+        self._start_lock = asyncio.Lock()
+        self._started = False
+        self.wait_seconds = 0.0
+        self.failovers = 0
+
+    @property
+    def size(self) -> int:
+        """
+        The number of sessions that logged in successfully.
+        """
+        return len(self._sessions)
+
+    async def start(self) -> None:
+        """
+        Logs every account in at the same time. Accounts that fail to log in
+        are left out of the pool.
+
+        Raises:
+            Exception: The login error of the first account, if none of them
+                could log in.
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+            results = await asyncio.gather(
+                *(client.login() for client in self._clients),
+                return_exceptions=True,
+            )
+            for client, result in zip(self._clients, results, strict=True):
+                if isinstance(result, BaseException):
+                    logger.warning("Leaving session %s out of the pool.", client.name)
+                else:
+                    self._sessions.append(client)
+            if not self._sessions:
+                raise results[0]
+            self._idle = list(self._sessions)
+            self._started = True
+            logger.info("Twikit session pool ready with %d accounts.", self.size)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[TwikitClient]:
+        """
+        Leases the free session that may search soonest, waiting for one to
+        be free, and returns it to the pool afterwards.
+        """
+        await self.start()
+        async with self._released:
+            await self._released.wait_for(lambda: self._idle)
+            client = min(self._idle, key=lambda c: self._limits[c].ready_in())
+            self._idle.remove(client)
+        try:
+            yield client
+        finally:
+            async with self._released:
+                self._idle.append(client)
+                self._released.notify()
+
+    async def search_tweets(
+        self,
+        query: str,
+        product: Literal["Top", "Latest", "Media"] = "Top",
+        count: int = 20,
+        cursor: str | None = None,
+    ) -> Result[Tweet] | None:
+        """
+        Searches for one page of tweets on the account available soonest,
+        waiting for its rate limit when needed and moving to another account
+        when it is exhausted.
+
+        Returns:
+            The page of tweets, or None if the search failed or every account
+            stayed rate limited for longer than the policy allows.
+        """
+        await self.start()
+        # Every account gets a chance, then the soonest to reset another one.
+        for _ in range(self.size + 1):
+            async with self.session() as client:
+                limit = self._limits[client]
+                delay = limit.ready_in()
+                if delay > self._policy.max_wait_seconds:
+                    break
+                if delay > 0:
+                    logger.info("Waiting %.1fs for session %s.", delay, client.name)
+                    self.wait_seconds += delay
+                    await asyncio.sleep(delay)
+                limit.take()
+                try:
+                    return await client.search_tweets(query, product, count, cursor)
+                except TooManyRequests as error:
+                    limit.exhaust(error.rate_limit_reset)
+                    self.failovers += 1
+        logger.warning("Every session is rate limited, giving up on: %s", query)
+        return None
+
+
+@lru_cache
+def get_session_pool() -> TwikitSessionPool:
+    """
+    Returns the shared pool of twikit sessions, one per configured cookie
+    file, paced by the configured rate limit, which is kept across runs. The
+    first cookie file belongs to the account of the configured credentials,
+    the others are used through their cookies alone.
+    """
+    return TwikitSessionPool(
+        [
+            TwikitClient(cookies_file=path, use_credentials=index == 0)
+            for index, path in enumerate(settings.twitter_cookie_files)
+        ],
+        RateLimitPolicy(
+            requests_per_window=settings.twitter_search_requests_per_window,
+            window_seconds=settings.twitter_rate_limit_window_seconds,
+            burst=settings.twitter_search_burst,
+            max_wait_seconds=settings.twitter_max_rate_limit_wait_seconds,
+        ),
+        persist_limits=True,
+    )
@@ -0,0 +1,138 @@
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+
+from src.config.settings import settings
+from src.schemas import Candidate
+from src.scraper.queries import extract_keywords
+from src.scraper.search_cache import tweet_id
+
+logger = logging.getLogger(__name__)
+
+# The porter stemmer lets "talking" match "talks" and "talked".
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    candidate TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+    tweet_id UNINDEXED,
+    text,
+    author,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def _match_expression(description: str) -> str | None:
+    """
+    Builds an FTS5 query requiring every keyword of a description, like a
+    Twitter search does. Each keyword is quoted so that no character of the
+    description is read as FTS5 syntax.
+    """
+    keywords = extract_keywords(description)
+    if not keywords:
+        return None
+    return " ".join('"{}"'.format(k.replace('"', '""')) for k in keywords)
+
+
+class TweetIndex:
+    """
+    A persistent SQLite FTS5 index of every video tweet ever scraped.
+
+    Candidates are stored whole, with their video variants and metadata, and
+    their text and author are indexed for full-text search ranked by BM25,
+    so a topic seen in earlier runs can be answered without a network search.
+
+    Each operation opens its own connection, so the index can be shared by
+    concurrent coroutines.
+    """
+
+    def __init__(self, path: Path, max_age_seconds: int) -> None:
+        self._path = path
+        self._max_age_seconds = max_age_seconds
+        self._initialized = False
+        self.hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the index is used, which a maximum age of 0 disables.
+        """
+        return self._max_age_seconds > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._initialized = True
+        return connection
+
+    def add(self, candidates: list[Candidate]) -> None:
+        """
+        Indexes candidates, replacing earlier entries of the same tweets.
+        """
+        if not candidates:
+            return
+        rows = [(tweet_id(c), c) for c in candidates]
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "DELETE FROM tweets_fts WHERE tweet_id = ?",
+                [(key,) for key, _ in rows],
+            )
+            connection.executemany(
+                "INSERT INTO tweets_fts (tweet_id, text, author) VALUES (?, ?, ?)",
+                [(key, c.text, c.author) for key, c in rows],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO tweets VALUES (?, ?, ?)",
+                [
+                    (key, c.model_dump_json(), c.created_at.timestamp())
+                    for key, c in rows
+                ],
+            )
+        logger.debug("Indexed %d tweets.", len(rows))
+
+    def search(self, description: str, limit: int) -> list[Candidate]:
+        """
+        Finds the indexed tweets that contain every keyword of a description.
+
+        Args:
+            description: The search description.
+            limit: The maximum number of tweets to return.
+
+        Returns:
+            The matching tweets posted within the maximum age, best BM25
+            match first.
+        """
+        expression = _match_expression(description)
+        if expression is None:
+            return []
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT tweets.candidate FROM tweets_fts"
+                " JOIN tweets ON tweets.tweet_id = tweets_fts.tweet_id"
+                " WHERE tweets_fts MATCH ? AND tweets.created_at >= ?"
+                " ORDER BY bm25(tweets_fts) LIMIT ?",
+                (expression, time.time() - self._max_age_seconds, limit),
+            ).fetchall()
+        self.hits += len(rows)
+        return [Candidate.model_validate_json(row[0]) for row in rows]
+
+
+@lru_cache
+def get_tweet_index() -> TweetIndex:
+    """
+    Returns the process-wide tweet index.
+    """
+    return TweetIndex(
+        path=settings.tweet_index_path,
+        max_age_seconds=settings.tweet_index_max_age_seconds,
+    )
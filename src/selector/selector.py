@@ -36,6 +36,7 @@ def select_best_clip(
             {
                 "tweet_url": result.tweet_url,
                 "video_url": result.best_video_url,
+                "shared_tweet_urls": result.shared_tweet_urls,
                 "clip": finding,
             }
             for finding in result.findings
@@ -50,14 +51,28 @@ def select_best_clip(
 
     final_trace = FinalTrace(
         candidates_considered=trace_info.get("scraped_count", 0),
+        rate_limit_wait_seconds=trace_info.get("rate_limit_wait_seconds", 0),
+        rate_limit_failovers=trace_info.get("rate_limit_failovers", 0),
+        pruned_by_metadata=trace_info.get("pruned_count", 0),
+        duplicate_media=trace_info.get("scrape_duplicate_media", 0)
+        + trace_info.get("vision_duplicate_media", 0),
+        prefilter_rejected=trace_info.get("prefilter_rejected", 0),
+        prefilter_accepted=trace_info.get("prefilter_accepted", 0),
         filtered_by_text=trace_info.get("text_filtered_count", 0),
         vision_calls=trace_info.get("vision_analysis_count", 0),
         final_choice_rank=1,
+        vision_token_usage=trace_info.get("vision_token_usage", {}),
+        frame_encodings=trace_info.get("vision_frame_encodings", []),
+        vision_pipeline=trace_info.get("vision_pipeline", []),
+        cancelled_analyses=trace_info.get("vision_cancelled", []),
+        prefetch_hits=trace_info.get("prefetch_hits", 0),
+        prefetch_wasted_bytes=trace_info.get("prefetch_wasted_bytes", 0),
     )
 
     final_result = FinalResult(
         tweet_url=best_finding["tweet_url"],
         video_url=best_finding["video_url"],
+        shared_tweet_urls=best_finding["shared_tweet_urls"],
         start_time_s=best_finding["clip"].start_time_s,
         end_time_s=best_finding["clip"].end_time_s,
         confidence=best_finding["clip"].confidence,
@@ -1,23 +1,84 @@
 import asyncio
 import base64
 import logging
-import tempfile
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import cv2
-import yt_dlp
+from langchain_core.runnables import Runnable
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import HttpUrl
 
 from src.config.settings import settings
 from src.prompts.utils import load_prompt
+from src.schemas import CancelledAnalysis
 from src.schemas import Candidate
 from src.schemas import ClipFindings
+from src.schemas import FrameEncoding
+from src.schemas import PipelineStageMetrics
 from src.schemas import VisionResult
+from src.vision.dedup import dedupe_frames
+from src.vision.dedup import is_same_media
+from src.vision.dedup import media_fingerprint
+from src.vision.download import download_to_cache
+from src.vision.download import select_analysis_url
+from src.vision.download import video_cache_key
+from src.vision.encoding import FrameBudget
+from src.vision.encoding import estimate_image_tokens
+from src.vision.encoding import resize_frame
+from src.vision.extraction import get_extraction_service
+from src.vision.mosaic import MosaicLayout
+from src.vision.pipeline import Completed
+from src.vision.pipeline import PipelineStage
+from src.vision.pipeline import StagedPipeline
+from src.vision.prefetch import VideoPrefetcher
+from src.vision.result_cache import VisionCacheKey
+from src.vision.result_cache import get_vision_result_cache
+from src.vision.result_cache import hash_text
+from src.vision.result_cache import normalize_description
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import SampledFrame
+from src.vision.sampling import fingerprint_frames
+from src.vision.video_cache import get_video_cache
+from src.vision.windowing import FrameWindow
+from src.vision.windowing import WindowFindings
+from src.vision.windowing import merge_window_findings
+from src.vision.windowing import split_windows
+
+if TYPE_CHECKING:
+    import tempfile
 
 logger = logging.getLogger(__name__)
 
+# How far before the known end of a video a stream may stop sampling, on top
+# of one sampling interval, before it counts as cut short.
+_STREAM_END_TOLERANCE_SECONDS = 1.0
+
+# Settings that change which frames reach Gemini and how they are encoded,
+# hashed into the vision cache key.
+_ANALYSIS_SETTINGS = {
+    "vision_analysis_resolution",
+    "vision_max_edge",
+    "vision_jpeg_quality",
+    "vision_max_payload_bytes",
+    "vision_max_image_tokens",
+    "vision_mosaic",
+    "vision_mosaic_columns",
+    "vision_mosaic_rows",
+    "vision_mosaic_tile_edge",
+    "vision_frame_dedup",
+    "vision_dedup_hash_distance",
+    "vision_dedup_max_gap_seconds",
+    "vision_two_pass",
+    "vision_coarse_interval_seconds",
+    "vision_coarse_max_edge",
+    "vision_fine_interval_seconds",
+    "vision_window_padding_seconds",
+    "vision_window_seconds",
+    "vision_window_overlap_seconds",
+}
+
 
 class _VisionAnalysisResponse(BaseModel):
     """
@@ -30,171 +91,1041 @@ class _VisionAnalysisResponse(BaseModel):
     )
 
 
-def _download_video(url: str, output_dir: Path) -> Path | None:
+async def _extract_frames(
+    video_path: Path,
+    interval_seconds: int = 2,
+) -> list[SampledFrame]:
     """
-    Downloads a video from a Twitter URL using yt-dlp.
+    Extracts frames from a video file at a specified interval.
 
-    This is a private helper function for the vision module.
+    This is a private helper function for the vision module. Frames are
+    sampled by seeking or grabbing between target timestamps rather than by
+    decoding every frame, see `src.vision.sampling`. The decoding runs in the
+    shared extraction process pool so it never blocks the event loop.
 
     Args:
-        url: The URL of the tweet containing the video.
-        output_dir: The temporary directory to save the downloaded file.
+        video_path: The path to the video file.
+        interval_seconds: The interval in seconds at which to extract frames.
 
     Returns:
-        The path to the downloaded video file, or None on failure.
+        A list of sampled frames, each holding its real timestamp and the
+        frame as a JPEG byte string.
     """
-    try:
-        ydl_opts = {
-            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-            "outtmpl": str(output_dir / "%(id)s.%(ext)s"),
-            "quiet": True,
-            "merge_output_format": "mp4",
-            "overwrites": True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            if not info:
-                logger.error("yt-dlp could not extract info from %s", url)
-                return None
-
-            filename = ydl.prepare_filename(info)
-            if not filename or not Path(filename).exists():
-                logger.error("yt-dlp failed to download file for %s", url)
-                return None
-
-            logger.info("Successfully downloaded video to %s", filename)
-            return Path(filename)
-    except Exception:
-        logger.exception("yt-dlp downloader failed for %s", url)
-        return None
+    frames = await get_extraction_service().extract(
+        video_path,
+        interval_seconds=interval_seconds,
+    )
+    logger.info("Extracted %d frames from %s", len(frames), video_path.name)
+    return frames
 
 
-def _extract_frames(video_path: Path, interval_seconds: int = 2) -> list[bytes]:
+async def _stream_frames(url: str, interval_seconds: int = 2) -> list[SampledFrame]:
     """
-    Extracts frames from a video file at a specified interval.
+    Extracts frames from a progressive MP4 while it is still downloading.
 
-    This is a private helper function for the vision module.
+    This is a private helper function for the vision module. Only the video
+    stream is fetched, so there is no temporary file and no audio merge.
 
     Args:
-        video_path: The path to the video file.
+        url: The direct URL of the MP4 video stream.
         interval_seconds: The interval in seconds at which to extract frames.
 
     Returns:
-        A list of frames, where each frame is a byte string (JPEG format).
+        A list of sampled frames, or an empty list if the stream failed.
     """
-    frames: list[bytes] = []
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        logger.error("Could not open video file: %s", video_path)
-        return frames
+    frames = [
+        frame
+        async for frame in get_extraction_service().stream(
+            url,
+            interval_seconds=interval_seconds,
+        )
+    ]
+    logger.info("Streamed %d frames from %s", len(frames), url)
+    return frames
 
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-    frame_interval = int(fps * interval_seconds)
-    frame_count = 0
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_count % frame_interval == 0:
-            success, buffer = cv2.imencode(".jpg", frame)
-            if success:
-                frames.append(buffer.tobytes())
-        frame_count += 1
-    cap.release()
 
-    logger.info("Extracted %d frames from %s", len(frames), video_path.name)
-    return frames
+def _stream_is_complete(
+    frames: list[SampledFrame],
+    duration_seconds: float | None,
+    interval_seconds: float,
+) -> bool:
+    """
+    Whether streamed frames reach the end of the video. A stream that timed
+    out or dropped partway through ends like a finished one, so its last
+    frame is compared with the video's known duration. Streams of videos of
+    unknown length are trusted as long as they produced frames.
+    """
+    if not frames:
+        return False
+    if duration_seconds is None:
+        return True
+    reached_s = frames[-1].timestamp_s + interval_seconds
+    return reached_s + _STREAM_END_TOLERANCE_SECONDS >= duration_seconds
 
 
-async def analyze_video_for_clip(
+def _build_image_parts(labels: list[str], images: list[SampledFrame]) -> list[dict]:
+    """
+    Builds the prompt content parts for a list of images, preceding every
+    image with its label since frames are not evenly spaced.
+    """
+    parts: list[dict] = []
+    for label, image in zip(labels, images, strict=True):
+        b64_image = base64.b64encode(image.image).decode("utf-8")
+        parts.extend(
+            (
+                {"type": "text", "text": label},
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{b64_image}"},
+                },
+            ),
+        )
+    return parts
+
+
+async def _pack_mosaics(
+    frames: list[SampledFrame],
+) -> tuple[list[str], list[SampledFrame]]:
+    """
+    Packs consecutive frames into timestamped grid images.
+
+    This is a private helper function for the vision module.
+
+    Returns:
+        The label and the image of every mosaic.
+    """
+    layout = MosaicLayout(
+        columns=settings.vision_mosaic_columns,
+        rows=settings.vision_mosaic_rows,
+        tile_edge=settings.vision_mosaic_tile_edge,
+    )
+    chunks = [
+        frames[start : start + layout.tiles]
+        for start in range(0, len(frames), layout.tiles)
+    ]
+    mosaics = await get_extraction_service().compose_mosaics(chunks, layout)
+
+    labels: list[str] = []
+    images: list[SampledFrame] = []
+    for chunk, mosaic in zip(chunks, mosaics, strict=True):
+        if mosaic is None:
+            continue
+        labels.append(
+            f"Grid of {len(chunk)} frames from {chunk[0].timestamp_s:.1f}s"
+            f" to {chunk[-1].timestamp_s:.1f}s",
+        )
+        images.append(mosaic)
+    return labels, images
+
+
+def _to_vision_result(
     candidate: Candidate,
-    description: str,
-    duration_seconds: int,
+    findings: list[ClipFindings],
+    session: "_VisionSession | None" = None,
 ) -> VisionResult | None:
     """
-    Analyzes a single video to find clips that match a description.
+    Wraps the findings for a candidate, or returns None if there are none.
+    """
+    if not findings:
+        logger.warning("No relevant clips found in video: %s", candidate.tweet_url)
+        return None
+    return VisionResult(
+        tweet_url=candidate.tweet_url,
+        best_video_url=candidate.best_video_url,
+        shared_tweet_urls=candidate.shared_tweet_urls,
+        findings=findings,
+        token_usage=session.token_usage if session else {},
+        frame_encodings=session.frame_encodings if session else [],
+    )
 
-    This function downloads the video, extracts frames, and uses the Gemini
-    vision model to identify relevant segments.
 
-    Args:
-        candidate: The Candidate object containing video URLs and metadata.
-        description: The user's original search description.
-        duration_seconds: The target duration for the video clip.
+async def _dedupe(frames: list[SampledFrame]) -> list[SampledFrame]:
+    """
+    Drops near-duplicate frames when deduplication is enabled.
+    """
+    if not settings.vision_frame_dedup:
+        return frames
+    return await asyncio.to_thread(
+        dedupe_frames,
+        frames,
+        max_hash_distance=settings.vision_dedup_hash_distance,
+        max_gap_seconds=settings.vision_dedup_max_gap_seconds,
+    )
 
-    Returns:
-        A VisionResult object containing any found clips, or None if an
-        error occurrs or no clips are found.
+
+def _frame_budget() -> FrameBudget:
+    """
+    Builds the per-call frame budget from the settings.
+    """
+    return FrameBudget(
+        max_edge=settings.vision_max_edge,
+        jpeg_quality=settings.vision_jpeg_quality,
+        max_payload_bytes=settings.vision_max_payload_bytes,
+        max_image_tokens=settings.vision_max_image_tokens,
+    )
+
+
+class _EncodedRequest(BaseModel):
+    """
+    The labelled images of one vision call, ready to be sent.
+    """
+
+    stage: str
+    labels: list[str]
+    images: list[SampledFrame]
+    encoding: FrameEncoding
+
+
+class _EncodedPass(BaseModel):
+    """
+    The encoded calls of one pass over a video, one per time window when the
+    video is long enough to be split.
+    """
+
+    requests: list[_EncodedRequest]
+    windows: list[FrameWindow] = Field(default_factory=list)
+    edge_tolerance_seconds: float = 0
+
+
+class _VisionSession:
+    """
+    Holds the structured Gemini model and the token bookkeeping shared by
+    every pass over a single candidate video.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = await asyncio.to_thread(
-            _download_video,
-            url=str(candidate.tweet_url),
-            output_dir=Path(tmpdir),
+
+    def __init__(self, structured_llm: Runnable, candidate: Candidate) -> None:
+        self._structured_llm = structured_llm
+        self._candidate = candidate
+        self.token_usage: dict[str, int] = {}
+        self.frame_encodings: list[FrameEncoding] = []
+
+    async def encode(self, frames: list[SampledFrame], stage: str) -> _EncodedRequest:
+        """
+        Prepares the images of one call, packing them into mosaics when
+        enabled and fitting them to the per-call budget. The applied encoding
+        is recorded under `stage`.
+        """
+        if settings.vision_mosaic:
+            labels, images = await _pack_mosaics(frames)
+        else:
+            labels = [f"Frame at {f.timestamp_s:.1f}s" for f in frames]
+            images = frames
+
+        images, encoding = await get_extraction_service().fit_to_budget(
+            images,
+            _frame_budget(),
+            stage,
+        )
+        encoding.frame_count = len(frames)
+        if settings.vision_mosaic:
+            encoding.estimated_tokens_unpacked = sum(
+                estimate_image_tokens(f.width, f.height) for f in frames
+            )
+        self.frame_encodings.append(encoding)
+        return _EncodedRequest(
+            stage=stage,
+            labels=labels,
+            images=images,
+            encoding=encoding,
+        )
+
+    async def run_pass(
+        self,
+        prompt_text: str,
+        frames: list[SampledFrame],
+        stage: str,
+    ) -> list[ClipFindings] | None:
+        """
+        Encodes the frames of one call and sends them to Gemini.
+        """
+        return await self.send(prompt_text, await self.encode(frames, stage))
+
+    async def send(
+        self,
+        prompt_text: str,
+        request: _EncodedRequest,
+    ) -> list[ClipFindings] | None:
+        """
+        Sends one prompt with its encoded images to Gemini and parses the
+        findings, recording the total number of tokens used under the stage of
+        the request.
+
+        Returns:
+            The findings of the model, or None if the call or parsing failed.
+        """
+        tweet_url = self._candidate.tweet_url
+        stage, encoding = request.stage, request.encoding
+        prompt_messages = [
+            (
+                "human",
+                [
+                    {"type": "text", "text": prompt_text},
+                    *_build_image_parts(request.labels, request.images),
+                ],
+            ),
+        ]
+
+        logger.info(
+            "Sending %d frames as %d images (%d bytes, ~%d image tokens) from %s"
+            " to Gemini Vision (%s pass)...",
+            encoding.frame_count,
+            encoding.image_count,
+            encoding.payload_bytes,
+            encoding.estimated_tokens,
+            tweet_url,
+            stage,
         )
-        if not video_path:
+        try:
+            response = await self._structured_llm.ainvoke(prompt_messages)
+        except Exception:
+            logger.exception("Vision analysis failed for %s", tweet_url)
             return None
 
-        frames = _extract_frames(video_path, interval_seconds=2)
-        if not frames:
-            logger.warning("No frames extracted from video: %s", video_path)
+        usage = getattr(response["raw"], "usage_metadata", None) or {}
+        tokens = usage.get("total_tokens", 0)
+        self.token_usage[stage] = self.token_usage.get(stage, 0) + tokens
+        logger.info("The %s pass used %d tokens.", stage, tokens)
+
+        if response["parsed"] is None:
+            logger.error(
+                "Could not parse vision response for %s: %s",
+                tweet_url,
+                response["parsing_error"],
+            )
             return None
+        return response["parsed"].findings
 
-    llm = ChatGoogleGenerativeAI(
-        model=settings.gemini_model,
-        api_key=settings.gemini_api_key.get_secret_value(),
-        temperature=0.1,
+
+async def _encode_windowed_pass(
+    session: _VisionSession,
+    frames: list[SampledFrame],
+    stage: str,
+    interval_seconds: float,
+) -> _EncodedPass:
+    """
+    Encodes a pass over the frames, splitting long videos into overlapping
+    time windows that are sent concurrently and merged afterwards.
+
+    This is a private helper function for the vision module. Videos that fit
+    in a single window, or any video when windowing is disabled, are sent in
+    one call. Findings ending and starting within two sampling intervals of
+    a window edge are stitched together. The interval the frames were
+    sampled at is used rather than their spacing, which deduplication and
+    the gaps between refined windows stretch.
+    """
+    window_seconds = settings.vision_window_seconds
+    windows = []
+    if frames and window_seconds is not None:
+        windows = split_windows(
+            frames,
+            window_seconds=window_seconds,
+            overlap_seconds=settings.vision_window_overlap_seconds,
+        )
+    if len(windows) <= 1:
+        return _EncodedPass(requests=[await session.encode(frames, stage)])
+
+    logger.info("Analyzing %d frames in %d windows.", len(frames), len(windows))
+    requests = await asyncio.gather(
+        *(session.encode(w.frames, stage) for w in windows),
+    )
+    return _EncodedPass(
+        requests=list(requests),
+        windows=windows,
+        edge_tolerance_seconds=2 * interval_seconds,
     )
-    structured_llm = llm.with_structured_output(_VisionAnalysisResponse)
 
-    prompt_template = load_prompt("vision_analyzer_prompt.txt")
-    if not prompt_template:
-        logger.error("Could not load vision analysis prompt. Aborting analysis.")
-        return None
 
-    prompt_text = prompt_template.format(
-        description=description,
-        duration_seconds=duration_seconds,
-    )
-
-    base64_frames = [base64.b64encode(f).decode("utf-8") for f in frames]
-    prompt_messages = [
-        (
-            "human",
-            [
-                {"type": "text", "text": prompt_text},
-                *(
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{b64_frame}"},
-                    }
-                    for b64_frame in base64_frames
-                ),
-            ],
-        ),
+async def _send_windowed_pass(
+    session: _VisionSession,
+    prompt_text: str,
+    encoded: _EncodedPass,
+) -> list[ClipFindings] | None:
+    """
+    Sends every call of an encoded pass and merges the window findings.
+
+    Returns:
+        The merged findings, or None if every window failed.
+    """
+    if not encoded.windows:
+        return await session.send(prompt_text, encoded.requests[0])
+
+    window_findings = await asyncio.gather(
+        *(session.send(prompt_text, request) for request in encoded.requests),
+    )
+    results = [
+        WindowFindings(window=window, findings=findings)
+        for window, findings in zip(encoded.windows, window_findings, strict=True)
+        if findings is not None
     ]
+    if not results:
+        return None
+    return merge_window_findings(
+        results,
+        edge_tolerance_seconds=encoded.edge_tolerance_seconds,
+    )
+
+
+async def _run_windowed_pass(
+    session: _VisionSession,
+    prompt_text: str,
+    frames: list[SampledFrame],
+    stage: str,
+    interval_seconds: float,
+) -> list[ClipFindings] | None:
+    """
+    Encodes and sends a pass over the frames, see `_encode_windowed_pass`.
+    """
+    encoded = await _encode_windowed_pass(session, frames, stage, interval_seconds)
+    return await _send_windowed_pass(session, prompt_text, encoded)
 
+
+def _merge_windows(
+    findings: list[ClipFindings],
+    padding_seconds: float,
+) -> list[tuple[float, float]]:
+    """
+    Pads the coarse windows and merges the ones that overlap.
+    """
+    windows: list[tuple[float, float]] = []
+    spans = sorted(
+        (max(0.0, f.start_time_s - padding_seconds), f.end_time_s + padding_seconds)
+        for f in findings
+    )
+    for start_s, end_s in spans:
+        if windows and start_s <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end_s))
+        else:
+            windows.append((start_s, end_s))
+    return windows
+
+
+async def _encode_coarse_pass(
+    session: _VisionSession,
+    frames: list[SampledFrame],
+) -> _EncodedPass:
+    """
+    Encodes the coarse pass over the sparse frames, downscaled.
+    """
+    coarse_format = FrameFormat(
+        max_edge=settings.vision_coarse_max_edge,
+        jpeg_quality=settings.vision_jpeg_quality,
+    )
+    coarse_frames = await asyncio.to_thread(
+        lambda: [resize_frame(f, coarse_format) for f in frames],
+    )
+    return await _encode_windowed_pass(
+        session,
+        await _dedupe(coarse_frames),
+        "coarse",
+        _frame_interval(),
+    )
+
+
+async def _refine_windows(
+    session: _VisionSession,
+    source: Path | str | None,
+    frames: list[SampledFrame],
+    windows: list[ClipFindings],
+    fine_prompt: str,
+) -> list[ClipFindings] | None:
+    """
+    Runs the fine pass over dense frames sampled from the video inside the
+    padded coarse windows only. If the video can no longer be read, e.g.
+    once it was evicted from the cache, the coarse frames inside the windows
+    are refined instead.
+    """
+    if not windows:
+        return windows
+
+    merged = _merge_windows(windows, settings.vision_window_padding_seconds)
+    fine_frames = []
+    if source is not None:
+        fine_frames = await get_extraction_service().extract_windows(
+            source,
+            merged,
+            interval_seconds=settings.vision_fine_interval_seconds,
+        )
+    if not fine_frames:
+        logger.warning(
+            "Could not sample the coarse windows of %s, refining the coarse frames.",
+            source,
+        )
+        fine_frames = [
+            f
+            for f in frames
+            if any(start <= f.timestamp_s <= end for start, end in merged)
+        ]
     logger.info(
-        "Sending %d frames from %s to Gemini Vision...",
-        len(frames),
-        candidate.tweet_url,
+        "Coarse pass kept %d windows, sampled into %d frames.",
+        len(merged),
+        len(fine_frames),
+    )
+    return await _run_windowed_pass(
+        session,
+        fine_prompt,
+        await _dedupe(fine_frames),
+        "fine",
+        settings.vision_fine_interval_seconds,
     )
 
+
+async def _analyze_two_pass(
+    session: _VisionSession,
+    source: Path | str | None,
+    frames: list[SampledFrame],
+    coarse_prompt: str,
+    fine_prompt: str,
+) -> list[ClipFindings] | None:
+    """
+    Runs a cheap coarse pass over sparse, downscaled frames to locate candidate
+    windows, then a fine pass over dense, full-resolution frames sampled from
+    `source` inside those windows to refine the timestamps.
+
+    This is a private helper function for the vision module.
+
+    Returns:
+        The refined findings, or None if either pass failed.
+    """
+    encoded = await _encode_coarse_pass(session, frames)
+    windows = await _send_windowed_pass(session, coarse_prompt, encoded)
+    if windows is None:
+        return None
+    return await _refine_windows(session, source, frames, windows, fine_prompt)
+
+
+class _VisionBatch:
+    """
+    The request shared by every candidate of one vision run, and the media
+    seen so far, so reposts of the same video are analyzed once.
+    """
+
+    def __init__(
+        self,
+        description: str,
+        duration_seconds: int,
+        prefetcher: VideoPrefetcher | None = None,
+    ) -> None:
+        self.description = description
+        self.duration_seconds = duration_seconds
+        self.prefetcher = prefetcher
+        self.media: list[tuple[tuple[int, ...], _VisionJob]] = []
+        self.duplicate_count = 0
+        # Every Gemini session of the run, whether or not it found a clip.
+        self.sessions: list[_VisionSession] = []
+
+
+class _VisionJob:
+    """
+    The state of one candidate video as it moves through the vision pipeline.
+    """
+
+    def __init__(self, candidate: Candidate, batch: _VisionBatch) -> None:
+        self.candidate = candidate
+        self.batch = batch
+        self.shared_tweet_urls: list[HttpUrl] = list(candidate.shared_tweet_urls)
+        self.video_path: Path | None = None
+        self.download_dir: tempfile.TemporaryDirectory | None = None
+        # The URL the frames were streamed from, sampled again by the fine
+        # pass when there is no file.
+        self.stream_url: str | None = None
+        self.frames: list[SampledFrame] = []
+        self.session: _VisionSession | None = None
+        self.cache_key: VisionCacheKey | None = None
+        self.prompts: dict[str, str] = {}
+        self.encoded: _EncodedPass | None = None
+        # Resolved once the job's video was analyzed or failed, for the copies
+        # of the video waiting on it.
+        self.analyzed: asyncio.Future[bool] | None = None
+
+
+def _frame_interval() -> float:
+    """
+    The interval frames are sampled at before the first pass, sparse in
+    two-pass mode, where the fine pass samples its windows densely later.
+    """
+    if settings.vision_two_pass:
+        return settings.vision_coarse_interval_seconds
+    return 2
+
+
+def _video_source(job: _VisionJob) -> Path | str | None:
+    """
+    The file or URL the fine pass samples the coarse windows from.
+    """
+    return job.video_path or job.stream_url
+
+
+def _release_video(job: _VisionJob) -> None:
+    """
+    Removes the job's download when it was not kept in the cache.
+    """
+    if job.download_dir:
+        job.download_dir.cleanup()
+        job.download_dir = None
+
+
+def _load_vision_prompts() -> dict[str, str] | None:
+    """
+    Loads the prompt templates of the enabled passes, with the mosaic layout
+    note appended when frames are packed into grids.
+    """
+    two_pass = settings.vision_two_pass
+    prompt_template = load_prompt("vision_analyzer_prompt.txt")
+    coarse_template = load_prompt("vision_coarse_prompt.txt") if two_pass else ""
+    layout_note = (
+        load_prompt("vision_mosaic_prompt.txt") if settings.vision_mosaic else ""
+    )
+    if (
+        not prompt_template
+        or (two_pass and not coarse_template)
+        or (settings.vision_mosaic and not layout_note)
+    ):
+        logger.error("Could not load vision analysis prompt. Aborting analysis.")
+        return None
+    return {
+        "coarse": coarse_template + layout_note if two_pass else "",
+        "fine": prompt_template + layout_note,
+    }
+
+
+async def _download_stage(job: _VisionJob) -> _VisionJob | None:
+    """
+    Adopts the candidate's prefetched video, locates it in the cache or
+    downloads it. In streaming mode, frames are decoded straight from the MP4
+    URL as it downloads, falling back to a full download if the stream cannot
+    be read or ends before the video's known duration.
+    """
+    candidate = job.candidate
+    prefetcher = job.batch.prefetcher
+    prefetched = await prefetcher.adopt(candidate) if prefetcher else None
+    if prefetched:
+        job.video_path, job.download_dir = prefetched
+        return job
+
+    cache = get_video_cache()
+    cached_path = cache.get(video_cache_key(candidate)) if cache.enabled else None
+    if cached_path:
+        job.video_path = cached_path
+        return job
+
+    video_url = select_analysis_url(candidate)
+    if settings.vision_streaming and video_url:
+        interval_seconds = _frame_interval()
+        job.frames = await _stream_frames(video_url, interval_seconds=interval_seconds)
+        if _stream_is_complete(
+            job.frames,
+            candidate.duration_seconds,
+            interval_seconds,
+        ):
+            job.stream_url = video_url
+            return job
+        logger.warning(
+            "Streaming failed or ended early for %s (%d frames), falling back to"
+            " download.",
+            candidate.tweet_url,
+            len(job.frames),
+        )
+        job.frames = []
+
+    job.video_path, job.download_dir = await download_to_cache(candidate)
+    return job if job.video_path else None
+
+
+async def _extract_stage(job: _VisionJob) -> _VisionJob | None:
+    """
+    Samples frames from the downloaded video, unless they were streamed, and
+    removes the download when it was not kept in the cache, once the fine
+    pass no longer needs it in two-pass mode.
+    """
+    if job.frames:
+        return job
+
     try:
-        response = await structured_llm.ainvoke(prompt_messages)
-        if not response.findings:
-            logger.warning(
-                "No relevant clips found in video: %s",
-                candidate.tweet_url,
-            )
+        job.frames = await _extract_frames(
+            job.video_path,
+            interval_seconds=_frame_interval(),
+        )
+    finally:
+        if not settings.vision_two_pass or not job.frames:
+            _release_video(job)
+    if not job.frames:
+        logger.warning("No frames extracted from video: %s", job.video_path)
+        return None
+    return job
+
+
+async def _find_original(job: _VisionJob) -> _VisionJob | None:
+    """
+    Finds an earlier job of the run whose video has the same leading frames
+    and was analyzed, waiting for its analysis while it is in flight. If
+    there is none, or every such analysis failed, the job's video is
+    registered as seen so later copies wait for it instead.
+    """
+    limit = settings.vision_media_fingerprint_frames
+    if not limit:
+        return None
+    fingerprint = await asyncio.to_thread(media_fingerprint, job.frames, limit)
+    if fingerprint is None:
+        return None
+
+    while True:
+        original = next(
+            (
+                seen
+                for seen_fingerprint, seen in job.batch.media
+                if is_same_media(
+                    seen_fingerprint,
+                    fingerprint,
+                    settings.vision_dedup_hash_distance,
+                )
+            ),
+            None,
+        )
+        if original is None:
+            job.analyzed = asyncio.get_running_loop().create_future()
+            job.batch.media.append((fingerprint, job))
             return None
-    except Exception:
-        logger.exception("Vision analysis failed for %s", candidate.tweet_url)
+        # Shielded so a cancelled copy leaves the original's outcome alone. A
+        # failed original is forgotten, so the next lookup finds another copy
+        # or registers this one.
+        if await asyncio.shield(original.analyzed):
+            return original
+
+
+def _settle_media(job: _VisionJob, *, analyzed: bool) -> None:
+    """
+    Tells the copies waiting for a job's video whether it was analyzed, and
+    forgets the video when it was not, so one of the copies analyzes it.
+    """
+    if job.analyzed is None or job.analyzed.done():
+        return
+    job.analyzed.set_result(analyzed)
+    if not analyzed:
+        job.batch.media = [entry for entry in job.batch.media if entry[1] is not job]
+
+
+async def _encode_stage(job: _VisionJob) -> _VisionJob | Completed | None:
+    """
+    Skips videos analyzed in this run under another tweet, serves the
+    findings from the vision result cache, or deduplicates and encodes the
+    frames of the first pass.
+    """
+    original = await _find_original(job)
+    if original is not None:
+        logger.info(
+            "%s shares its video with %s, skipping analysis.",
+            job.candidate.tweet_url,
+            original.candidate.tweet_url,
+        )
+        original.shared_tweet_urls.extend(
+            [job.candidate.tweet_url, *job.shared_tweet_urls],
+        )
+        job.batch.duplicate_count += 1
+        _release_video(job)
+        return Completed(value=None)
+
+    output = None
+    try:
+        output = await _prepare_analysis(job)
+    finally:
+        if not isinstance(output, _VisionJob):
+            _settle_media(job, analyzed=output is not None)
+            _release_video(job)
+    return output
+
+
+async def _prepare_analysis(job: _VisionJob) -> _VisionJob | Completed | None:
+    """
+    Serves the findings of a job from the vision result cache, or
+    deduplicates and encodes the frames of its first pass.
+    """
+    prompts = _load_vision_prompts()
+    if prompts is None:
         return None
+    job.prompts = {
+        stage: template.format(
+            description=job.batch.description,
+            duration_seconds=job.batch.duration_seconds,
+        )
+        for stage, template in prompts.items()
+    }
+
+    result_cache = get_vision_result_cache()
+    job.cache_key = VisionCacheKey(
+        video_hash=fingerprint_frames(job.frames),
+        description=normalize_description(job.batch.description),
+        duration_seconds=job.batch.duration_seconds,
+        model=settings.gemini_model,
+        prompt_hash=hash_text(prompts["coarse"] + prompts["fine"]),
+        settings_hash=hash_text(settings.model_dump_json(include=_ANALYSIS_SETTINGS)),
+    )
+    if result_cache.enabled:
+        cached_findings = await asyncio.to_thread(result_cache.get, job.cache_key)
+        if cached_findings is not None:
+            logger.info("Using cached vision findings for %s", job.candidate.tweet_url)
+            return Completed(value=_to_vision_result(job.candidate, cached_findings))
+
+    llm = ChatGoogleGenerativeAI(
+        model=settings.gemini_model,
+        api_key=settings.gemini_api_key.get_secret_value(),
+        temperature=0.1,
+    )
+    structured_llm = llm.with_structured_output(
+        _VisionAnalysisResponse,
+        include_raw=True,
+    )
+    job.session = _VisionSession(structured_llm, job.candidate)
+    job.batch.sessions.append(job.session)
+    if settings.vision_two_pass:
+        job.encoded = await _encode_coarse_pass(job.session, job.frames)
     else:
-        return VisionResult(
-            tweet_url=candidate.tweet_url,
-            best_video_url=candidate.best_video_url,
-            findings=response.findings,
+        job.encoded = await _encode_windowed_pass(
+            job.session,
+            await _dedupe(job.frames),
+            "single",
+            _frame_interval(),
         )
+        # Only the encoded images are needed from here on.
+        job.frames = []
+    return job
+
+
+async def _llm_stage(job: _VisionJob) -> VisionResult | None:
+    """
+    Sends the encoded frames to Gemini, refining the coarse windows with a
+    fine pass in two-pass mode, and caches the findings.
+    """
+    findings = None
+    try:
+        findings = await _send_passes(job)
+    finally:
+        _settle_media(job, analyzed=findings is not None)
+        _release_video(job)
+    if findings is None:
+        return None
+
+    result_cache = get_vision_result_cache()
+    if result_cache.enabled:
+        await asyncio.to_thread(result_cache.put, job.cache_key, findings)
+    return _to_vision_result(job.candidate, findings, job.session)
+
+
+async def _send_passes(job: _VisionJob) -> list[ClipFindings] | None:
+    """
+    Runs the Gemini passes of a job, returning None if a call failed.
+    """
+    if settings.vision_two_pass:
+        windows = await _send_windowed_pass(
+            job.session,
+            job.prompts["coarse"],
+            job.encoded,
+        )
+        if windows is None:
+            return None
+        return await _refine_windows(
+            job.session,
+            _video_source(job),
+            job.frames,
+            windows,
+            job.prompts["fine"],
+        )
+    return await _send_windowed_pass(
+        job.session,
+        job.prompts["fine"],
+        job.encoded,
+    )
+
+
+def _build_pipeline() -> StagedPipeline:
+    """
+    Builds the vision pipeline with the per-stage concurrency of the settings.
+    """
+    extract_concurrency = (
+        settings.vision_extract_concurrency or get_extraction_service().max_workers
+    )
+    return StagedPipeline(
+        [
+            PipelineStage(
+                name="download",
+                handler=_download_stage,
+                concurrency=settings.vision_download_concurrency,
+            ),
+            PipelineStage(
+                name="extract",
+                handler=_extract_stage,
+                concurrency=extract_concurrency,
+            ),
+            PipelineStage(
+                name="encode",
+                handler=_encode_stage,
+                concurrency=settings.vision_encode_concurrency,
+            ),
+            PipelineStage(
+                name="llm",
+                handler=_llm_stage,
+                concurrency=settings.vision_llm_concurrency,
+            ),
+        ],
+        queue_size=settings.vision_queue_size,
+    )
+
+
+class VisionBatchResult(BaseModel):
+    """
+    The outcome of analyzing a batch of candidate videos.
+    """
+
+    results: list[VisionResult] = Field(default_factory=list)
+    stage_metrics: list[PipelineStageMetrics] = Field(default_factory=list)
+    cancelled: list[CancelledAnalysis] = Field(default_factory=list)
+    duplicate_count: int = Field(
+        0,
+        description="The number of videos skipped as copies of another one.",
+    )
+    token_usage: dict[str, int] = Field(
+        default_factory=dict,
+        description="The tokens used by each vision pass over every video, "
+        "including the ones without findings.",
+    )
+    frame_encodings: list[FrameEncoding] = Field(
+        default_factory=list,
+        description="The frame encoding of every vision call of the batch.",
+    )
+
+
+def _is_good_enough(result: VisionResult) -> bool:
+    """
+    Whether a result holds a finding confident enough to stop the search.
+    """
+    threshold = settings.vision_good_enough_confidence
+    return threshold is not None and any(
+        f.confidence >= threshold for f in result.findings
+    )
+
+
+def _schedule_key(candidate: Candidate) -> tuple[bool, float, float]:
+    """
+    Orders candidates by LLM text score first, then the candidates the local
+    prefilter accepted by their keyword score, whose scale differs, then the
+    ones left unscored.
+    """
+    return (
+        candidate.text_score is not None,
+        candidate.text_score or 0.0,
+        candidate.lexical_score or 0.0,
+    )
+
+
+async def analyze_videos(
+    candidates: list[Candidate],
+    description: str,
+    duration_seconds: int,
+    prefetcher: VideoPrefetcher | None = None,
+) -> VisionBatchResult:
+    """
+    Analyzes many videos to find clips that match a description.
+
+    The videos flow through a download, extract, encode and LLM stage
+    connected by bounded queues, each stage with its own concurrency limit.
+    A full queue pauses the stage feeding it, so only a bounded number of
+    videos hold frames in memory at once, however many candidates come in.
+
+    Candidates are scheduled by descending text filter score, ahead of the
+    ones only scored by the local prefilter. Once a finding
+    reaches the good-enough confidence, the analyses in flight are cancelled
+    and the ones not yet started are skipped. Videos whose leading frames
+    match a video already analyzed in the run are not sent to Gemini, and the
+    findings of the first copy are attributed to every tweet posting it. A
+    copy waits for the analysis of its video in flight, and is analyzed in
+    its place if that analysis fails.
+
+    Args:
+        candidates: The Candidate objects to analyze.
+        description: The user's original search description.
+        duration_seconds: The target duration for the video clip.
+        prefetcher: The prefetcher holding downloads started ahead of time,
+            which are adopted instead of downloading again.
+
+    Returns:
+        The results of the videos in which clips were found, in order of
+        completion, the metrics of every stage, the abandoned analyses, the
+        number of copies skipped, and the tokens and frame encodings of
+        every vision call, whether or not it found a clip.
+    """
+    ordered = sorted(candidates, key=_schedule_key, reverse=True)
+    batch = _VisionBatch(description, duration_seconds, prefetcher)
+    jobs = [_VisionJob(candidate, batch) for candidate in ordered]
+    pipeline = _build_pipeline()
+    try:
+        results = await pipeline.run(jobs, stop_when=_is_good_enough)
+    finally:
+        # Downloads kept for the fine pass of jobs that were dropped or
+        # cancelled on the way.
+        for job in jobs:
+            _release_video(job)
+    # Copies can be recognized after the original's result was produced.
+    shared_tweet_urls = {
+        job.candidate.tweet_url: job.shared_tweet_urls for _, job in batch.media
+    }
+    for result in results:
+        result.shared_tweet_urls = shared_tweet_urls.get(
+            result.tweet_url,
+            result.shared_tweet_urls,
+        )
+    cancelled = [
+        CancelledAnalysis(
+            tweet_url=entry.item.candidate.tweet_url,
+            text_score=entry.item.candidate.text_score,
+            stage=entry.stage,
+            status="cancelled" if entry.started else "skipped",
+        )
+        for entry in pipeline.cancelled
+    ]
+    token_usage: dict[str, int] = {}
+    for session in batch.sessions:
+        for stage, tokens in session.token_usage.items():
+            token_usage[stage] = token_usage.get(stage, 0) + tokens
+    return VisionBatchResult(
+        results=results,
+        stage_metrics=pipeline.metrics,
+        cancelled=cancelled,
+        duplicate_count=batch.duplicate_count,
+        token_usage=token_usage,
+        frame_encodings=[
+            encoding
+            for session in batch.sessions
+            for encoding in session.frame_encodings
+        ],
+    )
+
+
+async def analyze_video_for_clip(
+    candidate: Candidate,
+    description: str,
+    duration_seconds: int,
+) -> VisionResult | None:
+    """
+    Analyzes a single video to find clips that match a description.
+
+    This function downloads the video, extracts frames, and uses the Gemini
+    vision model to identify relevant segments. Downloaded videos are kept in
+    the persistent video cache, and the findings of every analysis are kept
+    in the vision result cache, so repeated requests skip the Gemini call.
+
+    In two-pass mode, a coarse pass over sparse, downscaled frames picks the
+    windows that the fine pass analyzes, and only those windows are sampled
+    densely.
+    Long videos are split into overlapping windows analyzed concurrently, so
+    latency scales with the window length rather than the video length.
+
+    Args:
+        candidate: The Candidate object containing video URLs and metadata.
+        description: The user's original search description.
+        duration_seconds: The target duration for the video clip.
+
+    Returns:
+        A VisionResult object containing any found clips, or None if an
+        error occurrs or no clips are found.
+    """
+    batch = await analyze_videos([candidate], description, duration_seconds)
+    return batch.results[0] if batch.results else None
@@ -0,0 +1,131 @@
+import logging
+
+import cv2
+import numpy as np
+
+from src.vision.sampling import SampledFrame
+
+logger = logging.getLogger(__name__)
+
+# Below this histogram correlation two frames are never considered equal,
+# even when their structure hashes match (e.g. a cut between two slides).
+_MIN_HISTOGRAM_CORRELATION = 0.95
+
+
+def _frame_signature(image: bytes) -> tuple[int, np.ndarray] | None:
+    """
+    Computes the difference hash and the grayscale histogram of a frame.
+
+    The JPEG is decoded at an eighth of its size in grayscale, which is far
+    cheaper than a full decode and more than enough for a 64-bit hash.
+    """
+    gray = cv2.imdecode(
+        np.frombuffer(image, dtype=np.uint8),
+        cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    )
+    if gray is None:
+        return None
+
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    dhash = int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    histogram = cv2.calcHist([gray], [0], None, [32], [0, 256])
+    cv2.normalize(histogram, histogram)
+    return dhash, histogram
+
+
+def dedupe_frames(
+    frames: list[SampledFrame],
+    max_hash_distance: int = 6,
+    max_gap_seconds: float = 10,
+) -> list[SampledFrame]:
+    """
+    Drops frames that are near-duplicates of the last kept frame.
+
+    A frame is a duplicate when its difference hash is within
+    `max_hash_distance` bits of the last kept frame and their grayscale
+    histograms are highly correlated. A frame is always kept once
+    `max_gap_seconds` have passed since the last kept one, so long static
+    shots are still anchored in time.
+
+    Args:
+        frames: The sampled frames in presentation order.
+        max_hash_distance: The maximum Hamming distance between the hashes of
+            two frames considered duplicates.
+        max_gap_seconds: The maximum time between two kept frames.
+
+    Returns:
+        The frames that are kept, each with its original timestamp.
+    """
+    kept: list[SampledFrame] = []
+    last_signature: tuple[int, np.ndarray] | None = None
+
+    for frame in frames:
+        signature = _frame_signature(frame.image)
+        if kept and signature and last_signature:
+            gap_s = frame.timestamp_s - kept[-1].timestamp_s
+            distance = (signature[0] ^ last_signature[0]).bit_count()
+            correlation = cv2.compareHist(
+                signature[1],
+                last_signature[1],
+                cv2.HISTCMP_CORREL,
+            )
+            if (
+                gap_s < max_gap_seconds
+                and distance <= max_hash_distance
+                and correlation >= _MIN_HISTOGRAM_CORRELATION
+            ):
+                continue
+
+        kept.append(frame)
+        last_signature = signature
+
+    logger.info("Deduplication kept %d of %d frames.", len(kept), len(frames))
+    return kept
+
+
+def media_fingerprint(
+    frames: list[SampledFrame],
+    limit: int = 5,
+) -> tuple[int, ...] | None:
+    """
+    Fingerprints the content of a video by its number of frames and the
+    difference hashes of its first sampled frames.
+
+    Args:
+        frames: The sampled frames in presentation order.
+        limit: The number of leading frames to hash.
+
+    Returns:
+        The fingerprint, or None when the leading frames are all alike (e.g.
+        a black intro) and would match unrelated videos.
+    """
+    hashes = [
+        signature[0]
+        for frame in frames[:limit]
+        if (signature := _frame_signature(frame.image))
+    ]
+    if len(set(hashes)) < 2:  # noqa: PLR2004
+        return None
+    return len(frames), *hashes
+
+
+def is_same_media(
+    a: tuple[int, ...],
+    b: tuple[int, ...],
+    max_hash_distance: int = 6,
+) -> bool:
+    """
+    Whether two fingerprints belong to copies of the same video. Every
+    leading frame may differ by a few hash bits, so copies encoded at another
+    quality still match.
+    """
+    return (
+        len(a) == len(b)
+        and a[0] == b[0]
+        and all(
+            (x ^ y).bit_count() <= max_hash_distance
+            for x, y in zip(a[1:], b[1:], strict=True)
+        )
+    )
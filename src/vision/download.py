@@ -0,0 +1,377 @@
+import asyncio
+import contextlib
+import logging
+import re
+import tempfile
+import threading
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+
+import httpx
+import yt_dlp
+from yt_dlp.utils import DownloadCancelled
+
+from src.config.settings import settings
+from src.schemas import Candidate
+from src.schemas import VideoVariant
+from src.vision.video_cache import get_video_cache
+
+logger = logging.getLogger(__name__)
+
+ProgressHook = Callable[[dict], None]
+
+_CHUNK_BYTES = 256 * 1024
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+
+
+@lru_cache
+def get_http_client() -> httpx.Client:
+    """
+    Returns the HTTP client shared by every direct video download, whose
+    keep-alive pool lets consecutive downloads from the video CDN reuse
+    connections.
+    """
+    pool_size = settings.video_download_pool_size
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+        ),
+        timeout=httpx.Timeout(settings.video_download_timeout_seconds),
+        follow_redirects=True,
+    )
+
+
+def _response_offset(
+    response: httpx.Response,
+    offset: int,
+) -> tuple[int, int | None] | None:
+    """
+    Works out where the body of a response starts in the file and how large
+    the whole file is. A full response restarts from zero, and None means a
+    partial response started somewhere other than the requested offset.
+    """
+    if response.status_code == httpx.codes.PARTIAL_CONTENT:
+        match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+        if not match or int(match.group(1)) != offset:
+            return None
+        total = match.group(2)
+        return offset, None if total == "*" else int(total)
+    length = response.headers.get("content-length")
+    return 0, int(length) if length else None
+
+
+def fetch_video_url(
+    url: str,
+    output_dir: Path,
+    progress_hooks: list[ProgressHook] | None = None,
+    client: httpx.Client | None = None,
+) -> Path | None:
+    """
+    Downloads a video straight from its MP4 URL over the shared connection
+    pool.
+
+    An interrupted transfer is resumed with a range request for the missing
+    bytes, up to `settings.video_download_retries` times. Servers that ignore
+    the range are read again from the start, and a partial response that
+    starts at the wrong offset is discarded and requested again in full.
+
+    Args:
+        url: The direct URL of the MP4 video.
+        output_dir: The temporary directory to save the downloaded file.
+        progress_hooks: yt-dlp style progress hooks, which can abort the
+            download by raising `DownloadCancelled`.
+        client: The HTTP client to use, the shared one by default.
+
+    Returns:
+        The path to the downloaded video file, or None on failure.
+
+    Raises:
+        DownloadCancelled: If a progress hook cancelled the download.
+    """
+    client = client or get_http_client()
+    name = Path(httpx.URL(url).path).name or "video.mp4"
+    part_path = output_dir / f"{name}.part"
+    downloaded = 0
+    for attempt in range(settings.video_download_retries + 1):
+        headers = {"Range": f"bytes={downloaded}-"} if downloaded else {}
+        try:
+            with client.stream("GET", url, headers=headers) as response:
+                response.raise_for_status()
+                body_range = _response_offset(response, downloaded)
+                if body_range is None:
+                    logger.warning(
+                        "Range request for %s answered from the wrong offset,"
+                        " restarting the download.",
+                        url,
+                    )
+                    downloaded = 0
+                    continue
+                downloaded, total = body_range
+                with part_path.open("r+b" if downloaded else "wb") as file:
+                    file.seek(downloaded)
+                    file.truncate()
+                    for chunk in response.iter_bytes(_CHUNK_BYTES):
+                        file.write(chunk)
+                        downloaded += len(chunk)
+                        for hook in progress_hooks or []:
+                            hook(
+                                {
+                                    "status": "downloading",
+                                    "filename": str(part_path),
+                                    "downloaded_bytes": downloaded,
+                                    "total_bytes": total,
+                                },
+                            )
+            if total is not None and downloaded < total:
+                logger.warning(
+                    "Download of %s stopped at %d of %d bytes.",
+                    url,
+                    downloaded,
+                    total,
+                )
+                continue
+        except DownloadCancelled:
+            part_path.unlink(missing_ok=True)
+            raise
+        except httpx.TransportError as error:
+            logger.warning(
+                "Download of %s interrupted at %d bytes (attempt %d): %s",
+                url,
+                downloaded,
+                attempt + 1,
+                error,
+            )
+            continue
+        except httpx.HTTPError:
+            logger.exception("Direct download failed for %s", url)
+            break
+        else:
+            video_path = part_path.with_name(name)
+            part_path.replace(video_path)
+            logger.info("Fetched %d bytes from %s", downloaded, url)
+            return video_path
+
+    part_path.unlink(missing_ok=True)
+    return None
+
+
+def download_video(
+    url: str,
+    output_dir: Path,
+    progress_hooks: list[ProgressHook] | None = None,
+) -> Path | None:
+    """
+    Downloads a video from a Twitter URL using yt-dlp.
+
+    Args:
+        url: The URL of the tweet containing the video.
+        output_dir: The temporary directory to save the downloaded file.
+        progress_hooks: yt-dlp progress hooks, which can abort the download
+            by raising `DownloadCancelled`.
+
+    Returns:
+        The path to the downloaded video file, or None on failure.
+    """
+    try:
+        ydl_opts = {
+            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+            "outtmpl": str(output_dir / "%(id)s.%(ext)s"),
+            "quiet": True,
+            "merge_output_format": "mp4",
+            "overwrites": True,
+            "progress_hooks": progress_hooks or [],
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            if not info:
+                logger.error("yt-dlp could not extract info from %s", url)
+                return None
+
+            filename = ydl.prepare_filename(info)
+            if not filename or not Path(filename).exists():
+                logger.error("yt-dlp failed to download file for %s", url)
+                return None
+
+            logger.info("Successfully downloaded video to %s", filename)
+            return Path(filename)
+    except DownloadCancelled:
+        logger.info("Download of %s was cancelled.", url)
+        return None
+    except Exception:
+        logger.exception("yt-dlp downloader failed for %s", url)
+        return None
+
+
+def select_analysis_url(candidate: Candidate) -> str | None:
+    """
+    Picks the video URL to download for analysis.
+
+    Frames are downscaled before they reach the model, so the smallest MP4
+    variant whose short edge meets `settings.vision_analysis_resolution` is
+    enough. When no variant is large enough, the largest one is used, and the
+    best-quality stream is used when the variant sizes are unknown.
+    """
+    target = settings.vision_analysis_resolution
+    sized = [v for v in candidate.video_variants if v.width and v.height]
+    if target is None or not sized:
+        return str(candidate.best_video_url) if candidate.best_video_url else None
+
+    def rank(variant: VideoVariant) -> tuple[int, int]:
+        return min(variant.width, variant.height), variant.bitrate or 0
+
+    sufficient = [v for v in sized if rank(v)[0] >= target]
+    variant = min(sufficient, key=rank) if sufficient else max(sized, key=rank)
+    return str(variant.url)
+
+
+async def _run_download(
+    cancel_event: threading.Event,
+    func: Callable[..., Path | None],
+    /,
+    **kwargs,
+) -> Path | None:
+    """
+    Runs a blocking download step on a worker thread.
+
+    Cancelling the caller sets `cancel_event`, which aborts the download at
+    its next progress update, and waits for the thread to return before the
+    cancellation propagates, so the files it writes can be removed safely.
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(func, **kwargs))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        with contextlib.suppress(Exception):
+            await task
+        raise
+
+
+def video_cache_key(candidate: Candidate) -> str:
+    """
+    Derives the video cache key of a candidate from its tweet id and the
+    variant `select_analysis_url` picks, so a change to the analysis
+    resolution downloads the video again instead of reusing another size.
+    The variant is named by its size when known and by its URL path
+    otherwise.
+    """
+    tweet_id = candidate.tweet_url.path.rstrip("/").rsplit("/", 1)[-1]
+    video_url = select_analysis_url(candidate)
+    if video_url is None:
+        return tweet_id
+    variant = next(
+        (v for v in candidate.video_variants if str(v.url) == video_url),
+        None,
+    )
+    if variant and variant.width and variant.height:
+        return f"{tweet_id}:{variant.width}x{variant.height}"
+    return f"{tweet_id}:{httpx.URL(video_url).path}"
+
+
+async def download_to_cache(
+    candidate: Candidate,
+    progress_hooks: list[ProgressHook] | None = None,
+) -> tuple[Path | None, tempfile.TemporaryDirectory | None]:
+    """
+    Downloads a candidate's video.
+
+    The video is fetched straight from the variant picked by
+    `select_analysis_url` when the scraper resolved one, and through yt-dlp
+    from the tweet page otherwise or if the direct download fails. When the
+    video cache is enabled, the download lands next to the cache so it can be
+    moved into it with a rename rather than a copy.
+
+    Cancelling the download stops the transfer at its next progress update
+    and removes the temporary directory once the download thread returns.
+
+    Args:
+        candidate: The Candidate object whose video should be downloaded.
+        progress_hooks: yt-dlp progress hooks passed to the download.
+
+    Returns:
+        The path to the video, and the temporary directory holding it when
+        it could not be moved into the cache, which the caller must clean
+        up. The path is None on failure.
+    """
+    cache = get_video_cache()
+    download_root = None
+    if cache.enabled:
+        cache.directory.mkdir(parents=True, exist_ok=True)
+        download_root = cache.directory
+
+    download_dir = tempfile.TemporaryDirectory(dir=download_root)
+    cancel_event = threading.Event()
+
+    def cancel_on_request(_status: dict) -> None:
+        if cancel_event.is_set():
+            raise DownloadCancelled
+
+    progress_hooks = [*(progress_hooks or []), cancel_on_request]
+    try:
+        return await _download_into(
+            candidate,
+            download_dir,
+            progress_hooks,
+            cancel_event,
+        )
+    except asyncio.CancelledError:
+        download_dir.cleanup()
+        raise
+
+
+async def _download_into(
+    candidate: Candidate,
+    download_dir: tempfile.TemporaryDirectory,
+    progress_hooks: list[ProgressHook],
+    cancel_event: threading.Event,
+) -> tuple[Path | None, tempfile.TemporaryDirectory | None]:
+    """
+    Fetches a candidate's video into `download_dir` and moves it into the
+    video cache when enabled, see `download_to_cache`.
+    """
+    cache = get_video_cache()
+    output_dir = Path(download_dir.name)
+    video_path = None
+    video_url = select_analysis_url(candidate)
+    if video_url:
+        try:
+            video_path = await _run_download(
+                cancel_event,
+                fetch_video_url,
+                url=video_url,
+                output_dir=output_dir,
+                progress_hooks=progress_hooks,
+            )
+        except DownloadCancelled:
+            logger.info("Download of %s was cancelled.", video_url)
+            download_dir.cleanup()
+            return None, None
+        if not video_path:
+            logger.warning(
+                "Direct download failed for %s, falling back to yt-dlp.",
+                candidate.tweet_url,
+            )
+    if not video_path:
+        video_path = await _run_download(
+            cancel_event,
+            download_video,
+            url=str(candidate.tweet_url),
+            output_dir=output_dir,
+            progress_hooks=progress_hooks,
+        )
+    if not video_path:
+        download_dir.cleanup()
+        return None, None
+
+    if cache.enabled:
+        video_path = await _run_download(
+            cancel_event,
+            cache.put,
+            key=video_cache_key(candidate),
+            source=video_path,
+        )
+        download_dir.cleanup()
+        return video_path, None
+    return video_path, download_dir
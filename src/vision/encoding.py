@@ -0,0 +1,139 @@
+import math
+
+import cv2
+import numpy as np
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.schemas import FrameEncoding
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import SampledFrame
+from src.vision.sampling import encode_frame
+
+# Gemini bills images up to 384px on both sides as a single tile and tiles
+# larger images into 768x768 crops, each costing the same number of tokens.
+_GEMINI_SMALL_IMAGE_EDGE = 384
+_GEMINI_TILE_EDGE = 768
+_GEMINI_TOKENS_PER_TILE = 258
+
+# Lower bounds the budget never degrades frames past.
+_MIN_JPEG_QUALITY = 40
+_MIN_MAX_EDGE = 256
+_QUALITY_STEP = 15
+_EDGE_STEP = 0.75
+
+
+class FrameBudget(BaseModel):
+    """
+    The per-call limits frames are scaled and encoded to fit before they are
+    sent to the vision model.
+    """
+
+    max_edge: int = Field(..., ge=16)
+    jpeg_quality: int = Field(..., ge=1, le=100)
+    max_payload_bytes: int | None = Field(
+        None,
+        gt=0,
+        description="The maximum total size of the base64-encoded images.",
+    )
+    max_image_tokens: int | None = Field(
+        None,
+        gt=0,
+        description="The maximum estimated number of image tokens.",
+    )
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimates the number of Gemini input tokens used by one image.
+    """
+    if max(width, height) <= _GEMINI_SMALL_IMAGE_EDGE:
+        return _GEMINI_TOKENS_PER_TILE
+    tiles = math.ceil(width / _GEMINI_TILE_EDGE) * math.ceil(height / _GEMINI_TILE_EDGE)
+    return tiles * _GEMINI_TOKENS_PER_TILE
+
+
+def _base64_size(image: bytes) -> int:
+    return 4 * math.ceil(len(image) / 3)
+
+
+def resize_frame(frame: SampledFrame, frame_format: FrameFormat) -> SampledFrame:
+    """
+    Re-encodes a frame with a different scale or JPEG quality.
+
+    Args:
+        frame: The frame to re-encode.
+        frame_format: The scaling and encoding to apply.
+
+    Returns:
+        The re-encoded frame with its original timestamp, or the frame itself
+        if it could not be decoded.
+    """
+    image = cv2.imdecode(np.frombuffer(frame.image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return frame
+    return encode_frame(image, frame.timestamp_s, frame_format) or frame
+
+
+def fit_frames_to_budget(
+    frames: list[SampledFrame],
+    budget: FrameBudget,
+    stage: str,
+) -> tuple[list[SampledFrame], FrameEncoding]:
+    """
+    Scales and re-encodes frames until they fit a per-call budget.
+
+    Frames that already fit are passed through untouched. Otherwise the JPEG
+    quality is lowered first when only the payload size is exceeded, and the
+    longest edge is shrunk when the token budget is exceeded or the quality
+    cannot go lower. Every attempt starts again from the original frames, so
+    quality losses do not compound.
+
+    Args:
+        frames: The frames of one vision call, encoded at `budget.jpeg_quality`.
+        budget: The limits to fit.
+        stage: The name of the vision pass, recorded in the result.
+
+    Returns:
+        The fitted frames and a record of the encoding that was applied.
+    """
+    max_edge, jpeg_quality = budget.max_edge, budget.jpeg_quality
+    while True:
+        frame_format = FrameFormat(max_edge=max_edge, jpeg_quality=jpeg_quality)
+        fitted = [
+            f
+            if jpeg_quality == budget.jpeg_quality
+            and max(f.width, f.height) <= max_edge
+            else resize_frame(f, frame_format)
+            for f in frames
+        ]
+        payload_bytes = sum(_base64_size(f.image) for f in fitted)
+        tokens = sum(estimate_image_tokens(f.width, f.height) for f in fitted)
+
+        over_tokens = budget.max_image_tokens is not None and (
+            tokens > budget.max_image_tokens
+        )
+        over_bytes = budget.max_payload_bytes is not None and (
+            payload_bytes > budget.max_payload_bytes
+        )
+        can_shrink = max_edge > _MIN_MAX_EDGE
+        can_degrade = jpeg_quality > _MIN_JPEG_QUALITY
+        if over_tokens and can_shrink:
+            max_edge = max(_MIN_MAX_EDGE, int(max_edge * _EDGE_STEP))
+        elif over_bytes and can_degrade:
+            jpeg_quality = max(_MIN_JPEG_QUALITY, jpeg_quality - _QUALITY_STEP)
+        elif over_bytes and can_shrink:
+            max_edge = max(_MIN_MAX_EDGE, int(max_edge * _EDGE_STEP))
+        else:
+            break
+
+    encoding = FrameEncoding(
+        stage=stage,
+        frame_count=len(fitted),
+        image_count=len(fitted),
+        max_edge=max_edge,
+        jpeg_quality=jpeg_quality,
+        payload_bytes=payload_bytes,
+        estimated_tokens=tokens,
+    )
+    return fitted, encoding
@@ -0,0 +1,231 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from src.config.settings import settings
+from src.schemas import FrameEncoding
+from src.vision.encoding import FrameBudget
+from src.vision.encoding import fit_frames_to_budget
+from src.vision.mosaic import MosaicLayout
+from src.vision.mosaic import build_mosaics
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import SampledFrame
+from src.vision.sampling import iter_frames
+from src.vision.sampling import sample_frames
+from src.vision.sampling import sample_windows
+
+logger = logging.getLogger(__name__)
+
+
+class FrameExtractionService:
+    """
+    Runs CPU-bound frame decoding and JPEG encoding in a process pool so the
+    event loop keeps serving downloads and LLM calls while videos decode.
+    Frames are scaled and encoded with a single format shared by every video.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        frame_format: FrameFormat | None = None,
+    ) -> None:
+        self._max_workers = max_workers or os.process_cpu_count() or 1
+        self._frame_format = frame_format or FrameFormat()
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def max_workers(self) -> int:
+        """
+        The number of worker processes backing the service.
+        """
+        return self._max_workers
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Lazily starts the worker pool on first use.
+        """
+        if self._executor is None:
+            # Workers are spawned rather than forked so they never inherit the
+            # event loop or the gRPC threads of the parent process.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                "Started frame extraction pool with %d workers.",
+                self._max_workers,
+            )
+        return self._executor
+
+    async def extract(
+        self,
+        video_path: Path,
+        interval_seconds: float = 2,
+    ) -> list[SampledFrame]:
+        """
+        Samples frames from a video file in a worker process.
+
+        Args:
+            video_path: The path to the video file.
+            interval_seconds: The interval in seconds between sampled frames.
+
+        Returns:
+            A list of sampled frames in presentation order.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            sample_frames,
+            video_path,
+            interval_seconds,
+            None,
+            self._frame_format,
+        )
+
+    async def extract_windows(
+        self,
+        source: Path | str,
+        windows: list[tuple[float, float]],
+        interval_seconds: float,
+    ) -> list[SampledFrame]:
+        """
+        Samples frames inside time windows of a video in a worker process,
+        see `sample_windows`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            sample_windows,
+            source,
+            windows,
+            interval_seconds,
+            self._frame_format,
+        )
+
+    async def fit_to_budget(
+        self,
+        frames: list[SampledFrame],
+        budget: FrameBudget,
+        stage: str,
+    ) -> tuple[list[SampledFrame], FrameEncoding]:
+        """
+        Scales and re-encodes the frames of one vision call in a worker
+        process until they fit the budget, see `fit_frames_to_budget`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            fit_frames_to_budget,
+            frames,
+            budget,
+            stage,
+        )
+
+    async def compose_mosaics(
+        self,
+        chunks: list[list[SampledFrame]],
+        layout: MosaicLayout,
+    ) -> list[SampledFrame | None]:
+        """
+        Packs chunks of consecutive frames into grid images in a worker
+        process, see `build_mosaics`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            build_mosaics,
+            chunks,
+            layout,
+            self._frame_format.jpeg_quality,
+        )
+
+    async def stream(
+        self,
+        url: str,
+        interval_seconds: float = 2,
+    ) -> AsyncIterator[SampledFrame]:
+        """
+        Samples frames from a video URL while it downloads.
+
+        Streaming decode is bound by the network rather than the CPU, and
+        OpenCV releases the GIL while it reads and decodes, so the frames are
+        pulled on a worker thread instead of a process. Each frame is yielded
+        as soon as it has been decoded.
+
+        Cancelling the consumer mid-frame sets a stop flag, waits for the
+        pending frame on the worker thread and only then closes the stream
+        there, since a generator cannot be closed while it is executing.
+
+        Args:
+            url: The direct URL of a progressive MP4 video stream.
+            interval_seconds: The interval in seconds between sampled frames.
+
+        Yields:
+            Sampled frames in presentation order.
+        """
+        stop = threading.Event()
+        frames = iter_frames(
+            url,
+            interval_seconds,
+            frame_format=self._frame_format,
+            stop=stop,
+        )
+        pending: asyncio.Future | None = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(asyncio.to_thread(next, frames, None))
+                # Shielded so a cancellation leaves the pending frame running
+                # and it can still be awaited below.
+                frame = await asyncio.shield(pending)
+                pending = None
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            stop.set()
+            await asyncio.shield(self._close_stream(frames, pending))
+
+    @staticmethod
+    async def _close_stream(
+        frames: Iterator[SampledFrame],
+        pending: asyncio.Future | None,
+    ) -> None:
+        """
+        Closes a frame stream on a worker thread once its pending frame, if
+        any, has been decoded.
+        """
+        if pending is not None:
+            with contextlib.suppress(Exception):
+                await pending
+        await asyncio.to_thread(frames.close)
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker pool. It is restarted on the next extraction.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_extraction_service() -> FrameExtractionService:
+    """
+    Returns the process-wide frame extraction service shared across
+    candidates and pipeline runs.
+    """
+    return FrameExtractionService(
+        max_workers=settings.vision_extraction_workers,
+        frame_format=FrameFormat(
+            max_edge=settings.vision_max_edge,
+            jpeg_quality=settings.vision_jpeg_quality,
+        ),
+    )
@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import SampledFrame
+from src.vision.sampling import encode_frame
+
+
+class MosaicLayout(BaseModel):
+    """
+    The grid that consecutive frames are packed into.
+    """
+
+    columns: int = Field(3, ge=1)
+    rows: int = Field(3, ge=1)
+    tile_edge: int = Field(
+        256,
+        ge=64,
+        description="The length in pixels of the longest edge of each tile.",
+    )
+
+    @property
+    def tiles(self) -> int:
+        """
+        The number of frames packed into one mosaic.
+        """
+        return self.columns * self.rows
+
+
+def _burn_timestamp(tile: np.ndarray, timestamp_s: float) -> None:
+    """
+    Draws the timestamp of a frame in the top-left corner of its tile.
+    """
+    label = f"{timestamp_s:.1f}s"
+    scale = max(tile.shape[1] / 400, 0.35)
+    thickness = max(1, round(scale * 2))
+    (width, height), baseline = cv2.getTextSize(
+        label,
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        thickness,
+    )
+    cv2.rectangle(tile, (0, 0), (width + 6, height + baseline + 6), (0, 0, 0), -1)
+    cv2.putText(
+        tile,
+        label,
+        (3, height + 3),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        (255, 255, 255),
+        thickness,
+        cv2.LINE_AA,
+    )
+
+
+def compose_mosaic(
+    frames: list[SampledFrame],
+    layout: MosaicLayout,
+    jpeg_quality: int = 90,
+) -> SampledFrame | None:
+    """
+    Tiles consecutive frames into a single grid image, left to right and top
+    to bottom, with the timestamp of each frame burned into its tile.
+
+    Args:
+        frames: Up to `layout.tiles` consecutive frames.
+        layout: The grid to pack the frames into.
+        jpeg_quality: The JPEG quality of the mosaic.
+
+    Returns:
+        The mosaic, timestamped with its first frame, or None if no frame
+        could be decoded.
+    """
+    images = [
+        cv2.imdecode(np.frombuffer(f.image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        for f in frames[: layout.tiles]
+    ]
+    decoded = [
+        (f, image)
+        for f, image in zip(frames, images, strict=False)
+        if image is not None
+    ]
+    if not decoded:
+        return None
+
+    height, width = decoded[0][1].shape[:2]
+    scale = layout.tile_edge / max(height, width)
+    tile_width, tile_height = round(width * scale), round(height * scale)
+    rows = -(-len(decoded) // layout.columns)
+    columns = min(layout.columns, len(decoded))
+    canvas = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+
+    for index, (frame, image) in enumerate(decoded):
+        tile = cv2.resize(
+            image,
+            (tile_width, tile_height),
+            interpolation=cv2.INTER_AREA,
+        )
+        _burn_timestamp(tile, frame.timestamp_s)
+        row, column = divmod(index, layout.columns)
+        canvas[
+            row * tile_height : (row + 1) * tile_height,
+            column * tile_width : (column + 1) * tile_width,
+        ] = tile
+
+    return encode_frame(
+        canvas,
+        decoded[0][0].timestamp_s,
+        FrameFormat(jpeg_quality=jpeg_quality),
+    )
+
+
+def build_mosaics(
+    chunks: list[list[SampledFrame]],
+    layout: MosaicLayout,
+    jpeg_quality: int = 90,
+) -> list[SampledFrame | None]:
+    """
+    Composes one mosaic per chunk of consecutive frames.
+
+    Args:
+        chunks: Groups of at most `layout.tiles` consecutive frames.
+        layout: The grid to pack each chunk into.
+        jpeg_quality: The JPEG quality of the mosaics.
+
+    Returns:
+        The mosaics in the order of the chunks, with None for any chunk that
+        could not be decoded.
+    """
+    return [compose_mosaic(chunk, layout, jpeg_quality) for chunk in chunks]
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.schemas import PipelineStageMetrics
+
+logger = logging.getLogger(__name__)
+
+# Tells the workers of a stage that no more items will arrive.
+_STOP = object()
+
+
+async def _gather_all(*aws: Awaitable[Any]) -> None:
+    """
+    Runs the awaitables concurrently and waits for every one of them, even
+    once one fails or the gathering is cancelled, so no worker outlives the
+    run that started it. The first failure is raised afterwards.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+class Completed(BaseModel):
+    """
+    Wraps the output of a stage that skips every remaining stage, e.g. a
+    result served from a cache.
+    """
+
+    value: Any
+
+
+class CancelledItem(BaseModel):
+    """
+    An item abandoned when a pipeline stopped early.
+    """
+
+    item: Any
+    stage: str = Field(..., description="The stage the item was in or waiting for.")
+    started: bool = Field(
+        ...,
+        description="Whether any stage had started processing the item.",
+    )
+
+
+class PipelineStage(BaseModel):
+    """
+    One step of a pipeline: an async handler and how many copies of it run at
+    the same time.
+
+    The handler returns the item to pass to the next stage, a `Completed`
+    output, or None to drop the item.
+    """
+
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+
+
+class StagedPipeline:
+    """
+    Runs items through a sequence of stages connected by bounded queues.
+
+    Every stage has its own pool of workers, so a slow stage never starves
+    the others, and a full queue pauses the stage feeding it. At most
+    `queue_size` plus `concurrency` items are therefore held by any stage at
+    once, however many items enter the pipeline.
+
+    Items enter in the order they are given, so callers schedule the most
+    promising ones first. A run can stop early once an output satisfies a
+    condition, cancelling the items in flight and skipping the rest.
+    """
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int = 2) -> None:
+        self._stages = stages
+        self._queue_size = queue_size
+        self._queues: list[asyncio.Queue] = []
+        self._depth_totals: list[int] = []
+        self._puts: list[int] = []
+        self._outputs: list[Any] = []
+        self._held: list[list[Any]] = []
+        self._next_item: Any = None
+        self._stop_when: Callable[[Any], bool] | None = None
+        self._main: asyncio.Future | None = None
+        self._halted = False
+        self.cancelled: list[CancelledItem] = []
+        self.metrics = [
+            PipelineStageMetrics(stage=stage.name, concurrency=stage.concurrency)
+            for stage in stages
+        ]
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        stop_when: Callable[[Any], bool] | None = None,
+    ) -> list[Any]:
+        """
+        Feeds the items through every stage.
+
+        Args:
+            items: The inputs of the first stage, in order of priority.
+            stop_when: A condition on the outputs. As soon as one output
+                satisfies it, every item still in flight is cancelled and the
+                remaining items are skipped, see `cancelled`.
+
+        Returns:
+            The outputs of the last stage and every `Completed` value, in
+            order of completion. Dropped items are left out.
+        """
+        pending = iter(items)
+        self._queues = [asyncio.Queue(maxsize=self._queue_size) for _ in self._stages]
+        self._depth_totals = [0] * len(self._stages)
+        self._puts = [0] * len(self._stages)
+        self._outputs = []
+        self._held = [[] for _ in self._stages]
+        self._stop_when = stop_when
+        self._halted = False
+        self.cancelled = []
+
+        self._main = asyncio.ensure_future(
+            _gather_all(
+                self._produce(pending),
+                *(self._run_stage(index) for index in range(len(self._stages))),
+            ),
+        )
+        try:
+            await self._main
+        except asyncio.CancelledError:
+            if not self._halted:
+                raise
+            self._record_cancelled(pending)
+
+        for metrics in self.metrics:
+            logger.info(
+                "Stage %s: %d processed, %d dropped, %d cancelled, queue depth"
+                " max %d, mean %.1f.",
+                metrics.stage,
+                metrics.processed,
+                metrics.dropped,
+                metrics.cancelled,
+                metrics.max_queue_depth,
+                metrics.mean_queue_depth,
+            )
+        return self._outputs
+
+    def _halt(self) -> None:
+        """
+        Cancels every producer and worker of the current run.
+        """
+        self._halted = True
+        self._main.cancel()
+
+    def _record_cancelled(self, pending: Iterator[Any]) -> None:
+        """
+        Records the items that were in flight, queued or not yet produced
+        when the run was halted.
+        """
+        for index, stage in enumerate(self._stages):
+            abandoned = [(item, True) for item in self._held[index]]
+            while not self._queues[index].empty():
+                item = self._queues[index].get_nowait()
+                if item is not _STOP:
+                    abandoned.append((item, index > 0))
+            if index == 0:
+                unproduced = [] if self._next_item is None else [self._next_item]
+                abandoned.extend((item, False) for item in [*unproduced, *pending])
+            self.metrics[index].cancelled += len(abandoned)
+            self.cancelled.extend(
+                CancelledItem(item=item, stage=stage.name, started=started)
+                for item, started in abandoned
+            )
+        self._next_item = None
+        logger.info("Pipeline stopped early, abandoning %d items.", len(self.cancelled))
+
+    async def _put(self, index: int, item: Any) -> None:
+        """
+        Queues an item for a stage and samples the depth of its queue.
+        """
+        started = time.perf_counter()
+        await self._queues[index].put(item)
+        metrics = self.metrics[index]
+        metrics.blocked_seconds += time.perf_counter() - started
+        depth = self._queues[index].qsize()
+        self._depth_totals[index] += depth
+        self._puts[index] += 1
+        metrics.max_queue_depth = max(metrics.max_queue_depth, depth)
+        metrics.mean_queue_depth = self._depth_totals[index] / self._puts[index]
+
+    async def _stop(self, index: int) -> None:
+        """
+        Tells every worker of a stage to exit once its queue is drained.
+        """
+        for _ in range(self._stages[index].concurrency):
+            await self._queues[index].put(_STOP)
+
+    async def _produce(self, items: Iterator[Any]) -> None:
+        for item in items:
+            self._next_item = item
+            await self._put(0, item)
+            self._next_item = None
+        await self._stop(0)
+
+    async def _run_stage(self, index: int) -> None:
+        await _gather_all(
+            *(self._work(index) for _ in range(self._stages[index].concurrency)),
+        )
+        if index + 1 < len(self._stages):
+            await self._stop(index + 1)
+
+    async def _work(self, index: int) -> None:
+        """
+        Processes the items of a stage until told to stop, handing each output
+        to the next stage.
+        """
+        while (item := await self._queues[index].get()) is not _STOP:
+            self._held[index].append(item)
+            await self._process(index, item)
+            self._held[index].remove(item)
+
+    async def _process(self, index: int, item: Any) -> None:
+        """
+        Runs the handler of a stage on one item and routes its output.
+        """
+        stage, metrics = self._stages[index], self.metrics[index]
+        try:
+            output = await stage.handler(item)
+        except Exception:
+            # A handler's cleanup can raise in place of the cancellation of a
+            # halted run, which must still stop the worker.
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            logger.exception("The %s stage failed.", stage.name)
+            output = None
+
+        if output is None:
+            metrics.dropped += 1
+            return
+        metrics.processed += 1
+        if isinstance(output, Completed) or index == len(self._stages) - 1:
+            value = output.value if isinstance(output, Completed) else output
+            if value is None:
+                return
+            self._outputs.append(value)
+            if self._stop_when and self._stop_when(value):
+                self._halt()
+        else:
+            await self._put(index + 1, output)
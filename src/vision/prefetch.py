@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+from yt_dlp.utils import DownloadCancelled
+
+from src.schemas import Candidate
+from src.vision.download import download_to_cache
+from src.vision.download import video_cache_key
+from src.vision.video_cache import get_video_cache
+
+logger = logging.getLogger(__name__)
+
+DownloadResult = tuple[Path | None, tempfile.TemporaryDirectory | None]
+
+
+class _Prefetch:
+    """
+    A speculative download in flight, with the bytes it has fetched so far and
+    a flag that aborts it at the next progress update.
+    """
+
+    def __init__(self, candidate: Candidate) -> None:
+        self.cancel_event = threading.Event()
+        self._progress: dict[str, int] = {}
+        self.task: asyncio.Task[DownloadResult] = asyncio.create_task(
+            download_to_cache(candidate, progress_hooks=[self._on_progress]),
+        )
+
+    @property
+    def downloaded_bytes(self) -> int:
+        return sum(self._progress.values())
+
+    def _on_progress(self, status: dict) -> None:
+        """
+        Records the progress of every file of the download, and aborts it
+        once cancelled. Runs in the download thread.
+        """
+        filename = status.get("filename") or ""
+        self._progress[filename] = status.get("downloaded_bytes") or 0
+        if self.cancel_event.is_set():
+            raise DownloadCancelled
+
+
+class VideoPrefetcher:
+    """
+    Downloads the videos of the most promising candidates while the text
+    filter runs, so the vision stage finds them ready.
+
+    Downloads of candidates the filter drops are cancelled, and the bytes
+    they fetched are reported as wasted.
+    """
+
+    def __init__(self) -> None:
+        self._prefetches: dict[str, _Prefetch] = {}
+        self.started = 0
+        self.hits = 0
+        self.wasted_bytes = 0
+
+    def start(self, candidates: list[Candidate]) -> None:
+        """
+        Starts downloading the videos of the candidates, skipping the ones
+        already in the video cache.
+        """
+        cache = get_video_cache()
+        for candidate in candidates:
+            key = video_cache_key(candidate)
+            if key in self._prefetches or (cache.enabled and cache.get(key)):
+                continue
+            self._prefetches[key] = _Prefetch(candidate)
+            self.started += 1
+        logger.info("Prefetching %d candidate videos.", self.started)
+
+    def retain(self, candidates: list[Candidate]) -> None:
+        """
+        Cancels the downloads of every candidate not in `candidates`.
+        """
+        kept = {video_cache_key(candidate) for candidate in candidates}
+        for key, prefetch in self._prefetches.items():
+            if key not in kept:
+                prefetch.cancel_event.set()
+
+    async def adopt(self, candidate: Candidate) -> DownloadResult | None:
+        """
+        Hands over the prefetched download of a candidate, waiting for it to
+        finish if needed.
+
+        Returns:
+            The path to the video and the temporary directory the caller
+            now owns, as returned by `download_to_cache`, or None if the
+            candidate was not prefetched or its download failed.
+        """
+        key = video_cache_key(candidate)
+        prefetch = self._prefetches.get(key)
+        if prefetch is None:
+            return None
+        # Shielded so a cancelled analysis leaves the download to `close`.
+        video_path, download_dir = await asyncio.shield(prefetch.task)
+        del self._prefetches[key]
+        if video_path is None:
+            return None
+        self.hits += 1
+        return video_path, download_dir
+
+    async def close(self) -> None:
+        """
+        Cancels and waits for every download that was not adopted, counting
+        the bytes they fetched as wasted and removing temporary files.
+        """
+        prefetches = list(self._prefetches.values())
+        self._prefetches.clear()
+        for prefetch in prefetches:
+            prefetch.cancel_event.set()
+        results = await asyncio.gather(
+            *(p.task for p in prefetches),
+            return_exceptions=True,
+        )
+        for prefetch, result in zip(prefetches, results, strict=True):
+            self.wasted_bytes += prefetch.downloaded_bytes
+            if isinstance(result, BaseException):
+                logger.warning("Prefetch failed: %s", result)
+            elif result[1]:
+                result[1].cleanup()
+        logger.info(
+            "Prefetch: %d of %d videos used, %d bytes wasted.",
+            self.hits,
+            self.started,
+            self.wasted_bytes,
+        )
@@ -0,0 +1,240 @@
+import difflib
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.config.settings import settings
+from src.schemas import ClipFindings
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+# Bumped whenever the table changes, which drops the entries of older files.
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vision_results (
+    key TEXT PRIMARY KEY,
+    video_hash TEXT NOT NULL,
+    description TEXT NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    settings_hash TEXT NOT NULL,
+    findings TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vision_results_video
+    ON vision_results (video_hash, duration_seconds, model, prompt_hash, settings_hash);
+"""
+
+
+def normalize_description(description: str) -> str:
+    """
+    Lowercases a description and strips punctuation and repeated whitespace,
+    so trivially different phrasings share a cache entry.
+    """
+    return " ".join(_NON_WORD_RE.sub(" ", description.lower()).split())
+
+
+def hash_text(text: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a string, e.g. of a prompt template.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VisionCacheKey(BaseModel):
+    """
+    Identifies a single vision analysis. A change to the model, the prompt
+    template or the settings that select and encode the frames yields a
+    different key, which invalidates older entries.
+    """
+
+    video_hash: str = Field(..., description="A hash of the analyzed video content.")
+    description: str = Field(..., description="The normalized search description.")
+    duration_seconds: int
+    model: str
+    prompt_hash: str = Field(..., description="A hash of the prompt template.")
+    settings_hash: str = Field(
+        ...,
+        description="A hash of the frame selection and encoding settings.",
+    )
+
+    def digest(self) -> str:
+        """
+        Returns a stable digest of every key field.
+        """
+        return hash_text(self.model_dump_json())
+
+
+class VisionResultCache:
+    """
+    A persistent SQLite cache of vision findings with a time-to-live and an
+    optional near-match lookup on the description.
+
+    Analyses that found nothing are kept for `empty_ttl_seconds` only, since
+    a transient failure to spot a clip should not hide the video for long.
+
+    Each operation opens its own connection, so the cache can be shared by
+    concurrent coroutines, threads and worker processes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int,
+        near_match_threshold: float | None = None,
+        empty_ttl_seconds: int | None = None,
+    ) -> None:
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._empty_ttl_seconds = (
+            ttl_seconds if empty_ttl_seconds is None else empty_ttl_seconds
+        )
+        self._near_match_threshold = near_match_threshold
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the cache has a non-zero time-to-live.
+        """
+        return self._ttl_seconds > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=30)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            (version,) = connection.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                connection.executescript(
+                    "DROP TABLE IF EXISTS vision_results;"
+                    f" PRAGMA user_version = {_SCHEMA_VERSION};",
+                )
+            connection.executescript(_SCHEMA)
+            self._initialized = True
+        return connection
+
+    def _find_near_match(
+        self,
+        connection: sqlite3.Connection,
+        key: VisionCacheKey,
+        now: float,
+    ) -> str | None:
+        rows = connection.execute(
+            "SELECT description, findings FROM vision_results"
+            " WHERE video_hash = ? AND duration_seconds = ? AND model = ?"
+            " AND prompt_hash = ? AND settings_hash = ? AND expires_at >= ?",
+            (
+                key.video_hash,
+                key.duration_seconds,
+                key.model,
+                key.prompt_hash,
+                key.settings_hash,
+                now,
+            ),
+        ).fetchall()
+
+        wanted = " ".join(sorted(key.description.split()))
+        best_ratio, best_findings = 0.0, None
+        for description, findings in rows:
+            candidate = " ".join(sorted(description.split()))
+            ratio = difflib.SequenceMatcher(None, wanted, candidate).ratio()
+            if ratio > best_ratio:
+                best_ratio, best_findings = ratio, findings
+
+        if best_findings is not None and best_ratio >= self._near_match_threshold:
+            logger.debug("Vision cache near match with ratio %.2f", best_ratio)
+            return best_findings
+        return None
+
+    def get(self, key: VisionCacheKey) -> list[ClipFindings] | None:
+        """
+        Looks up the findings of a previous analysis.
+
+        Args:
+            key: The key of the analysis.
+
+        Returns:
+            The cached findings, which may be an empty list for a video that
+            had no match, or None on a miss.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT findings FROM vision_results WHERE key = ? AND expires_at >= ?",
+                (key.digest(), now),
+            ).fetchone()
+            findings = row[0] if row else None
+            if findings is None and self._near_match_threshold is not None:
+                findings = self._find_near_match(connection, key, now)
+
+        if findings is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [ClipFindings.model_validate(f) for f in json.loads(findings)]
+
+    def put(self, key: VisionCacheKey, findings: list[ClipFindings]) -> None:
+        """
+        Stores the findings of an analysis, replacing any previous entry.
+        Empty findings are kept for the shorter empty TTL, or not at all
+        when it is 0.
+
+        Args:
+            key: The key of the analysis.
+            findings: The findings returned by the vision model.
+        """
+        ttl_seconds = self._ttl_seconds if findings else self._empty_ttl_seconds
+        if ttl_seconds <= 0:
+            return
+        payload = json.dumps([f.model_dump() for f in findings])
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO vision_results"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key.digest(),
+                    key.video_hash,
+                    key.description,
+                    key.duration_seconds,
+                    key.model,
+                    key.prompt_hash,
+                    key.settings_hash,
+                    payload,
+                    now + ttl_seconds,
+                ),
+            )
+            connection.execute(
+                "DELETE FROM vision_results WHERE expires_at < ?",
+                (now,),
+            )
+
+
+@lru_cache
+def get_vision_result_cache() -> VisionResultCache:
+    """
+    Returns the process-wide vision result cache.
+    """
+    return VisionResultCache(
+        path=settings.vision_cache_path,
+        ttl_seconds=settings.vision_cache_ttl_seconds,
+        near_match_threshold=settings.vision_cache_near_match_threshold,
+        empty_ttl_seconds=settings.vision_cache_empty_ttl_seconds,
+    )
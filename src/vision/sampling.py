@@ -0,0 +1,408 @@
+import hashlib
+import logging
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Literal
+
+import cv2
+import numpy as np
+from pydantic import BaseModel
+from pydantic import Field
+
+logger = logging.getLogger(__name__)
+
+SamplingStrategy = Literal["sequential", "seek"]
+
+# Number of demuxed packets inspected when estimating the keyframe interval.
+GOP_PROBE_PACKETS = 300
+
+# Open and read timeout applied when decoding straight from a URL.
+STREAM_TIMEOUT_MS = 15_000
+
+
+class SampledFrame(BaseModel):
+    """
+    A single frame sampled from a video, together with the real presentation
+    timestamp reported by the decoder.
+    """
+
+    timestamp_s: float = Field(
+        ...,
+        ge=0,
+        description="The presentation time of the frame in seconds.",
+    )
+    image: bytes = Field(
+        ...,
+        description="The frame encoded as a JPEG byte string.",
+    )
+    width: int = Field(0, ge=0, description="The width of the image in pixels.")
+    height: int = Field(0, ge=0, description="The height of the image in pixels.")
+
+
+class FrameFormat(BaseModel):
+    """
+    How sampled frames are scaled and encoded.
+    """
+
+    max_edge: int | None = Field(
+        None,
+        ge=16,
+        description="The maximum length in pixels of the longest edge.",
+    )
+    jpeg_quality: int = Field(95, ge=1, le=100)
+
+
+def fingerprint_frames(
+    frames: list[SampledFrame],
+    limit: int | None = None,
+) -> str:
+    """
+    Hashes the content of sampled frames into a stable video fingerprint.
+
+    Args:
+        frames: The sampled frames of a video.
+        limit: Only hash the first `limit` frames when given.
+
+    Returns:
+        The SHA-256 hex digest of the frame timestamps and images.
+    """
+    digest = hashlib.sha256()
+    for frame in frames[:limit]:
+        digest.update(f"{frame.timestamp_s:.3f}".encode())
+        digest.update(frame.image)
+    return digest.hexdigest()
+
+
+def encode_frame(
+    frame: np.ndarray,
+    timestamp_s: float,
+    frame_format: FrameFormat,
+) -> SampledFrame | None:
+    """
+    Scales a decoded BGR frame to fit the format and encodes it as JPEG.
+
+    Args:
+        frame: The decoded BGR frame.
+        timestamp_s: The presentation time of the frame in seconds.
+        frame_format: The scaling and encoding to apply.
+
+    Returns:
+        The encoded frame, or None if encoding failed.
+    """
+    height, width = frame.shape[:2]
+    if frame_format.max_edge and max(height, width) > frame_format.max_edge:
+        scale = frame_format.max_edge / max(height, width)
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    success, buffer = cv2.imencode(
+        ".jpg",
+        frame,
+        [cv2.IMWRITE_JPEG_QUALITY, frame_format.jpeg_quality],
+    )
+    if not success:
+        return None
+    return SampledFrame(
+        timestamp_s=max(timestamp_s, 0.0),
+        image=buffer.tobytes(),
+        width=width,
+        height=height,
+    )
+
+
+def _probe_gop_size(
+    video_path: Path,
+    max_packets: int = GOP_PROBE_PACKETS,
+) -> float | None:
+    """
+    Estimates the average keyframe interval (GOP size) of a video, in frames.
+
+    The video is opened in raw mode, so packets are demuxed but never decoded,
+    which makes the probe cheap compared to the decode it helps to avoid.
+
+    Args:
+        video_path: The path to the video file.
+        max_packets: The maximum number of packets to inspect.
+
+    Returns:
+        The estimated GOP size in frames, or None if it could not be measured.
+    """
+    cap = cv2.VideoCapture(
+        str(video_path),
+        cv2.CAP_FFMPEG,
+        [cv2.CAP_PROP_FORMAT, -1],
+    )
+    if not cap.isOpened():
+        return None
+
+    keyframes: list[int] = []
+    packets = 0
+    try:
+        while packets < max_packets and cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(packets)
+            packets += 1
+    finally:
+        cap.release()
+
+    if not keyframes:
+        return None
+    if len(keyframes) == 1:
+        # Only the leading keyframe was seen, so the GOP is at least as long
+        # as the probed window.
+        return float(packets)
+    return (keyframes[-1] - keyframes[0]) / (len(keyframes) - 1)
+
+
+def _choose_strategy(stride_frames: float, gop_size: float | None) -> SamplingStrategy:
+    """
+    Picks the cheapest sampling strategy for a video.
+
+    Seeking lands on the preceding keyframe and decodes forward to the target,
+    which costs about half a GOP per sample plus the seek itself, whereas
+    sequential grabbing demuxes and decodes every frame in the stride. Seeking
+    is therefore only chosen when the stride spans more than a whole GOP.
+    """
+    if gop_size is None or gop_size <= 0:
+        return "sequential"
+    return "seek" if stride_frames > gop_size else "sequential"
+
+
+def _iter_sequential(
+    cap: cv2.VideoCapture,
+    interval_seconds: float,
+    fps: float,
+    frame_format: FrameFormat,
+    stop: threading.Event,
+) -> Iterator[SampledFrame]:
+    """
+    Walks the video with `grab()` and only converts and encodes the frames
+    that land on a target timestamp.
+    """
+    half_frame_s = 0.5 / fps
+    next_target_s = 0.0
+
+    while not stop.is_set() and cap.grab():
+        timestamp_s = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp_s + half_frame_s < next_target_s:
+            continue
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        while next_target_s <= timestamp_s + half_frame_s:
+            next_target_s += interval_seconds
+
+        sampled = encode_frame(frame, timestamp_s, frame_format)
+        if sampled is not None:
+            yield sampled
+
+
+def _iter_seek(
+    cap: cv2.VideoCapture,
+    interval_seconds: float,
+    duration_s: float,
+    frame_format: FrameFormat,
+    stop: threading.Event,
+) -> Iterator[SampledFrame]:
+    """
+    Seeks straight to each target timestamp and decodes a single frame there.
+    """
+    last_timestamp_s = -1.0
+    target_s = 0.0
+
+    while target_s < duration_s and not stop.is_set():
+        cap.set(cv2.CAP_PROP_POS_MSEC, target_s * 1000)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        target_s += interval_seconds
+
+        timestamp_s = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp_s <= last_timestamp_s:
+            continue
+        last_timestamp_s = timestamp_s
+
+        sampled = encode_frame(frame, timestamp_s, frame_format)
+        if sampled is not None:
+            yield sampled
+
+
+def _is_stream(source: Path | str) -> bool:
+    """
+    Whether a frame source is a remote URL rather than a local file.
+    """
+    return isinstance(source, str) and source.startswith(("http://", "https://"))
+
+
+def _open_capture(source: Path | str) -> cv2.VideoCapture | None:
+    """
+    Opens a local file, or a URL with the stream timeouts, returning None if
+    it cannot be read.
+    """
+    if _is_stream(source):
+        cap = cv2.VideoCapture(
+            source,
+            cv2.CAP_FFMPEG,
+            [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC,
+                STREAM_TIMEOUT_MS,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC,
+                STREAM_TIMEOUT_MS,
+            ],
+        )
+    else:
+        cap = cv2.VideoCapture(str(source))
+    if not cap.isOpened():
+        logger.error("Could not open video: %s", source)
+        return None
+    return cap
+
+
+def iter_frames(
+    source: Path | str,
+    interval_seconds: float = 2,
+    strategy: SamplingStrategy | None = None,
+    frame_format: FrameFormat | None = None,
+    stop: threading.Event | None = None,
+) -> Iterator[SampledFrame]:
+    """
+    Lazily samples one frame every `interval_seconds` from a video.
+
+    The source can be a local file or the URL of a progressive MP4. A URL is
+    decoded while it downloads, so the first frames are produced as soon as
+    the first bytes arrive and no file is ever written to disk.
+
+    Unless a strategy is forced, local files are probed for their keyframe
+    structure and the cheapest of sequential grabbing or keyframe seeking is
+    used. Streams are read sequentially, since every seek would cost a new
+    range request.
+
+    Args:
+        source: The path to a video file or the URL of a video stream.
+        interval_seconds: The interval in seconds between sampled frames.
+        strategy: Forces a sampling strategy instead of choosing one per video.
+        frame_format: How frames are scaled and encoded. Frames are scaled
+            before encoding, so oversized frames are never encoded at all.
+        stop: Ends the iteration at the next frame once set, so a consumer on
+            another thread can stop a stream without closing the generator
+            while it is still executing.
+
+    Yields:
+        Sampled frames in presentation order.
+    """
+    frame_format = frame_format or FrameFormat()
+    stop = stop or threading.Event()
+    is_stream = _is_stream(source)
+    name = source if is_stream else Path(source).name
+    cap = _open_capture(source)
+    if cap is None:
+        return
+
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        stride_frames = fps * interval_seconds
+
+        if strategy is None:
+            gop_size = None if is_stream else _probe_gop_size(Path(source))
+            strategy = _choose_strategy(stride_frames, gop_size)
+        if strategy == "seek" and frame_count <= 0:
+            logger.debug("Unknown frame count for %s, not seeking.", name)
+            strategy = "sequential"
+
+        logger.debug("Sampling %s with the %s strategy.", name, strategy)
+        if strategy == "seek":
+            yield from _iter_seek(
+                cap,
+                interval_seconds,
+                frame_count / fps,
+                frame_format,
+                stop,
+            )
+        else:
+            yield from _iter_sequential(
+                cap,
+                interval_seconds,
+                fps,
+                frame_format,
+                stop,
+            )
+    finally:
+        cap.release()
+
+
+def sample_frames(
+    source: Path | str,
+    interval_seconds: float = 2,
+    strategy: SamplingStrategy | None = None,
+    frame_format: FrameFormat | None = None,
+) -> list[SampledFrame]:
+    """
+    Samples one frame every `interval_seconds` from a video.
+
+    Args:
+        source: The path to a video file or the URL of a video stream.
+        interval_seconds: The interval in seconds between sampled frames.
+        strategy: Forces a sampling strategy instead of choosing one per video.
+        frame_format: How frames are scaled and encoded.
+
+    Returns:
+        A list of sampled frames in presentation order.
+    """
+    return list(iter_frames(source, interval_seconds, strategy, frame_format))
+
+
+def sample_windows(
+    source: Path | str,
+    windows: list[tuple[float, float]],
+    interval_seconds: float,
+    frame_format: FrameFormat | None = None,
+) -> list[SampledFrame]:
+    """
+    Samples one frame every `interval_seconds` inside time windows only.
+
+    The decoder seeks to the start of each window and reads forward to its
+    end, so the rest of the video is never decoded.
+
+    Args:
+        source: The path to a video file or the URL of a video stream.
+        windows: Sorted, non-overlapping `(start, end)` windows in seconds.
+        interval_seconds: The interval in seconds between sampled frames.
+        frame_format: How frames are scaled and encoded.
+
+    Returns:
+        The sampled frames in presentation order, or an empty list if the
+        video could not be opened.
+    """
+    frame_format = frame_format or FrameFormat()
+    cap = _open_capture(source)
+    if cap is None:
+        return []
+
+    frames: list[SampledFrame] = []
+    try:
+        half_frame_s = 0.5 / (cap.get(cv2.CAP_PROP_FPS) or 30)
+        for start_s, end_s in windows:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_s * 1000)
+            next_target_s = start_s
+            while cap.grab():
+                timestamp_s = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if timestamp_s > end_s + half_frame_s:
+                    break
+                if timestamp_s + half_frame_s < next_target_s:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                while next_target_s <= timestamp_s + half_frame_s:
+                    next_target_s += interval_seconds
+                sampled = encode_frame(frame, timestamp_s, frame_format)
+                if sampled is not None and (
+                    not frames or timestamp_s > frames[-1].timestamp_s
+                ):
+                    frames.append(sampled)
+    finally:
+        cap.release()
+    return frames
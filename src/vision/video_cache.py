@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Entries used more recently than this are spared, so a path handed out by
+# `get` stays readable while another worker trims the cache.
+EVICTION_GRACE_SECONDS = 60
+# Spared entries may only take the cache this share of its budget over it.
+# Past that, they are evicted oldest first like any other entry, so a burst
+# of downloads cannot grow the cache without limit.
+EVICTION_GRACE_OVERSHOOT = 0.5
+
+
+class VideoCache:
+    """
+    A persistent on-disk cache of downloaded videos with a byte budget and
+    least-recently-used eviction.
+
+    Entries are stored under the SHA-256 of their key, written to a temporary
+    file first and atomically renamed into place, so concurrent workers never
+    observe a partially written video. The modification time of each entry is
+    bumped on every hit and acts as the LRU clock.
+
+    Entries used within `EVICTION_GRACE_SECONDS` are spared while the cache
+    stays within `EVICTION_GRACE_OVERSHOOT` of its budget, so the cache holds
+    at most 1.5 times its budget, or a single video larger than that.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> Path:
+        """
+        The directory holding the cached videos.
+        """
+        return self._directory
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the cache has a non-zero byte budget.
+        """
+        return self._max_bytes > 0
+
+    def _path_for(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._directory / f"{digest}.mp4"
+
+    def get(self, key: str) -> Path | None:
+        """
+        Looks up a cached video and marks it as recently used.
+
+        Args:
+            key: The cache key, e.g. a tweet or media id.
+
+        Returns:
+            The path of the cached video, or None on a miss.
+        """
+        path = self._path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug("Video cache hit for %s", key)
+        return path
+
+    def put(self, key: str, source: Path) -> Path:
+        """
+        Moves a downloaded video into the cache and evicts old entries if the
+        byte budget is exceeded.
+
+        Args:
+            key: The cache key, e.g. a tweet or media id.
+            source: The path of the downloaded video. It is moved, not copied,
+                when it lives on the same filesystem as the cache.
+
+        Returns:
+            The path of the cached video.
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path_for(key)
+
+        fd, tmp_name = tempfile.mkstemp(dir=self._directory, suffix=".part")
+        os.close(fd)
+        try:
+            shutil.move(source, tmp_name)
+            # Downloads may carry the server's modification time, so the
+            # entry is stamped as just used before it becomes visible.
+            os.utime(tmp_name)
+            Path(tmp_name).replace(path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        logger.debug("Cached video for %s at %s", key, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        Deletes the least recently used entries until the cache fits its byte
+        budget. Recently used entries are only deleted while the cache is
+        more than `EVICTION_GRACE_OVERSHOOT` over it.
+
+        Args:
+            keep: An entry that is never deleted, e.g. the one just stored.
+
+        Returns:
+            The number of bytes freed.
+        """
+        entries = []
+        for path in self._directory.glob("*.mp4"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self._max_bytes:
+            return 0
+
+        freed = 0
+        grace_cutoff = time.time() - EVICTION_GRACE_SECONDS
+        grace_max_bytes = self._max_bytes * (1 + EVICTION_GRACE_OVERSHOOT)
+        for mtime, size, path in sorted(entries):
+            remaining = total_bytes - freed
+            in_grace = mtime > grace_cutoff
+            if remaining <= self._max_bytes or (
+                in_grace and remaining <= grace_max_bytes
+            ):
+                break
+            if path == keep:
+                continue
+            if in_grace:
+                logger.warning(
+                    "Evicting %s although it was just used, the video cache is"
+                    " %d bytes over its budget.",
+                    path.name,
+                    remaining - self._max_bytes,
+                )
+            path.unlink(missing_ok=True)
+            freed += size
+
+        logger.info("Evicted %d bytes from the video cache.", freed)
+        return freed
+
+
+@lru_cache
+def get_video_cache() -> VideoCache:
+    """
+    Returns the process-wide video cache.
+    """
+    return VideoCache(
+        directory=settings.video_cache_dir,
+        max_bytes=settings.video_cache_max_bytes,
+    )
@@ -0,0 +1,173 @@
+import logging
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.schemas import ClipFindings
+from src.vision.sampling import SampledFrame
+
+logger = logging.getLogger(__name__)
+
+# Findings whose intersection over union reaches this value are the same clip.
+_DUPLICATE_IOU = 0.5
+# Findings lying this much inside another one describe the same clip.
+_DUPLICATE_CONTAINMENT = 0.8
+
+
+class FrameWindow(BaseModel):
+    """
+    A contiguous time window of a video and the frames that fall inside it.
+    """
+
+    start_s: float = Field(..., ge=0)
+    end_s: float = Field(..., ge=0)
+    frames: list[SampledFrame] = Field(default_factory=list)
+
+
+class WindowFindings(BaseModel):
+    """
+    The findings returned by the vision model for a single window.
+    """
+
+    window: FrameWindow
+    findings: list[ClipFindings] = Field(default_factory=list)
+
+
+def split_windows(
+    frames: list[SampledFrame],
+    window_seconds: float,
+    overlap_seconds: float,
+) -> list[FrameWindow]:
+    """
+    Splits frames into overlapping time windows of `window_seconds`.
+
+    Consecutive windows share `overlap_seconds`, so a clip that straddles a
+    boundary is fully visible in at least one window whenever it is shorter
+    than the overlap.
+
+    Args:
+        frames: The sampled frames in presentation order.
+        window_seconds: The length of each window.
+        overlap_seconds: The time shared by consecutive windows.
+
+    Returns:
+        The non-empty windows in order.
+    """
+    if not frames:
+        return []
+
+    step_s = max(window_seconds - overlap_seconds, window_seconds / 2)
+    last_s = frames[-1].timestamp_s
+    windows: list[FrameWindow] = []
+    start_s = 0.0
+    while True:
+        end_s = start_s + window_seconds
+        window_frames = [f for f in frames if start_s <= f.timestamp_s < end_s]
+        if window_frames:
+            windows.append(
+                FrameWindow(start_s=start_s, end_s=end_s, frames=window_frames),
+            )
+        if end_s > last_s:
+            return windows
+        start_s += step_s
+
+
+def _is_duplicate(a: ClipFindings, b: ClipFindings) -> bool:
+    """
+    Whether two findings describe the same span, either because they mostly
+    overlap or because one lies almost entirely inside the other.
+    """
+    intersection = min(a.end_time_s, b.end_time_s) - max(a.start_time_s, b.start_time_s)
+    if intersection <= 0:
+        return False
+    union = max(a.end_time_s, b.end_time_s) - min(a.start_time_s, b.start_time_s)
+    shortest = min(a.end_time_s - a.start_time_s, b.end_time_s - b.start_time_s)
+    return (
+        intersection / union >= _DUPLICATE_IOU
+        or intersection / max(shortest, 1e-9) >= _DUPLICATE_CONTAINMENT
+    )
+
+
+def _is_cut(
+    earlier: tuple[ClipFindings, FrameWindow],
+    later: tuple[ClipFindings, FrameWindow],
+    edge_tolerance_seconds: float,
+) -> bool:
+    """
+    Whether two findings are the halves of one clip cut by a window boundary:
+    the first runs into the end of an earlier window and the second starts at
+    the beginning of a later one, touching or overlapping the first.
+    """
+    (first, first_window), (second, second_window) = earlier, later
+    return (
+        first_window.start_s < second_window.start_s
+        and first.end_time_s >= first_window.end_s - edge_tolerance_seconds
+        and second.start_time_s <= second_window.start_s + edge_tolerance_seconds
+        and second.start_time_s <= first.end_time_s + edge_tolerance_seconds
+        and second.end_time_s > first.end_time_s
+    )
+
+
+def merge_window_findings(
+    results: list[WindowFindings],
+    edge_tolerance_seconds: float,
+) -> list[ClipFindings]:
+    """
+    Merges the findings of overlapping windows into a single list.
+
+    A finding that runs into the end of its window is stitched to a finding
+    of a later window that starts at that window's beginning and overlaps or
+    touches it, since both are parts of one clip cut by the boundary. Findings
+    of different windows that otherwise describe the same span are
+    deduplicated, keeping the most confident one. Findings of a single window
+    are always kept apart.
+
+    Args:
+        results: The findings of each analyzed window.
+        edge_tolerance_seconds: How close to a window edge a finding must be
+            to count as cut by it, usually the frame interval.
+
+    Returns:
+        The merged findings, sorted by start time.
+    """
+    tagged = sorted(
+        ((finding, result.window) for result in results for finding in result.findings),
+        key=lambda item: (item[0].start_time_s, item[0].end_time_s),
+    )
+
+    merged: list[tuple[ClipFindings, FrameWindow]] = []
+    for item in tagged:
+        finding, window = item
+        for index, kept_item in enumerate(merged):
+            kept, kept_window = kept_item
+            if kept_window is window:
+                continue
+            pair = None
+            if _is_cut(kept_item, item, edge_tolerance_seconds):
+                pair = (kept_item, item)
+            elif _is_cut(item, kept_item, edge_tolerance_seconds):
+                pair = (item, kept_item)
+            if pair:
+                (first, _), (second, second_window) = pair
+                stitched = ClipFindings(
+                    start_time_s=first.start_time_s,
+                    end_time_s=second.end_time_s,
+                    confidence=max(first.confidence, second.confidence),
+                    reason=f"{first.reason} {second.reason}",
+                )
+                merged[index] = (stitched, second_window)
+                break
+            if _is_duplicate(kept, finding):
+                if finding.confidence > kept.confidence:
+                    merged[index] = item
+                break
+        else:
+            merged.append(item)
+
+    logger.info(
+        "Merged %d window findings into %d clips.",
+        len(tagged),
+        len(merged),
+    )
+    merged.sort(key=lambda item: item[0].start_time_s)
+    return [finding for finding, _ in merged]
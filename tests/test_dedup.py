@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+
+from src.vision.dedup import dedupe_frames
+from src.vision.dedup import is_same_media
+from src.vision.dedup import media_fingerprint
+from src.vision.sampling import SampledFrame
+
+
+def _frame(timestamp_s, value, *, pattern=False):
+    image = np.full((160, 160, 3), value, dtype=np.uint8)
+    if pattern:
+        image[::20] = 255 - value
+    _, buffer = cv2.imencode(".jpg", image)
+    return SampledFrame(timestamp_s=timestamp_s, image=buffer.tobytes())
+
+
+def test_dedupe_frames_drops_near_duplicates():
+    """
+    Ensures runs of identical frames collapse to their first frame while
+    distinct frames keep their original timestamps.
+    """
+    frames = [
+        _frame(0, 40),
+        _frame(2, 40),
+        _frame(4, 41),
+        _frame(6, 200, pattern=True),
+        _frame(8, 200, pattern=True),
+    ]
+
+    kept = dedupe_frames(frames, max_gap_seconds=10)
+
+    assert [f.timestamp_s for f in kept] == [0, 6]
+
+
+def test_dedupe_frames_keeps_anchor_after_max_gap():
+    """
+    Ensures a static shot still yields a frame every `max_gap_seconds`.
+    """
+    frames = [_frame(t, 40) for t in range(0, 14, 2)]
+
+    kept = dedupe_frames(frames, max_gap_seconds=5)
+
+    assert [f.timestamp_s for f in kept] == [0, 6, 12]
+
+
+def test_media_fingerprint_matches_reencoded_copies():
+    """
+    Ensures copies of a video encoded at another quality match, other videos
+    do not, and a uniform intro yields no fingerprint.
+    """
+
+    def reencode(frame, quality):
+        image = cv2.imdecode(np.frombuffer(frame.image, np.uint8), cv2.IMREAD_COLOR)
+        _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return SampledFrame(timestamp_s=frame.timestamp_s, image=buffer.tobytes())
+
+    def scene(seed):
+        rng = np.random.default_rng(seed)
+        image = cv2.resize(
+            rng.integers(0, 255, (8, 8, 3), dtype=np.uint8),
+            (160, 160),
+            interpolation=cv2.INTER_LINEAR,
+        )
+        _, buffer = cv2.imencode(".jpg", image)
+        return SampledFrame(timestamp_s=seed, image=buffer.tobytes())
+
+    frames = [scene(t) for t in range(5)]
+    copy = [reencode(f, 70) for f in frames]
+
+    fingerprint = media_fingerprint(frames)
+    assert fingerprint is not None
+    assert is_same_media(media_fingerprint(copy), fingerprint)
+    assert not is_same_media(media_fingerprint(frames[1:] + frames[:1]), fingerprint)
+    assert media_fingerprint([_frame(t, 0) for t in range(5)]) is None
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.schemas import Candidate
+from src.schemas import VideoVariant
+from src.vision.download import download_to_cache
+from src.vision.download import fetch_video_url
+from src.vision.download import select_analysis_url
+from src.vision.download import video_cache_key
+
+_PAYLOAD = bytes(range(256)) * 4096
+
+
+class _FlakyRangeHandler(BaseHTTPRequestHandler):
+    """
+    Serves `_PAYLOAD` with range support, dropping the connection halfway
+    through the responses listed in `truncated`. Range requests can be
+    answered with the whole file, or with a range starting `range_skew`
+    bytes before the requested offset.
+    """
+
+    requests: list[str | None] = []
+    truncated: set[int] = {0}
+    ignore_range = False
+    range_skew = 0
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        start = (
+            int(range_header.removeprefix("bytes=").rstrip("-")) if range_header else 0
+        )
+        if self.ignore_range:
+            start = 0
+        elif range_header:
+            start -= self.range_skew
+        body = _PAYLOAD[start:]
+        if range_header and not self.ignore_range:
+            self.send_response(206)
+            self.send_header(
+                "Content-Range",
+                f"bytes {start}-{len(_PAYLOAD) - 1}/{len(_PAYLOAD)}",
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if len(self.requests) - 1 in self.truncated:
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    _FlakyRangeHandler.requests = []
+    _FlakyRangeHandler.truncated = {0}
+    _FlakyRangeHandler.ignore_range = False
+    _FlakyRangeHandler.range_skew = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyRangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/vid/clip.mp4"
+    server.shutdown()
+
+
+def test_fetch_video_url_resumes_interrupted_download(flaky_server, tmp_path):
+    """
+    Ensures a transfer cut halfway is resumed with a range request for the
+    missing bytes rather than restarted.
+    """
+    progress = []
+    with httpx.Client() as client:
+        video_path = fetch_video_url(
+            flaky_server,
+            tmp_path,
+            progress_hooks=[lambda status: progress.append(status["downloaded_bytes"])],
+            client=client,
+        )
+
+    assert video_path == tmp_path / "clip.mp4"
+    assert video_path.read_bytes() == _PAYLOAD
+    assert _FlakyRangeHandler.requests == [None, f"bytes={len(_PAYLOAD) // 2}-"]
+    assert progress[-1] == len(_PAYLOAD)
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_fetch_video_url_restarts_on_misplaced_range(flaky_server, tmp_path):
+    """
+    Ensures a partial response starting before the requested offset is
+    discarded and the video fetched again from the start, rather than
+    written over the beginning of the file.
+    """
+    _FlakyRangeHandler.range_skew = 1000
+    with httpx.Client() as client:
+        video_path = fetch_video_url(flaky_server, tmp_path, client=client)
+
+    assert video_path.read_bytes() == _PAYLOAD
+    assert _FlakyRangeHandler.requests == [None, f"bytes={len(_PAYLOAD) // 2}-", None]
+
+
+def test_fetch_video_url_reads_full_response_to_range(flaky_server, tmp_path):
+    """
+    Ensures a server answering a range request with the whole file is read
+    from the start, with its content length kept as the expected size so a
+    truncated transfer is still noticed.
+    """
+    _FlakyRangeHandler.ignore_range = True
+    totals = []
+    with httpx.Client() as client:
+        video_path = fetch_video_url(
+            flaky_server,
+            tmp_path,
+            progress_hooks=[lambda status: totals.append(status["total_bytes"])],
+            client=client,
+        )
+
+    assert video_path.read_bytes() == _PAYLOAD
+    assert _FlakyRangeHandler.requests == [None, f"bytes={len(_PAYLOAD) // 2}-"]
+    assert totals[-1] == len(_PAYLOAD)
+
+
+def _variant(width, height, bitrate):
+    return VideoVariant(
+        url=f"https://video.twimg.com/vid/avc1/{width}x{height}/v.mp4",
+        bitrate=bitrate,
+        width=width,
+        height=height,
+    )
+
+
+@pytest.mark.parametrize(
+    ("resolution", "expected"),
+    [
+        (360, "640x360"),
+        (400, "1280x720"),
+        (2000, "1920x1080"),
+        (None, "best"),
+    ],
+)
+def test_select_analysis_url_picks_smallest_sufficient_variant(
+    mocker,
+    resolution,
+    expected,
+):
+    """
+    Ensures the smallest variant meeting the analysis resolution is chosen,
+    the largest one when none is enough, and the best stream when unset.
+    """
+    mocker.patch(
+        "src.vision.download.settings.vision_analysis_resolution",
+        new=resolution,
+    )
+    candidate = Candidate(
+        tweet_url="https://x.com/user/status/1",
+        best_video_url="https://video.twimg.com/best.mp4",
+        video_variants=[
+            _variant(1920, 1080, 10_368_000),
+            _variant(480, 270, 288_000),
+            _variant(1280, 720, 2_176_000),
+            _variant(640, 360, 832_000),
+        ],
+        text="test",
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+    assert expected in select_analysis_url(candidate)
+
+
+def test_video_cache_key_follows_selected_variant(mocker):
+    """
+    Ensures a video is cached per selected variant, so changing the analysis
+    resolution does not reuse a download of another size.
+    """
+    mocker.patch(
+        "src.vision.download.settings.vision_analysis_resolution",
+        new=360,
+    )
+    candidate = Candidate(
+        tweet_url="https://x.com/user/status/1",
+        best_video_url="https://video.twimg.com/best.mp4",
+        video_variants=[_variant(640, 360, 832_000), _variant(1280, 720, 2_176_000)],
+        text="test",
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+    assert video_cache_key(candidate) == "1:640x360"
+    mocker.patch(
+        "src.vision.download.settings.vision_analysis_resolution",
+        new=720,
+    )
+    assert video_cache_key(candidate) == "1:1280x720"
+    mocker.patch(
+        "src.vision.download.settings.vision_analysis_resolution",
+        new=None,
+    )
+    assert video_cache_key(candidate) == "1:/best.mp4"
+
+
+@pytest.mark.asyncio
+async def test_download_to_cache_stops_thread_before_cleanup_on_cancel(mocker):
+    """
+    Ensures cancelling a download aborts the transfer on its thread and only
+    removes the temporary directory once the thread has returned.
+    """
+    started = threading.Event()
+    output_dirs = []
+    dir_existed_on_return = []
+
+    def slow_fetch(url, output_dir, progress_hooks=None):
+        output_dirs.append(output_dir)
+        started.set()
+        part_path = output_dir / "clip.mp4.part"
+        try:
+            while True:
+                time.sleep(0.01)
+                with part_path.open("ab") as file:
+                    file.write(b"x")
+                for hook in progress_hooks:
+                    hook({"downloaded_bytes": part_path.stat().st_size})
+        finally:
+            dir_existed_on_return.append(output_dir.exists())
+
+    mocker.patch("src.vision.download.fetch_video_url", side_effect=slow_fetch)
+    mocker.patch("src.vision.download.get_video_cache").return_value.enabled = False
+    candidate = Candidate(
+        tweet_url="https://x.com/user/status/1",
+        best_video_url="https://video.twimg.com/best.mp4",
+        text="test",
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+    task = asyncio.create_task(download_to_cache(candidate))
+    await asyncio.to_thread(started.wait)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert dir_existed_on_return == [True]
+    assert not output_dirs[0].exists()
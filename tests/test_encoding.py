@@ -0,0 +1,69 @@
+# ruff: noqa: PLR2004
+import cv2
+import numpy as np
+
+from src.vision.encoding import FrameBudget
+from src.vision.encoding import estimate_image_tokens
+from src.vision.encoding import fit_frames_to_budget
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import encode_frame
+
+
+def _frames(count, width=1280, height=720, quality=80):
+    rng = np.random.default_rng(0)
+    frame_format = FrameFormat(max_edge=width, jpeg_quality=quality)
+    return [
+        encode_frame(
+            rng.integers(0, 255, (height, width, 3), dtype=np.uint8),
+            float(index),
+            frame_format,
+        )
+        for index in range(count)
+    ]
+
+
+def test_estimate_image_tokens():
+    """
+    Ensures small images cost one tile and larger ones are tiled.
+    """
+    assert estimate_image_tokens(384, 216) == 258
+    assert estimate_image_tokens(768, 432) == 258
+    assert estimate_image_tokens(1920, 1080) == 6 * 258
+
+
+def test_fit_frames_to_budget_passes_through_frames_that_fit():
+    """
+    Ensures frames within the budget are not re-encoded.
+    """
+    frames = _frames(2)
+    budget = FrameBudget(max_edge=1280, jpeg_quality=80)
+
+    fitted, encoding = fit_frames_to_budget(frames, budget, "single")
+
+    assert fitted == frames
+    assert (encoding.max_edge, encoding.jpeg_quality) == (1280, 80)
+    assert encoding.estimated_tokens == 2 * 2 * 258
+
+
+def test_fit_frames_to_budget_shrinks_to_fit():
+    """
+    Ensures frames are scaled and re-encoded until the payload and token
+    limits are met, and that the applied encoding is recorded.
+    """
+    frames = _frames(3)
+    budget = FrameBudget(
+        max_edge=1280,
+        jpeg_quality=80,
+        max_payload_bytes=200_000,
+        max_image_tokens=3 * 258,
+    )
+
+    fitted, encoding = fit_frames_to_budget(frames, budget, "fine")
+
+    assert encoding.stage == "fine"
+    assert encoding.payload_bytes <= 200_000
+    assert encoding.estimated_tokens <= 3 * 258
+    assert all(max(f.width, f.height) <= encoding.max_edge for f in fitted)
+    assert [f.timestamp_s for f in fitted] == [0.0, 1.0, 2.0]
+    decoded = cv2.imdecode(np.frombuffer(fitted[0].image, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape[1] == fitted[0].width
@@ -3,6 +3,7 @@ import pytest
 from src.graph import GraphState
 from src.graph import decide_after_filter
 from src.graph import decide_after_vision
+from src.graph import filter_node
 from src.schemas import Candidate
 from src.schemas import VisionResult
 
@@ -82,3 +83,55 @@ async def test_decide_after_vision():
     )
     decision = await decide_after_vision(state_without_results)
     assert decision == "end"
+
+
+async def test_filter_node_sends_only_ambiguous_candidates_to_llm(mocker):
+    """
+    Ensures the local prefilter drops clear misses and keeps strong matches
+    without the LLM, merges the LLM's picks back in scraped order, and only
+    prefetches the videos it did not reject.
+    """
+    mocker.patch("src.graph.settings.vision_prefetch_count", new=2)
+    prefetcher = mocker.patch("src.graph.VideoPrefetcher").return_value
+    mocker.patch("src.graph.settings.text_prefilter", new=True)
+    candidates = [
+        Candidate(
+            tweet_url=f"https://x.com/user/status/{i}",
+            text=text,
+            author="test",
+            created_at="Sun Oct 05 12:00:00 +0000 2025",
+        )
+        for i, text in enumerate(
+            [
+                "Trump at the rally",
+                "Cute cat video",
+                "Trump talking about Charlie Kirk",
+            ],
+        )
+    ]
+    llm_filter = mocker.patch(
+        "src.graph.filter_candidates_by_text",
+        side_effect=lambda candidates, **_: candidates,
+    )
+    state = GraphState(
+        description="Trump talking about Charlie Kirk",
+        duration_seconds=0,
+        max_candidates=0,
+        candidates=candidates,
+        filtered_candidates=[],
+        vision_results=[],
+        final_result=None,
+        trace_info={},
+    )
+
+    update = await filter_node(state)
+
+    assert llm_filter.call_args.kwargs["candidates"] == [candidates[0]]
+    assert [c.tweet_url.path for c in update["filtered_candidates"]] == [
+        "/user/status/0",
+        "/user/status/2",
+    ]
+    assert state["trace_info"]["prefilter_accepted"] == 1
+    assert state["trace_info"]["prefilter_rejected"] == 1
+    prefetcher.start.assert_called_once_with([candidates[0], candidates[2]])
+    assert update["prefetcher"] is prefetcher
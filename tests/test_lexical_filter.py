@@ -0,0 +1,72 @@
+# ruff: noqa: PLR2004
+from src.filters.lexical_filter import prefilter_candidates
+from src.filters.lexical_filter import score_texts
+from src.schemas import Candidate
+
+DESCRIPTION = "Trump talking about Charlie Kirk"
+
+
+def _candidate(tweet_id, text):
+    return Candidate(
+        tweet_url=f"https://x.com/user/status/{tweet_id}",
+        text=text,
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+
+def test_score_texts_ranks_by_keyword_and_name_overlap():
+    """
+    Ensures texts with no keyword of the description score 0, and that
+    matching the names as phrases and more keywords scores higher.
+    """
+    scores = score_texts(
+        [
+            "Cute cat video",
+            "Kirk talks to Charlie about Trump",
+            "Trump talks about Charlie Kirk at the rally",
+            "#Trump talking about Charlie Kirk",
+        ],
+        DESCRIPTION,
+    )
+
+    assert scores[0] == 0
+    assert 0 < scores[1] < scores[2] <= scores[3] <= 1
+
+
+def test_score_texts_without_keywords():
+    """
+    Ensures a description made only of stopwords scores every text 0.
+    """
+    assert score_texts(["Trump"], "the of and").tolist() == [0.0]
+    assert score_texts([], DESCRIPTION).tolist() == []
+
+
+def test_prefilter_candidates_splits_by_score():
+    """
+    Ensures clear misses are rejected, strong matches are accepted with their
+    local score, and the rest are left to the LLM in their original order.
+    """
+    candidates = [
+        _candidate(1, "Cute cat video"),
+        _candidate(2, "Trump talking about Charlie Kirk"),
+        _candidate(3, "Trump at the rally"),
+        _candidate(4, "Kirk speaks"),
+    ]
+
+    result = prefilter_candidates(
+        candidates,
+        DESCRIPTION,
+        reject_below=0.05,
+        accept_above=0.9,
+    )
+
+    assert [c.tweet_url.path for c in result.rejected] == ["/user/status/1"]
+    assert [c.tweet_url.path for c in result.accepted] == ["/user/status/2"]
+    assert result.accepted[0].lexical_score >= 0.9
+    assert result.accepted[0].text_score is None
+    assert [c.tweet_url.path for c in result.ambiguous] == [
+        "/user/status/3",
+        "/user/status/4",
+    ]
+    assert all(c.text_score is None for c in result.ambiguous)
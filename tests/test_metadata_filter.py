@@ -0,0 +1,36 @@
+from src.filters.metadata_filter import prune_candidates
+from src.schemas import Candidate
+
+
+def _candidate(tweet_id, duration_seconds, view_count=None):
+    return Candidate(
+        tweet_url=f"https://x.com/user/status/{tweet_id}",
+        text="test",
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+        duration_seconds=duration_seconds,
+        view_count=view_count,
+        width=1280,
+        height=720,
+    )
+
+
+def test_prune_candidates_drops_short_videos_and_ranks_by_views():
+    """
+    Ensures videos shorter than the target clip are dropped, videos of
+    unknown duration are kept, and the rest are ordered by view count.
+    """
+    candidates = [
+        _candidate(1, 45.0, view_count=100),
+        _candidate(2, 6.0, view_count=90_000),
+        _candidate(3, None, view_count=None),
+        _candidate(4, 30.0, view_count=5_000),
+    ]
+
+    pruned = prune_candidates(candidates, duration_seconds=30)
+
+    assert [c.tweet_url.path for c in pruned] == [
+        "/user/status/4",
+        "/user/status/1",
+        "/user/status/3",
+    ]
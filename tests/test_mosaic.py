@@ -0,0 +1,56 @@
+# ruff: noqa: PLR2004
+import cv2
+import numpy as np
+
+from src.vision.mosaic import MosaicLayout
+from src.vision.mosaic import build_mosaics
+from src.vision.mosaic import compose_mosaic
+from src.vision.sampling import SampledFrame
+
+
+def _frame(timestamp_s, value):
+    image = np.full((90, 160, 3), value, dtype=np.uint8)
+    _, buffer = cv2.imencode(".jpg", image)
+    return SampledFrame(
+        timestamp_s=timestamp_s,
+        image=buffer.tobytes(),
+        width=160,
+        height=90,
+    )
+
+
+def test_compose_mosaic_tiles_frames_in_reading_order():
+    """
+    Ensures frames are laid out left to right, top to bottom, and the mosaic
+    keeps the timestamp of its first frame.
+    """
+    layout = MosaicLayout(columns=2, rows=2, tile_edge=64)
+    frames = [_frame(t, v) for t, v in ((4, 0), (6, 80), (8, 160), (10, 240))]
+
+    mosaic = compose_mosaic(frames, layout)
+
+    assert mosaic is not None
+    assert mosaic.timestamp_s == 4
+    assert (mosaic.width, mosaic.height) == (128, 72)
+    image = cv2.imdecode(np.frombuffer(mosaic.image, np.uint8), cv2.IMREAD_GRAYSCALE)
+    # Sample the bottom-right corner of every tile, away from the burned label.
+    corners = [image[y, x] for y in (30, 66) for x in (60, 124)]
+    assert corners == sorted(corners)
+
+
+def test_build_mosaics_handles_partial_last_grid():
+    """
+    Ensures a trailing chunk smaller than the grid only uses the rows it needs
+    and undecodable chunks stay aligned as None.
+    """
+    layout = MosaicLayout(columns=3, rows=3, tile_edge=96)
+    broken = SampledFrame(timestamp_s=30, image=b"not a jpeg")
+    chunks = [[_frame(t, 100) for t in range(9)], [_frame(9, 100)], [broken]]
+
+    mosaics = build_mosaics(chunks, layout)
+
+    assert mosaics[0] is not None
+    assert (mosaics[0].width, mosaics[0].height) == (288, 162)
+    assert mosaics[1] is not None
+    assert (mosaics[1].timestamp_s, mosaics[1].width, mosaics[1].height) == (9, 96, 54)
+    assert mosaics[2] is None
@@ -0,0 +1,170 @@
+# ruff: noqa: PLR2004
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.vision.extraction import FrameExtractionService
+from src.vision.pipeline import Completed
+from src.vision.pipeline import PipelineStage
+from src.vision.pipeline import StagedPipeline
+from src.vision.sampling import SampledFrame
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_pipeline_bounds_items_in_flight():
+    """
+    Ensures a slow stage pauses the stages before it, so the number of items
+    held between the first and last stage never exceeds the queue and worker
+    capacity, and that queue depths are reported.
+    """
+    in_flight = 0
+    peak = 0
+
+    async def start(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        return item
+
+    async def slow(item):
+        nonlocal in_flight
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return item * 2
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage(name="start", handler=start, concurrency=4),
+            PipelineStage(name="slow", handler=slow, concurrency=1),
+        ],
+        queue_size=2,
+    )
+    outputs = await pipeline.run(range(50))
+
+    assert sorted(outputs) == [i * 2 for i in range(50)]
+    # One item in the slow worker, two queued and one waiting in each start
+    # worker for room in the queue.
+    assert peak <= 1 + 2 + 4
+    start_metrics, slow_metrics = pipeline.metrics
+    assert start_metrics.processed == slow_metrics.processed == 50
+    assert slow_metrics.max_queue_depth == 2
+    assert slow_metrics.blocked_seconds > 0
+
+
+async def test_pipeline_drops_failures_and_skips_completed_items():
+    """
+    Ensures items that fail or return None are dropped, and `Completed`
+    outputs bypass the remaining stages.
+    """
+    seen_by_last = []
+
+    async def first(item):
+        if item == 0:
+            return None
+        if item == 1:
+            message = "boom"
+            raise RuntimeError(message)
+        if item == 2:
+            return Completed(value="cached")
+        return item
+
+    async def last(item):
+        seen_by_last.append(item)
+        return f"analyzed {item}"
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage(name="first", handler=first, concurrency=2),
+            PipelineStage(name="last", handler=last, concurrency=2),
+        ],
+    )
+    outputs = await pipeline.run(range(4))
+
+    assert sorted(outputs) == ["analyzed 3", "cached"]
+    assert seen_by_last == [3]
+    assert pipeline.metrics[0].dropped == 2
+    assert pipeline.metrics[0].processed == 2
+
+
+async def test_pipeline_stops_early_and_records_abandoned_items():
+    """
+    Ensures an output satisfying `stop_when` cancels the items in flight,
+    skips the ones not yet started and keeps the outputs gathered so far.
+    """
+    second_started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def fetch(item):
+        return item
+
+    async def analyze(item):
+        if item == 0:
+            await second_started.wait()
+            return item
+        second_started.set()
+        await release.wait()
+        return item
+
+    pipeline = StagedPipeline(
+        [
+            PipelineStage(name="fetch", handler=fetch, concurrency=1),
+            PipelineStage(name="analyze", handler=analyze, concurrency=2),
+        ],
+        queue_size=1,
+    )
+    outputs = await pipeline.run(range(10), stop_when=lambda output: output == 0)
+
+    assert outputs == [0]
+    abandoned = {entry.item: entry for entry in pipeline.cancelled}
+    assert sorted(abandoned) == list(range(1, 10))
+    assert abandoned[1].stage == "analyze"
+    assert abandoned[1].started
+    assert abandoned[9].stage == "fetch"
+    assert not abandoned[9].started
+    assert sum(m.cancelled for m in pipeline.metrics) == 9
+
+
+async def test_pipeline_halt_cancels_streaming_job_mid_frame(mocker):
+    """
+    Ensures a good-enough halt that lands while a frame stream is decoding on
+    its worker thread stops the stream, closes it once the frame returns and
+    ends the run instead of leaving the worker waiting for more items.
+    """
+    decoding = threading.Event()
+    closed = threading.Event()
+
+    def fake_iter_frames(url, interval_seconds, frame_format=None, stop=None):
+        try:
+            yield SampledFrame(timestamp_s=0, image=b"first")
+            decoding.set()
+            # Stays inside the generator until the consumer asks it to stop.
+            deadline = time.monotonic() + 2
+            while not (stop and stop.is_set()) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            yield SampledFrame(timestamp_s=2, image=b"late")
+        finally:
+            closed.set()
+
+    mocker.patch("src.vision.extraction.iter_frames", side_effect=fake_iter_frames)
+    service = FrameExtractionService(max_workers=1)
+
+    async def analyze(item):
+        if item == "match":
+            await asyncio.to_thread(decoding.wait)
+            return item
+        return [frame async for frame in service.stream("https://video.com/a.mp4")]
+
+    pipeline = StagedPipeline(
+        [PipelineStage(name="analyze", handler=analyze, concurrency=2)],
+    )
+    outputs = await asyncio.wait_for(
+        pipeline.run(["stream", "match"], stop_when=lambda output: output == "match"),
+        timeout=5,
+    )
+
+    assert outputs == ["match"]
+    assert closed.is_set()
+    assert [entry.item for entry in pipeline.cancelled] == ["stream"]
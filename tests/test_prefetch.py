@@ -0,0 +1,59 @@
+# ruff: noqa: PLR2004
+import asyncio
+from pathlib import Path
+
+import pytest
+from yt_dlp.utils import DownloadCancelled
+
+from src.schemas import Candidate
+from src.vision.prefetch import VideoPrefetcher
+
+pytestmark = pytest.mark.asyncio
+
+
+def _candidate(tweet_id):
+    return Candidate(
+        tweet_url=f"https://x.com/user/status/{tweet_id}",
+        text="test",
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+
+async def _fake_download(candidate, progress_hooks):
+    """
+    Reports 1000 bytes per chunk until ten chunks are fetched or a hook
+    cancels the download.
+    """
+    name = candidate.tweet_url.path
+    try:
+        for chunk in range(1, 11):
+            await asyncio.sleep(0.01)
+            for hook in progress_hooks:
+                hook({"filename": name, "downloaded_bytes": chunk * 1000})
+    except DownloadCancelled:
+        return None, None
+    return Path(name), None
+
+
+async def test_prefetcher_adopts_kept_and_cancels_dropped_downloads(mocker):
+    """
+    Ensures kept candidates are handed over as prefetch hits while the
+    downloads of dropped candidates stop early and count as wasted bytes.
+    """
+    mocker.patch("src.vision.prefetch.download_to_cache", side_effect=_fake_download)
+    mocker.patch("src.vision.prefetch.get_video_cache").return_value.enabled = False
+    kept, dropped = _candidate(1), _candidate(2)
+
+    prefetcher = VideoPrefetcher()
+    prefetcher.start([kept, dropped])
+    await asyncio.sleep(0.025)
+    prefetcher.retain([kept])
+
+    assert await prefetcher.adopt(kept) == (Path("/user/status/1"), None)
+    assert await prefetcher.adopt(_candidate(3)) is None
+    await prefetcher.close()
+
+    assert prefetcher.started == 2
+    assert prefetcher.hits == 1
+    assert 0 < prefetcher.wasted_bytes < 10_000
@@ -0,0 +1,32 @@
+from src.scraper.queries import expand_query
+from src.scraper.queries import extract_entities
+
+
+def test_extract_entities_finds_names():
+    """
+    Ensures runs of capitalized words are found as names, without the
+    capitalized stopwords around them.
+    """
+    assert extract_entities("The speech of Trump about Charlie Kirk") == [
+        "Trump",
+        "Charlie Kirk",
+    ]
+
+
+def test_expand_query_derives_distinct_video_queries():
+    """
+    Ensures the description is expanded into keyword, quoted-name and video
+    filter variants, most literal first and capped at the limit.
+    """
+    queries = expand_query("Trump talking about Charlie Kirk", limit=4)
+
+    assert queries == [
+        "Trump talking about Charlie Kirk filter:videos",
+        'Trump "Charlie Kirk" filter:native_video',
+        "Trump talking Charlie Kirk filter:videos",
+        '"Charlie Kirk" filter:videos',
+    ]
+    assert expand_query("cat video", limit=4) == [
+        "cat video filter:videos",
+        "cat video filter:native_video",
+    ]
@@ -0,0 +1,72 @@
+import pytest
+
+from src.scraper.rate_limit import AccountRateLimit
+from src.scraper.rate_limit import RateLimitPolicy
+from src.scraper.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_a_burst_then_paces_requests():
+    """
+    Ensures a full bucket serves a burst at once and later requests wait
+    for the bucket to refill.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+
+    for _ in range(2):
+        assert bucket.delay() == 0
+        bucket.take()
+    assert bucket.delay() == pytest.approx(2)
+
+    clock.now += 1
+    assert bucket.delay() == pytest.approx(1)
+    clock.now += 10
+    assert bucket.delay() == 0
+
+
+def test_account_rate_limit_waits_for_the_reported_reset():
+    """
+    Ensures an exhausted account waits until the reset time reported by the
+    server, or a full window when none was reported.
+    """
+    clock = FakeClock()
+    limit = AccountRateLimit(RateLimitPolicy(window_seconds=900), clock=clock)
+    assert limit.ready_in() == 0
+
+    limit.exhaust(clock.now + 60)
+    assert limit.ready_in() == pytest.approx(60)
+
+    clock.now += 60
+    limit.exhaust(None)
+    assert limit.ready_in() == pytest.approx(900)
+
+
+def test_account_rate_limit_resumes_from_its_state_file(tmp_path):
+    """
+    Ensures a new process resumes the pacing and the reported reset of an
+    account from its state file, and ignores an unreadable one.
+    """
+    clock = FakeClock()
+    policy = RateLimitPolicy(requests_per_window=1, window_seconds=10, burst=1)
+    state_file = tmp_path / "cookies.rate_limit.json"
+    limit = AccountRateLimit(policy, clock=clock, state_file=state_file)
+    limit.take()
+
+    resumed = AccountRateLimit(policy, clock=clock, state_file=state_file)
+    assert resumed.ready_in() == pytest.approx(10)
+
+    limit.exhaust(clock.now + 60)
+    clock.now += 30
+    resumed = AccountRateLimit(policy, clock=clock, state_file=state_file)
+    assert resumed.ready_in() == pytest.approx(30)
+
+    state_file.write_text("not json", encoding="utf-8")
+    assert AccountRateLimit(policy, clock=clock, state_file=state_file).ready_in() == 0
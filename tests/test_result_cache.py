@@ -0,0 +1,87 @@
+import time
+
+from src.schemas import ClipFindings
+from src.vision.result_cache import VisionCacheKey
+from src.vision.result_cache import VisionResultCache
+from src.vision.result_cache import normalize_description
+
+
+def _key(description, prompt_hash="prompt-v1", settings_hash="settings-v1"):
+    return VisionCacheKey(
+        video_hash="video",
+        description=normalize_description(description),
+        duration_seconds=15,
+        model="gemini-2.5-flash",
+        prompt_hash=prompt_hash,
+        settings_hash=settings_hash,
+    )
+
+
+FINDINGS = [
+    ClipFindings(start_time_s=2.0, end_time_s=17.0, confidence=0.9, reason="Match."),
+]
+
+
+def test_vision_result_cache_round_trip(tmp_path):
+    """
+    Ensures findings are returned for the same key, including trivially
+    different descriptions, and that a prompt or frame settings change
+    invalidates them.
+    """
+    cache = VisionResultCache(path=tmp_path / "cache.sqlite3", ttl_seconds=60)
+    cache.put(_key("Trump talking about Charlie Kirk"), FINDINGS)
+
+    assert cache.get(_key("trump talking about, Charlie Kirk!")) == FINDINGS
+    assert cache.get(_key("Trump talking about Charlie Kirk", "prompt-v2")) is None
+    assert (
+        cache.get(
+            _key("Trump talking about Charlie Kirk", settings_hash="settings-v2"),
+        )
+        is None
+    )
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_vision_result_cache_near_match_and_ttl(tmp_path, mocker):
+    """
+    Ensures near-identical descriptions only match when enabled, and that
+    entries expire after their time-to-live.
+    """
+    path = tmp_path / "cache.sqlite3"
+    exact = VisionResultCache(path=path, ttl_seconds=60)
+    near = VisionResultCache(path=path, ttl_seconds=60, near_match_threshold=0.9)
+    exact.put(_key("Trump talking about Charlie Kirk"), [])
+
+    assert exact.get(_key("Trump talks about Charlie Kirk")) is None
+    assert near.get(_key("Trump talks about Charlie Kirk")) == []
+    assert near.get(_key("Biden talking about the economy")) is None
+
+    mocker.patch("src.vision.result_cache.time.time", return_value=time.time() + 61)
+    assert exact.get(_key("Trump talking about Charlie Kirk")) is None
+
+
+def test_vision_result_cache_expires_empty_findings_sooner(tmp_path, mocker):
+    """
+    Ensures analyses that found nothing expire after the empty TTL, and are
+    not stored at all when it is 0.
+    """
+    cache = VisionResultCache(
+        path=tmp_path / "cache.sqlite3",
+        ttl_seconds=600,
+        empty_ttl_seconds=60,
+    )
+    cache.put(_key("Trump talking about Charlie Kirk"), FINDINGS)
+    cache.put(_key("Biden talking about the economy"), [])
+
+    assert cache.get(_key("Biden talking about the economy")) == []
+    mocker.patch("src.vision.result_cache.time.time", return_value=time.time() + 61)
+    assert cache.get(_key("Biden talking about the economy")) is None
+    assert cache.get(_key("Trump talking about Charlie Kirk")) == FINDINGS
+
+    uncached = VisionResultCache(
+        path=tmp_path / "other.sqlite3",
+        ttl_seconds=600,
+        empty_ttl_seconds=0,
+    )
+    uncached.put(_key("Biden talking about the economy"), [])
+    assert uncached.get(_key("Biden talking about the economy")) is None
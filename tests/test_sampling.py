@@ -0,0 +1,92 @@
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from src.vision.sampling import _choose_strategy
+from src.vision.sampling import iter_frames
+from src.vision.sampling import sample_frames
+from src.vision.sampling import sample_windows
+
+
+@pytest.fixture
+def dummy_video_file():
+    """
+    Creates a dummy 10-second video file whose frames encode their own index.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+        video_path = Path(tmp.name)
+
+    width, height = 100, 100
+    fps = 30
+    duration_seconds = 10
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    out = cv2.VideoWriter(str(video_path), fourcc, fps, (width, height))
+
+    for index in range(fps * duration_seconds):
+        frame = np.full((height, width, 3), index % 256, dtype=np.uint8)
+        out.write(frame)
+
+    out.release()
+
+    yield video_path
+
+    video_path.unlink()
+
+
+@pytest.mark.parametrize("strategy", ["sequential", "seek"])
+def test_sample_frames_records_real_timestamps(dummy_video_file, strategy):
+    """
+    Ensures both strategies land on the same target timestamps.
+    """
+    frames = sample_frames(dummy_video_file, interval_seconds=2, strategy=strategy)
+
+    assert [f.timestamp_s for f in frames] == pytest.approx([0, 2, 4, 6, 8])
+    assert all(f.image.startswith(b"\xff\xd8") for f in frames)
+
+
+def test_choose_strategy():
+    """
+    Ensures seeking is only chosen when a stride spans more than one GOP.
+    """
+    assert _choose_strategy(stride_frames=60, gop_size=None) == "sequential"
+    assert _choose_strategy(stride_frames=60, gop_size=250) == "sequential"
+    assert _choose_strategy(stride_frames=60, gop_size=12) == "seek"
+
+
+def test_iter_frames_decodes_from_url(dummy_video_file):
+    """
+    Ensures frames can be sampled straight from an HTTP URL while it is read.
+    """
+    handler = partial(SimpleHTTPRequestHandler, directory=dummy_video_file.parent)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/{dummy_video_file.name}"
+        frames = list(iter_frames(url, interval_seconds=2))
+    finally:
+        server.shutdown()
+
+    assert [f.timestamp_s for f in frames] == pytest.approx([0, 2, 4, 6, 8])
+
+
+def test_sample_windows_only_samples_inside_the_windows(dummy_video_file):
+    """
+    Ensures frames are only sampled inside each window, at the interval.
+    """
+    frames = sample_windows(
+        dummy_video_file,
+        [(1.0, 2.0), (7.5, 8.5)],
+        interval_seconds=0.5,
+    )
+
+    assert [f.timestamp_s for f in frames] == pytest.approx(
+        [1.0, 1.5, 2.0, 7.5, 8.0, 8.5],
+    )
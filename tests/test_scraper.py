@@ -1,4 +1,22 @@
+# ruff: noqa: PLR2004
+import time
+from datetime import UTC
+from datetime import datetime
+
+import pytest
+from twikit import TooManyRequests
+from twikit.utils import Result
+
+from src.schemas import Candidate
 from src.scraper.scraper import _get_best_video_url
+from src.scraper.scraper import _get_video_metadata
+from src.scraper.scraper import _get_video_variants
+from src.scraper.scraper import iter_candidates
+from src.scraper.scraper import scrape_candidates
+from src.scraper.scraper import wait_for_refreshes
+from src.scraper.search_cache import SearchCache
+from src.scraper.sessions import TwikitSessionPool
+from src.scraper.tweet_index import TweetIndex
 
 
 class MockStream:
@@ -9,15 +27,32 @@ class MockStream:
 
 
 class MockMedia:
-    def __init__(self, media_type, streams=None, url=None):
+    def __init__(  # noqa: PLR0913
+        self,
+        media_type,
+        streams=None,
+        url=None,
+        video_info=None,
+        original_info=None,
+        media_id=None,
+    ):
+        self.id = media_id
         self.type = media_type
         self.streams = streams or []
         self.url = url
+        self.video_info = video_info
+        self.original_info = original_info
+
+
+class MockUser:
+    def __init__(self, screen_name):
+        self.screen_name = screen_name
 
 
 class MockTweet:
-    def __init__(self, media=None):
+    def __init__(self, media=None, view_count=None):
         self.media = media or []
+        self.view_count = view_count
 
 
 def test_get_best_video_url_selects_highest_bitrate():
@@ -82,3 +117,359 @@ def test_get_best_video_url_no_mp4_streams():
     )
     fallback_url = _get_best_video_url(mock_tweet)
     assert fallback_url == "https://video.com/fallback.m3u8"
+
+
+def test_get_video_variants_parses_sizes():
+    """
+    Ensures every MP4 variant is kept with the size encoded in its URL and
+    non-MP4 streams are skipped.
+    """
+    mock_tweet = MockTweet(
+        media=[
+            MockMedia(
+                media_type="video",
+                streams=[
+                    MockStream("https://video.com/pl.m3u8", "application/x-mpegURL", 0),
+                    MockStream(
+                        "https://video.com/vid/avc1/640x360/a.mp4?tag=12",
+                        None,
+                        832000,
+                    ),
+                    MockStream(
+                        "https://video.com/vid/avc1/1280x720/b.mp4",
+                        "video/mp4",
+                        2176000,
+                    ),
+                ],
+            ),
+        ],
+    )
+    variants = _get_video_variants(mock_tweet)
+    assert [(v.width, v.height, v.bitrate) for v in variants] == [
+        (640, 360, 832000),
+        (1280, 720, 2176000),
+    ]
+
+
+def test_get_video_metadata_reads_duration_size_and_views():
+    """
+    Ensures the video duration, size and view count are read from twikit
+    media, and missing values are left out.
+    """
+    mock_tweet = MockTweet(
+        media=[
+            MockMedia(
+                media_type="video",
+                video_info={"duration_millis": 42500},
+                original_info={"width": 1920, "height": 1080},
+                media_id="77",
+            ),
+        ],
+        view_count="1234",
+    )
+    assert _get_video_metadata(mock_tweet) == {
+        "view_count": "1234",
+        "media_id": "77",
+        "duration_seconds": 42.5,
+        "width": 1920,
+        "height": 1080,
+    }
+    assert _get_video_metadata(MockTweet()) == {"view_count": None}
+
+
+def make_video_tweet(tweet_id, media_id=None, *, with_video=True):
+    media = [
+        MockMedia(
+            media_type="video",
+            streams=[
+                MockStream(
+                    f"https://video.com/{media_id or tweet_id}.mp4",
+                    "video/mp4",
+                    832000,
+                ),
+            ],
+            media_id=media_id,
+        ),
+    ]
+    mock_tweet = MockTweet(media=media if with_video else [])
+    mock_tweet.id = tweet_id
+    mock_tweet.user = MockUser("user")
+    mock_tweet.text = "test"
+    mock_tweet.created_at = "Sun Oct 05 12:00:00 +0000 2025"
+    return mock_tweet
+
+
+def mock_session_pool(mocker, pages):
+    """
+    Patches the session pool with one account whose searches return the
+    given pages of tweets, each pointing to the next one by its cursor.
+    """
+    results = [
+        Result(
+            tweets,
+            next_cursor=f"cursor{index + 1}" if index + 1 < len(pages) else None,
+        )
+        for index, tweets in enumerate(pages)
+    ]
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock()
+    client.search_tweets = mocker.AsyncMock(side_effect=results)
+    mocker.patch(
+        "src.scraper.scraper.get_session_pool",
+        return_value=TwikitSessionPool([client]),
+    )
+    mocker.patch("src.scraper.scraper.get_search_cache").return_value.enabled = False
+    mocker.patch("src.scraper.scraper.get_tweet_index").return_value.enabled = False
+    return client
+
+
+@pytest.mark.asyncio
+async def test_scrape_candidates_folds_reposts_of_the_same_media(mocker):
+    """
+    Ensures tweets sharing a media id become a single candidate that lists
+    the other tweets, without counting toward the candidate limit.
+    """
+    mock_session_pool(
+        mocker,
+        [
+            [
+                make_video_tweet("1", "a"),
+                make_video_tweet("2", "a"),
+                make_video_tweet("3", "b"),
+            ],
+        ],
+    )
+
+    candidates = await scrape_candidates("query", max_candidates=2)
+
+    assert [str(c.tweet_url) for c in candidates] == [
+        "https://x.com/user/status/1",
+        "https://x.com/user/status/3",
+    ]
+    assert [str(u) for u in candidates[0].shared_tweet_urls] == [
+        "https://x.com/user/status/2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_candidates_follows_cursors_until_enough_are_found(mocker):
+    """
+    Ensures the search follows the result cursors past pages without videos
+    and stops paging once enough candidates were yielded.
+    """
+    client = mock_session_pool(
+        mocker,
+        [
+            [make_video_tweet("1", with_video=False), make_video_tweet("2")],
+            [make_video_tweet("3", with_video=False)],
+            [make_video_tweet("4"), make_video_tweet("5")],
+            [make_video_tweet("6")],
+        ],
+    )
+
+    candidates = [c async for c in iter_candidates("query", max_candidates=2)]
+
+    assert [str(c.tweet_url) for c in candidates] == [
+        "https://x.com/user/status/2",
+        "https://x.com/user/status/4",
+    ]
+    cursors = [call.args[3] for call in client.search_tweets.await_args_list]
+    assert cursors == [None, "cursor1", "cursor2"]
+
+
+@pytest.mark.asyncio
+async def test_expanded_scrape_merges_queries_within_the_request_budget(mocker):
+    """
+    Ensures expanded queries are merged without duplicate tweets, reposts
+    found by another query are folded, and the searches stop once the shared
+    request budget is spent.
+    """
+    mocker.patch("src.scraper.scraper.settings.twitter_query_expansion", new=True)
+    mocker.patch("src.scraper.scraper.settings.twitter_query_variants", new=2)
+    mocker.patch("src.scraper.scraper.settings.twitter_search_request_budget", new=2)
+    pages = {
+        "cat video filter:videos": [make_video_tweet("1", "a")],
+        "cat video filter:native_video": [
+            make_video_tweet("1", "a"),
+            make_video_tweet("2", "a"),
+            make_video_tweet("3", "b"),
+        ],
+    }
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock()
+    client.search_tweets = mocker.AsyncMock(
+        side_effect=lambda query, *_: Result(pages[query], next_cursor="more"),
+    )
+    mocker.patch(
+        "src.scraper.scraper.get_session_pool",
+        return_value=TwikitSessionPool([client]),
+    )
+    mocker.patch("src.scraper.scraper.get_search_cache").return_value.enabled = False
+    mocker.patch("src.scraper.scraper.get_tweet_index").return_value.enabled = False
+
+    candidates = await scrape_candidates("cat video", max_candidates=5)
+
+    assert sorted(str(c.tweet_url) for c in candidates) == [
+        "https://x.com/user/status/1",
+        "https://x.com/user/status/3",
+    ]
+    first = next(c for c in candidates if c.media_id == "a")
+    assert [str(u) for u in first.shared_tweet_urls] == [
+        "https://x.com/user/status/2",
+    ]
+    assert client.search_tweets.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_candidates_serves_cached_searches_and_revalidates(
+    mocker,
+    tmp_path,
+):
+    """
+    Ensures a cached search answers without a network search while fresh,
+    and answers at once but refreshes in the background once stale.
+    """
+    cache = SearchCache(
+        tmp_path / "searches.sqlite3",
+        search_ttl_seconds=60,
+        stale_seconds=600,
+        tweet_ttl_seconds=3600,
+    )
+    client = mock_session_pool(
+        mocker,
+        [[make_video_tweet("1")], [make_video_tweet("2")]],
+    )
+    mocker.patch("src.scraper.scraper.get_search_cache", return_value=cache)
+
+    async def search():
+        return [str(c.tweet_url) async for c in iter_candidates("q", 1)]
+
+    assert await search() == ["https://x.com/user/status/1"]
+    assert await search() == ["https://x.com/user/status/1"]
+    assert client.search_tweets.await_count == 1
+
+    now = time.time()
+    mocker.patch("src.scraper.search_cache.time.time", return_value=now + 120)
+    assert await search() == ["https://x.com/user/status/1"]
+    await wait_for_refreshes()
+    assert client.search_tweets.await_count == 2
+    assert await search() == ["https://x.com/user/status/2"]
+    assert (cache.hits, cache.stale_hits, cache.misses) == (2, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_scrape_candidates_searches_the_tweet_index_first(mocker, tmp_path):
+    """
+    Ensures local matches are served first, Twitter is only searched for the
+    missing candidates, and what it finds is indexed for the next run.
+    """
+    index = TweetIndex(tmp_path / "tweets.sqlite3", max_age_seconds=3600)
+    client = mock_session_pool(mocker, [[make_video_tweet("2")]])
+    mocker.patch("src.scraper.scraper.get_tweet_index", return_value=index)
+    local = Candidate(
+        tweet_url="https://x.com/user/status/1",
+        best_video_url="https://video.com/1.mp4",
+        text="Cat video",
+        author="user",
+        created_at=datetime.now(UTC),
+    )
+    index.add([local])
+
+    candidates = await scrape_candidates("cat video", max_candidates=2)
+    assert [str(c.tweet_url) for c in candidates] == [
+        "https://x.com/user/status/1",
+        "https://x.com/user/status/2",
+    ]
+
+    candidates = await scrape_candidates("cat", max_candidates=1)
+    assert [str(c.tweet_url) for c in candidates] == ["https://x.com/user/status/1"]
+    client.search_tweets.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_expanded_scrape_caches_every_video_each_query_read(mocker, tmp_path):
+    """
+    Ensures an expanded query whose tweets a sibling query claimed first is
+    still cached with every video its pages held, so the entry is complete
+    when served on its own.
+    """
+    mocker.patch("src.scraper.scraper.settings.twitter_query_expansion", new=True)
+    mocker.patch("src.scraper.scraper.settings.twitter_query_variants", new=2)
+    pages = {
+        "cat video filter:videos": [make_video_tweet("1", "a")],
+        "cat video filter:native_video": [
+            make_video_tweet("1", "a"),
+            make_video_tweet("2", "a"),
+            make_video_tweet("3", "b"),
+        ],
+    }
+    client = mock_session_pool(mocker, [])
+    client.search_tweets.side_effect = lambda query, *_: Result(pages[query])
+    cache = SearchCache(
+        tmp_path / "searches.sqlite3",
+        search_ttl_seconds=60,
+        stale_seconds=600,
+        tweet_ttl_seconds=3600,
+    )
+    mocker.patch("src.scraper.scraper.get_search_cache", return_value=cache)
+
+    await scrape_candidates("cat video", max_candidates=5)
+
+    cached = cache.get("cat video filter:native_video", "Top", 5)
+    assert cached.exhausted
+    assert [str(c.tweet_url) for c in cached.candidates] == [
+        "https://x.com/user/status/1",
+        "https://x.com/user/status/3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_search_is_not_cached_as_exhausted(mocker, tmp_path):
+    """
+    Ensures a search every account was too rate limited to answer is not
+    cached as a search without results, so the next run searches again.
+    """
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock()
+    client.search_tweets = mocker.AsyncMock(
+        side_effect=TooManyRequests(
+            "limit",
+            headers={"x-rate-limit-reset": str(int(time.time()) + 3600)},
+        ),
+    )
+    pool = TwikitSessionPool([client])
+    search = mocker.spy(pool, "search_tweets")
+    mocker.patch("src.scraper.scraper.get_session_pool", return_value=pool)
+    mocker.patch("src.scraper.scraper.get_tweet_index").return_value.enabled = False
+    cache = SearchCache(
+        tmp_path / "searches.sqlite3",
+        search_ttl_seconds=60,
+        stale_seconds=600,
+        tweet_ttl_seconds=3600,
+    )
+    mocker.patch("src.scraper.scraper.get_search_cache", return_value=cache)
+
+    assert await scrape_candidates("cat video", max_candidates=1) == []
+    assert await scrape_candidates("cat video", max_candidates=1) == []
+
+    assert cache.get("cat video", "Top", 1) is None
+    assert search.await_count == 2
+    client.search_tweets.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_refreshes_logs_failed_refreshes(mocker, caplog):
+    """
+    Ensures a background refresh that fails is logged rather than dropped.
+    """
+    client = mock_session_pool(mocker, [])
+    client.search_tweets.side_effect = RuntimeError("search failed")
+    cache = mocker.Mock()
+    cache.get.return_value.stale = True
+    cache.get.return_value.candidates = []
+    mocker.patch("src.scraper.scraper.get_search_cache", return_value=cache)
+
+    assert [c async for c in iter_candidates("q", 1)] == []
+    await wait_for_refreshes()
+
+    assert "search failed" in caplog.text
@@ -0,0 +1,57 @@
+import time
+
+from src.schemas import Candidate
+from src.scraper.search_cache import SearchCache
+
+
+def _candidate(tweet_id):
+    return Candidate(
+        tweet_url=f"https://x.com/user/status/{tweet_id}",
+        best_video_url=f"https://video.com/{tweet_id}.mp4",
+        text="A video.",
+        author="user",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+
+def _cache(path):
+    return SearchCache(
+        path,
+        search_ttl_seconds=60,
+        stale_seconds=600,
+        tweet_ttl_seconds=3600,
+    )
+
+
+def test_search_cache_round_trip_and_expiry(tmp_path, mocker):
+    """
+    Ensures searches are shared by trivially different queries, turn stale
+    after their TTL and expire after the stale window.
+    """
+    cache = _cache(tmp_path / "searches.sqlite3")
+    candidates = [_candidate("1"), _candidate("2")]
+    cache.put("Cat  video", "Top", candidates, exhausted=False)
+
+    cached = cache.get("cat video", "Top", 2)
+    assert cached.candidates == candidates
+    assert not cached.stale
+    assert cache.get("cat video", "Latest", 2) is None
+
+    now = time.time()
+    mocker.patch("src.scraper.search_cache.time.time", return_value=now + 120)
+    assert cache.get("cat video", "Top", 1).stale
+    mocker.patch("src.scraper.search_cache.time.time", return_value=now + 700)
+    assert cache.get("cat video", "Top", 1) is None
+
+
+def test_search_cache_needs_enough_candidates_or_an_exhausted_search(tmp_path):
+    """
+    Ensures a search with fewer candidates than wanted is only served when it
+    ran out of results.
+    """
+    cache = _cache(tmp_path / "searches.sqlite3")
+    cache.put("short", "Top", [_candidate("1")], exhausted=False)
+    cache.put("done", "Top", [_candidate("1")], exhausted=True)
+
+    assert cache.get("short", "Top", 2) is None
+    assert len(cache.get("done", "Top", 2).candidates) == 1
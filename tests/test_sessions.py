@@ -0,0 +1,142 @@
+# ruff: noqa: PLR2004
+import asyncio
+
+import pytest
+from twikit import TooManyRequests
+from twikit import Unauthorized
+
+from src.scraper.rate_limit import RateLimitPolicy
+from src.scraper.sessions import TwikitClient
+from src.scraper.sessions import TwikitSessionPool
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_pool_logs_in_once_and_leases_each_session_to_one_scrape(mocker):
+    """
+    Ensures every account logs in once however many scrapes run, accounts
+    that fail to log in are left out, and concurrent scrapes never share a
+    session.
+    """
+    clients = [mocker.Mock(name=f"client{i}") for i in range(3)]
+    for client in clients:
+        client.login = mocker.AsyncMock()
+    clients[2].login.side_effect = RuntimeError("bad cookies")
+    pool = TwikitSessionPool(clients)
+
+    leased: list = []
+
+    async def scrape():
+        async with pool.session() as client:
+            assert client not in leased
+            leased.append(client)
+            await asyncio.sleep(0.01)
+            leased.remove(client)
+            return client
+
+    used = await asyncio.gather(*(scrape() for _ in range(4)))
+
+    assert pool.size == 2
+    assert set(used) == {clients[0], clients[1]}
+    for client in clients:
+        client.login.assert_awaited_once()
+
+
+async def test_pool_raises_when_no_account_can_log_in(mocker):
+    """
+    Ensures a pool without any working account reports the login error.
+    """
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock(side_effect=RuntimeError("bad cookies"))
+    pool = TwikitSessionPool([client])
+
+    with pytest.raises(RuntimeError, match="bad cookies"):
+        async with pool.session():
+            pass
+
+
+async def test_client_refreshes_expired_session_and_retries(mocker, tmp_path):
+    """
+    Ensures an expired session logs in again with the credentials, saves its
+    new cookies and retries the search.
+    """
+    cookies_file = tmp_path / "cookies.json"
+    client = TwikitClient(cookies_file=cookies_file)
+    twikit = mocker.patch.object(client, "_client")
+    twikit.login = mocker.AsyncMock()
+    twikit.search_tweet = mocker.AsyncMock(
+        side_effect=[Unauthorized("expired"), ["tweet"]],
+    )
+
+    await client.login()
+    tweets = await client.search_tweets("query")
+
+    assert tweets == ["tweet"]
+    assert twikit.login.await_count == 2
+    assert twikit.login.await_args.kwargs["cookies_file"] is None
+    twikit.save_cookies.assert_called_once_with(cookies_file)
+    assert client.logged_in
+
+
+async def test_pool_fails_over_to_another_account_when_rate_limited(mocker):
+    """
+    Ensures a rate-limited search is retried on another account, and the
+    exhausted account is only used again after its reset.
+    """
+    limited = mocker.Mock()
+    limited.login = mocker.AsyncMock()
+    limited.search_tweets = mocker.AsyncMock(
+        side_effect=TooManyRequests("limit", headers={"x-rate-limit-reset": "1"}),
+    )
+    healthy = mocker.Mock()
+    healthy.login = mocker.AsyncMock()
+    healthy.search_tweets = mocker.AsyncMock(return_value=["tweet"])
+    mocker.patch("src.scraper.rate_limit.time.time", return_value=0)
+    pool = TwikitSessionPool([limited, healthy])
+
+    assert await pool.search_tweets("query") == ["tweet"]
+    assert await pool.search_tweets("query") == ["tweet"]
+
+    limited.search_tweets.assert_awaited_once()
+    assert healthy.search_tweets.await_count == 2
+    assert pool.failovers == 1
+    assert pool.wait_seconds == 0
+
+
+async def test_pool_waits_for_the_reset_when_every_account_is_limited(mocker):
+    """
+    Ensures a search waits for the rate limit to reset instead of returning
+    no results, and records the time it waited.
+    """
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock()
+    client.search_tweets = mocker.AsyncMock(
+        side_effect=[
+            TooManyRequests("limit", headers={"x-rate-limit-reset": "30"}),
+            ["tweet"],
+        ],
+    )
+    mocker.patch("src.scraper.rate_limit.time.time", return_value=0)
+    sleep = mocker.patch("src.scraper.sessions.asyncio.sleep", mocker.AsyncMock())
+    pool = TwikitSessionPool([client])
+
+    assert await pool.search_tweets("query") == ["tweet"]
+    sleep.assert_awaited_once_with(30)
+    assert pool.wait_seconds == 30
+
+
+async def test_pool_gives_up_when_the_reset_is_too_far(mocker):
+    """
+    Ensures a search reports a failure rather than waiting longer than the
+    policy allows.
+    """
+    client = mocker.Mock()
+    client.login = mocker.AsyncMock()
+    client.search_tweets = mocker.AsyncMock(
+        side_effect=TooManyRequests("limit", headers={"x-rate-limit-reset": "900"}),
+    )
+    mocker.patch("src.scraper.rate_limit.time.time", return_value=0)
+    pool = TwikitSessionPool([client], RateLimitPolicy(max_wait_seconds=60))
+
+    assert await pool.search_tweets("query") is None
+    client.search_tweets.assert_awaited_once()
@@ -1,10 +1,12 @@
 # ruff: noqa: PLR2004
+import re
 from unittest.mock import AsyncMock
 
 import pytest
 from pydantic import HttpUrl
 
 from src.filters.text_filter import _ScoredCandidateResult
+from src.filters.text_filter import _split_batches
 from src.filters.text_filter import _TextFilterResults
 from src.filters.text_filter import filter_candidates_by_text
 from src.schemas import Candidate
@@ -80,3 +82,86 @@ async def test_filter_candidates_by_text(mocker):
         "https://x.com/user/status/3",
     }
     assert returned_urls == expected_urls
+    assert [c.text_score for c in filtered_candidates] == [0.9, 0.6]
+
+
+def _candidate(index, text="A tweet."):
+    return Candidate(
+        tweet_url=HttpUrl(f"https://x.com/user/status/{index}"),
+        text=text,
+        author="test",
+        created_at="Sun Oct 05 12:00:00 +0000 2025",
+    )
+
+
+def _results(prompt, score):
+    """
+    Scores every candidate listed in a text filter prompt.
+    """
+    urls = re.findall(r'"url": "([^"]+)"', prompt.split("TASK", 1)[1])
+    return _TextFilterResults(
+        results=[
+            _ScoredCandidateResult(tweet_url=url, score=score, reason="Scored.")
+            for url in urls
+        ],
+    )
+
+
+async def test_split_batches_respects_token_budget_and_size(mocker):
+    """
+    Ensures batches stay within the token budget and the batch size, and a
+    candidate over the budget gets a batch of its own.
+    """
+    mocker.patch("src.filters.text_filter.settings.text_filter_batch_tokens", new=100)
+    mocker.patch("src.filters.text_filter.settings.text_filter_max_batch_size", new=3)
+    candidates = [_candidate(i) for i in range(5)]
+    candidates.insert(2, _candidate(99, "x" * 1000))
+
+    batches = _split_batches(candidates)
+
+    assert [[str(c.tweet_url)[-2:].strip("/") for c in b] for b in batches] == [
+        ["0", "1"],
+        ["99"],
+        ["2", "3", "4"],
+    ]
+
+
+async def test_filter_retries_only_failed_batches(mocker):
+    """
+    Ensures batches are scored separately, a failed batch is retried on its
+    own, and a batch that keeps failing passes unfiltered while the others
+    are still filtered with the same threshold.
+    """
+    mocker.patch("src.filters.text_filter.settings.text_filter_max_batch_size", new=2)
+    mocker.patch("src.filters.text_filter.settings.text_filter_retries", new=1)
+    candidates = [_candidate(i) for i in range(6)]
+    calls: dict[str, int] = {}
+
+    async def ainvoke(prompt):
+        first_url = re.search(r'status/(\d+)"', prompt.split("TASK", 1)[1]).group(1)
+        calls[first_url] = calls.get(first_url, 0) + 1
+        if first_url == "0":
+            return _results(prompt, 0.9)
+        if first_url == "2" and calls[first_url] == 1:
+            msg = "Malformed output."
+            raise ValueError(msg)
+        if first_url == "2":
+            return _results(prompt, 0.2)
+        return None
+
+    mock_structured_llm = AsyncMock()
+    mock_structured_llm.ainvoke.side_effect = ainvoke
+    mocker.patch(
+        "src.filters.text_filter.ChatGoogleGenerativeAI.with_structured_output",
+        return_value=mock_structured_llm,
+    )
+
+    filtered = await filter_candidates_by_text(candidates, "test", 0.5)
+
+    assert calls == {"0": 1, "2": 2, "4": 2}
+    assert [(str(c.tweet_url)[-1], c.text_score) for c in filtered] == [
+        ("0", 0.9),
+        ("1", 0.9),
+        ("4", None),
+        ("5", None),
+    ]
@@ -0,0 +1,50 @@
+# ruff: noqa: PLR2004
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from src.schemas import Candidate
+from src.scraper.tweet_index import TweetIndex
+
+
+def _candidate(tweet_id, text, age=timedelta(0)):
+    return Candidate(
+        tweet_url=f"https://x.com/user/status/{tweet_id}",
+        best_video_url=f"https://video.com/{tweet_id}.mp4",
+        text=text,
+        author="user",
+        created_at=datetime.now(UTC) - age,
+        duration_seconds=30,
+    )
+
+
+def test_tweet_index_ranks_recent_tweets_matching_every_keyword(tmp_path):
+    """
+    Ensures only recent tweets containing every keyword are returned, with
+    stemmed matches, best match first, and that re-indexing replaces a tweet.
+    """
+    index = TweetIndex(tmp_path / "tweets.sqlite3", max_age_seconds=3600)
+    index.add(
+        [
+            _candidate("1", "Trump talks about Charlie Kirk at the rally"),
+            _candidate("2", "Charlie Kirk"),
+            _candidate(
+                "3",
+                "Trump on Charlie Kirk, Trump on Kirk",
+                age=timedelta(days=1),
+            ),
+            _candidate("4", "Trump and Kirk. Trump speaking of Charlie Kirk"),
+        ],
+    )
+    index.add([_candidate("1", "Trump talking about Charlie Kirk")])
+
+    results = index.search("Trump talking about Charlie Kirk", limit=5)
+    assert [str(c.tweet_url) for c in results] == ["https://x.com/user/status/1"]
+    assert results[0].duration_seconds == 30
+
+    results = index.search('Trump "Kirk"', limit=5)
+    assert [str(c.tweet_url) for c in results] == [
+        "https://x.com/user/status/4",
+        "https://x.com/user/status/1",
+    ]
+    assert index.search("about the", limit=5) == []
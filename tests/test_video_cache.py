@@ -0,0 +1,69 @@
+# ruff: noqa: PLR2004
+import os
+import time
+
+from src.vision.video_cache import VideoCache
+
+
+def _write_video(path, size):
+    path.write_bytes(b"\0" * size)
+    return path
+
+
+def test_video_cache_counts_hits_and_misses(tmp_path):
+    """
+    Ensures a stored video is found again and lookups are counted.
+    """
+    cache = VideoCache(directory=tmp_path / "cache", max_bytes=1024)
+
+    assert cache.get("111") is None
+    cached_path = cache.put("111", _write_video(tmp_path / "111.mp4", 100))
+
+    assert cache.get("111") == cached_path
+    assert cached_path.read_bytes() == b"\0" * 100
+    assert not (tmp_path / "111.mp4").exists()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_video_cache_evicts_least_recently_used(tmp_path):
+    """
+    Ensures eviction removes the oldest entries until the budget is met.
+    """
+    cache = VideoCache(directory=tmp_path / "cache", max_bytes=250)
+    paths = {
+        key: cache.put(key, _write_video(tmp_path / f"{key}.mp4", 100))
+        for key in ("old", "used", "new")
+    }
+
+    an_hour_ago = time.time() - 3600
+    os.utime(paths["old"], (an_hour_ago, an_hour_ago))
+    os.utime(paths["used"], (an_hour_ago + 1, an_hour_ago + 1))
+    cache.get("used")
+
+    assert cache.evict() == 100
+    assert cache.get("old") is None
+    assert cache.get("used") is not None
+    assert cache.get("new") is not None
+
+
+def test_video_cache_bounds_overshoot_of_recent_entries(tmp_path):
+    """
+    Ensures recently used entries are spared while the cache stays within
+    the grace overshoot, and evicted oldest first beyond it, except for the
+    entry just stored.
+    """
+    cache = VideoCache(directory=tmp_path / "cache", max_bytes=200)
+    paths = {}
+    for key in ("first", "second", "third", "fourth"):
+        paths[key] = cache.put(key, _write_video(tmp_path / f"{key}.mp4", 100))
+        time.sleep(0.01)
+
+    assert [key for key, path in paths.items() if path.exists()] == [
+        "second",
+        "third",
+        "fourth",
+    ]
+
+    paths["large"] = cache.put("large", _write_video(tmp_path / "large.mp4", 500))
+
+    assert [key for key, path in paths.items() if path.exists()] == ["large"]
@@ -1,12 +1,34 @@
 # ruff: noqa: PLR2004
+import asyncio
 import tempfile
 from pathlib import Path
+from unittest.mock import AsyncMock
 
 import cv2
 import numpy as np
 import pytest
+from langchain_core.messages import AIMessage
 
+from src.schemas import Candidate
+from src.schemas import ClipFindings
+from src.vision.analyzer import _analyze_two_pass
+from src.vision.analyzer import _download_stage
+from src.vision.analyzer import _encode_windowed_pass
+from src.vision.analyzer import _EncodedRequest
 from src.vision.analyzer import _extract_frames
+from src.vision.analyzer import _find_original
+from src.vision.analyzer import _schedule_key
+from src.vision.analyzer import _settle_media
+from src.vision.analyzer import _VisionAnalysisResponse
+from src.vision.analyzer import _VisionBatch
+from src.vision.analyzer import _VisionJob
+from src.vision.analyzer import _VisionSession
+from src.vision.analyzer import analyze_videos
+from src.vision.sampling import FrameFormat
+from src.vision.sampling import encode_frame
+from src.vision.sampling import sample_frames
+
+pytestmark = pytest.mark.asyncio
 
 
 @pytest.fixture
@@ -34,16 +56,259 @@ def dummy_video_file():
     video_path.unlink()
 
 
-def test_extract_frames(dummy_video_file):
+async def test_extract_frames(dummy_video_file):
     """
     Tests that the frame extraction logic correctly calculates the number of frames
     to extract based on the specified interval.
     """
-    frames = _extract_frames(dummy_video_file, interval_seconds=2)
+    frames = await _extract_frames(dummy_video_file, interval_seconds=2)
     assert len(frames) == 5
 
-    frames = _extract_frames(dummy_video_file, interval_seconds=3)
+    frames = await _extract_frames(dummy_video_file, interval_seconds=3)
     assert len(frames) == 4
 
-    frames = _extract_frames(dummy_video_file, interval_seconds=1)
+    frames = await _extract_frames(dummy_video_file, interval_seconds=1)
     assert len(frames) == 10
+
+
+async def test_analyze_two_pass_refines_only_coarse_windows(dummy_video_file, mocker):
+    """
+    Ensures the fine pass only receives dense frames sampled inside the
+    padded windows returned by the coarse pass over sparse frames, and that
+    tokens are reported per pass.
+    """
+    frames = sample_frames(dummy_video_file, interval_seconds=6)
+    coarse_window = ClipFindings(
+        start_time_s=6.0,
+        end_time_s=6.0,
+        confidence=0.6,
+        reason="Speaker on screen.",
+    )
+    refined = ClipFindings(
+        start_time_s=5.5,
+        end_time_s=7.0,
+        confidence=0.9,
+        reason="Exact match.",
+    )
+    structured_llm = AsyncMock()
+    structured_llm.ainvoke.side_effect = [
+        {
+            "raw": AIMessage(
+                content="",
+                usage_metadata={
+                    "input_tokens": 90,
+                    "output_tokens": 10,
+                    "total_tokens": 100,
+                },
+            ),
+            "parsed": _VisionAnalysisResponse(findings=[coarse_window]),
+            "parsing_error": None,
+        },
+        {
+            "raw": AIMessage(
+                content="",
+                usage_metadata={
+                    "input_tokens": 400,
+                    "output_tokens": 20,
+                    "total_tokens": 420,
+                },
+            ),
+            "parsed": _VisionAnalysisResponse(findings=[refined]),
+            "parsing_error": None,
+        },
+    ]
+    mocker.patch("src.vision.analyzer.settings.vision_frame_dedup", new=False)
+    mocker.patch("src.vision.analyzer.settings.vision_window_padding_seconds", new=1)
+
+    session = _VisionSession(structured_llm, mocker.Mock(tweet_url="https://x.com/1"))
+    findings = await _analyze_two_pass(
+        session,
+        dummy_video_file,
+        frames,
+        "coarse",
+        "fine",
+    )
+
+    assert findings == [refined]
+    assert session.token_usage == {"coarse": 100, "fine": 420}
+    fine_content = structured_llm.ainvoke.call_args.args[0][0][1]
+    fine_labels = [p["text"] for p in fine_content[1:] if p["type"] == "text"]
+    assert fine_labels == [f"Frame at {t:.1f}s" for t in (5.0, 5.5, 6.0, 6.5, 7.0)]
+    coarse_content = structured_llm.ainvoke.call_args_list[0].args[0][0][1]
+    assert len([p for p in coarse_content if p["type"] == "image_url"]) == 2
+
+
+def _frames_of_video(seed):
+    rng = np.random.default_rng(seed)
+    return [
+        encode_frame(
+            rng.integers(0, 256, (64, 64, 3), dtype=np.uint8),
+            float(second),
+            FrameFormat(),
+        )
+        for second in range(6)
+    ]
+
+
+def _job(batch, tweet_id, frames):
+    job = _VisionJob(
+        Candidate(
+            tweet_url=f"https://x.com/user/status/{tweet_id}",
+            text="test",
+            author="test",
+            created_at="Sun Oct 05 12:00:00 +0000 2025",
+        ),
+        batch,
+    )
+    job.frames = frames
+    return job
+
+
+async def test_copies_wait_for_original_and_take_over_when_it_fails():
+    """
+    Ensures a copy of a video waits for the original's analysis, analyzes
+    the video itself when that analysis fails, and is skipped in favour of
+    an original that succeeded.
+    """
+    frames = _frames_of_video(0)
+    batch = _VisionBatch("test", 30)
+    original, copy, late_copy = (_job(batch, i, frames) for i in range(3))
+
+    assert await _find_original(original) is None
+    waiting = asyncio.create_task(_find_original(copy))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    _settle_media(original, analyzed=False)
+    assert await waiting is None
+    assert [job for _, job in batch.media] == [copy]
+
+    waiting = asyncio.create_task(_find_original(late_copy))
+    await asyncio.sleep(0.05)
+    _settle_media(copy, analyzed=True)
+    assert await waiting is copy
+    assert await _find_original(_job(batch, 3, _frames_of_video(1))) is None
+
+
+async def test_window_edge_tolerance_follows_sampling_interval(mocker):
+    """
+    Ensures findings are stitched across window edges within two sampling
+    intervals, however far apart deduplication left the frames.
+    """
+    mocker.patch("src.vision.analyzer.settings.vision_window_seconds", new=10)
+    mocker.patch("src.vision.analyzer.settings.vision_window_overlap_seconds", new=2)
+    session = AsyncMock()
+    session.encode.side_effect = lambda frames, stage: _EncodedRequest.model_construct(
+        stage=stage,
+        images=frames,
+    )
+    frames = [f for f in _frames_of_video(0) if f.timestamp_s in {0, 5}]
+    frames += [f.model_copy(update={"timestamp_s": 30.0}) for f in frames[:1]]
+
+    encoded = await _encode_windowed_pass(session, frames, "single", 2)
+
+    assert len(encoded.windows) > 1
+    assert encoded.edge_tolerance_seconds == 4
+
+
+async def test_schedule_ranks_llm_scores_ahead_of_local_scores():
+    """
+    Ensures candidates scored by the LLM are scheduled by that score, ahead
+    of the ones only accepted by the local prefilter, whatever their keyword
+    score.
+    """
+    scores = {1: (0.6, None), 2: (None, 0.95), 3: (0.8, None), 4: (None, None)}
+    candidates = [
+        _job(None, tweet_id, []).candidate.model_copy(
+            update={"text_score": text_score, "lexical_score": lexical_score},
+        )
+        for tweet_id, (text_score, lexical_score) in scores.items()
+    ]
+
+    ordered = sorted(candidates, key=_schedule_key, reverse=True)
+
+    assert [c.tweet_url.path[-1] for c in ordered] == ["3", "1", "2", "4"]
+
+
+@pytest.mark.parametrize(
+    ("last_frame_s", "downloaded"),
+    [(10.0, True), (28.0, False)],
+)
+async def test_stream_cut_short_falls_back_to_download(
+    mocker,
+    last_frame_s,
+    downloaded,
+):
+    """
+    Ensures a stream that ends well before the video's duration is treated
+    as failed and the video downloaded instead, while a complete one is kept.
+    """
+    mocker.patch("src.vision.analyzer.settings.vision_streaming", new=True)
+    mocker.patch("src.vision.analyzer.settings.vision_two_pass", new=False)
+    mocker.patch("src.vision.analyzer.get_video_cache").return_value.enabled = False
+    frames = [
+        f.model_copy(update={"timestamp_s": timestamp_s})
+        for f, timestamp_s in zip(
+            _frames_of_video(0),
+            [0.0, 2.0, last_frame_s],
+            strict=False,
+        )
+    ]
+    mocker.patch("src.vision.analyzer._stream_frames", return_value=frames)
+    download = mocker.patch(
+        "src.vision.analyzer.download_to_cache",
+        return_value=(Path("video.mp4"), None),
+    )
+    job = _job(_VisionBatch("test", 30), 1, [])
+    job.candidate = job.candidate.model_copy(
+        update={
+            "best_video_url": "https://video.twimg.com/v.mp4",
+            "duration_seconds": 30.0,
+        },
+    )
+
+    assert await _download_stage(job) is job
+
+    assert download.called is downloaded
+    assert job.frames == ([] if downloaded else frames)
+
+
+async def test_batch_reports_tokens_of_analyses_without_findings(
+    dummy_video_file,
+    mocker,
+):
+    """
+    Ensures the tokens and frame encodings of a Gemini call that found
+    nothing are still reported for the batch.
+    """
+    mocker.patch("src.vision.analyzer.settings.vision_two_pass", new=False)
+    mocker.patch(
+        "src.vision.analyzer.get_vision_result_cache",
+    ).return_value.enabled = False
+
+    async def download(job):
+        job.video_path = dummy_video_file
+        return job
+
+    mocker.patch("src.vision.analyzer._download_stage", side_effect=download)
+    structured_llm = AsyncMock()
+    structured_llm.ainvoke.return_value = {
+        "raw": AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 90,
+                "output_tokens": 10,
+                "total_tokens": 100,
+            },
+        ),
+        "parsed": _VisionAnalysisResponse(findings=[]),
+        "parsing_error": None,
+    }
+    llm = mocker.patch("src.vision.analyzer.ChatGoogleGenerativeAI").return_value
+    llm.with_structured_output.return_value = structured_llm
+
+    batch = await analyze_videos([_job(None, 1, []).candidate], "test", 30)
+
+    assert batch.results == []
+    assert batch.token_usage == {"single": 100}
+    assert [e.stage for e in batch.frame_encodings] == ["single"]
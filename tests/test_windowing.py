@@ -0,0 +1,52 @@
+from src.schemas import ClipFindings
+from src.vision.sampling import SampledFrame
+from src.vision.windowing import FrameWindow
+from src.vision.windowing import WindowFindings
+from src.vision.windowing import merge_window_findings
+from src.vision.windowing import split_windows
+
+
+def _clip(start_s, end_s, confidence, reason="Match."):
+    return ClipFindings(
+        start_time_s=start_s,
+        end_time_s=end_s,
+        confidence=confidence,
+        reason=reason,
+    )
+
+
+def test_split_windows_overlaps_and_covers_every_frame():
+    """
+    Ensures consecutive windows share the overlap and every frame is kept.
+    """
+    frames = [SampledFrame(timestamp_s=t, image=b"") for t in range(0, 300, 2)]
+
+    windows = split_windows(frames, window_seconds=120, overlap_seconds=20)
+
+    assert [(w.start_s, w.end_s) for w in windows] == [(0, 120), (100, 220), (200, 320)]
+    seen = {f.timestamp_s for w in windows for f in w.frames}
+    assert seen == {f.timestamp_s for f in frames}
+
+
+def test_merge_window_findings_stitches_and_deduplicates():
+    """
+    Ensures a clip cut by a window boundary is stitched back together and a
+    clip seen by two windows is only reported once.
+    """
+    first = FrameWindow(start_s=0, end_s=120)
+    second = FrameWindow(start_s=100, end_s=220)
+    results = [
+        WindowFindings(
+            window=first,
+            findings=[_clip(10, 25, 0.7), _clip(105, 119, 0.6), _clip(112, 119, 0.5)],
+        ),
+        WindowFindings(
+            window=second,
+            findings=[_clip(100, 128, 0.8), _clip(10.5, 25, 0.9)],
+        ),
+    ]
+
+    merged = merge_window_findings(results, edge_tolerance_seconds=2)
+
+    spans = [(f.start_time_s, f.end_time_s, f.confidence) for f in merged]
+    assert spans == [(10.5, 25, 0.9), (105, 128, 0.8)]